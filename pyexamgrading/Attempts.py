@@ -0,0 +1,109 @@
+#	pyexamgrading - Manage grade computation of university exams
+#	Copyright (C) 2024-2024 Johannes Bauer
+#
+#	This file is part of pyexamgrading.
+#
+#	pyexamgrading is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyexamgrading is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyexamgrading; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import os
+import enum
+import collections
+from .Exam import Exam
+from .Exceptions import DuplicateException
+
+class ResolutionPolicy(enum.Enum):
+	BestAttempt = "best"
+	LatestAttempt = "latest"
+
+class AttemptResolver():
+	AttemptGrade = collections.namedtuple("AttemptGrade", [ "attempt_index", "exam", "grade", "attempted" ])
+	ResolvedGrade = collections.namedtuple("ResolvedGrade", [ "student", "attempts", "final" ])
+
+	def __init__(self, exams: list[Exam], policy: ResolutionPolicy = ResolutionPolicy.BestAttempt, carry_over_groups: list[str] | None = None):
+		self._exams = exams
+		self._policy = policy
+		self._carry_over_groups = set(carry_over_groups or [ ])
+
+	@property
+	def exams(self):
+		return self._exams
+
+	@classmethod
+	def load_chain(cls, filename: str, **kwargs):
+		# Follow the "previous_attempt" links back to the first attempt, then
+		# return the attempts in chronological order.
+		filenames = [ ]
+		exams = [ ]
+		while filename is not None:
+			if os.path.realpath(filename) in filenames:
+				raise DuplicateException(f"Exam attempts form a cycle: {filename} is linked twice.")
+			filenames.append(os.path.realpath(filename))
+			exam = Exam.load_json(filename)
+			exams.insert(0, exam)
+			if exam.previous_attempt is None:
+				break
+			filename = os.path.join(os.path.dirname(filename), exam.previous_attempt)
+		return cls(exams, **kwargs)
+
+	@classmethod
+	def load_files(cls, filenames: list[str], **kwargs):
+		if len(filenames) == 1:
+			return cls.load_chain(filenames[0], **kwargs)
+		return cls([ Exam.load_json(filename) for filename in filenames ], **kwargs)
+
+	def _carried_over_tasks(self, exam: Exam):
+		return [ task.name for task in exam.structure if task.group in self._carry_over_groups ]
+
+	def _choose_final(self, attempts: list["AttemptGrade"]):
+		# Rosters usually contain the whole course, so only attempts in which
+		# the student has results of their own are taken into account.
+		attempts = [ attempt for attempt in attempts if attempt.attempted ] or attempts
+		match self._policy:
+			case ResolutionPolicy.LatestAttempt:
+				return attempts[-1]
+
+			case ResolutionPolicy.BestAttempt:
+				complete_attempts = [ attempt for attempt in attempts if attempt.grade.complete_data ]
+				if len(complete_attempts) == 0:
+					return attempts[-1]
+				return min(complete_attempts, key = lambda attempt: (attempt.grade.grade.value, -attempt.attempt_index))
+
+	def resolve(self):
+		# Results of carried over tasks are only referenced from the attempt in
+		# which they were achieved; they are merged into the completed tasks of
+		# later attempts while grading, never copied into their ExamResults.
+		attempts_by_student_number = collections.OrderedDict()
+		students_by_student_number = { }
+		carried_by_student_number = collections.defaultdict(dict)
+		for (attempt_index, exam) in enumerate(self._exams):
+			carried_over_tasks = self._carried_over_tasks(exam)
+			for student in sorted(exam.students):
+				students_by_student_number[student.student_number] = student
+				completed_tasks = exam.results.get_all(student)
+				carried = carried_by_student_number[student.student_number]
+				if len(carried) > 0:
+					completed_tasks = { **{ task_name: carried[task_name] for task_name in carried_over_tasks if task_name in carried }, **completed_tasks }
+				grade = exam.grade(student, completed_tasks = completed_tasks)
+				attempts_by_student_number.setdefault(student.student_number, [ ]).append(self.AttemptGrade(attempt_index = attempt_index, exam = exam, grade = grade, attempted = exam.results.tasks_with_result(student) != 0))
+
+				for task_name in carried_over_tasks:
+					value = completed_tasks.get(task_name)
+					if value is not None:
+						carried[task_name] = value
+
+		for (student_number, attempts) in attempts_by_student_number.items():
+			yield self.ResolvedGrade(student = students_by_student_number[student_number], attempts = attempts, final = self._choose_final(attempts))
@@ -0,0 +1,88 @@
+#	pyexamgrading - Manage grade computation of university exams
+#	Copyright (C) 2024-2024 Johannes Bauer
+#
+#	This file is part of pyexamgrading.
+#
+#	pyexamgrading is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyexamgrading is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyexamgrading; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import bisect
+import fractions
+import collections
+
+class BorderlineIndex():
+	BorderlineStudent = collections.namedtuple("BorderlineStudent", [ "entry", "point_difference", "candidate_tasks" ])
+	BorderlineGroup = collections.namedtuple("BorderlineGroup", [ "boundary", "students" ])
+	CandidateTask = collections.namedtuple("CandidateTask", [ "task", "missing_data", "possible_gain" ])
+
+	def __init__(self, exam: "Exam", entries: list, resolution: fractions.Fraction = fractions.Fraction(1, 100)):
+		self._exam = exam
+		self._entries = sorted(entries, key = lambda entry: entry.grade.grade.achieved_points)
+		self._points = [ entry.grade.grade.achieved_points for entry in self._entries ]
+		self._boundaries = exam.grading_scheme.boundaries(exam.structure.max_points, resolution = resolution)
+
+	@property
+	def boundaries(self):
+		return self._boundaries
+
+	@staticmethod
+	def candidate_tasks(entry: "StudentResult", point_difference: fractions.Fraction):
+		# Tasks which could move the student over the boundary: all tasks
+		# with missing results, then those in which the remaining points
+		# alone would close the gap, with the largest potential first.
+		candidates = [ ]
+		for contribution in entry.grade.breakdown_by_task.values():
+			possible_gain = (contribution.task.max_points - contribution.original_points) * contribution.task.scalar
+			if contribution.missing_data or ((possible_gain > 0) and (possible_gain >= point_difference)):
+				candidates.append(BorderlineIndex.CandidateTask(task = contribution.task, missing_data = contribution.missing_data, possible_gain = possible_gain))
+		candidates.sort(key = lambda candidate: (not candidate.missing_data, -candidate.possible_gain))
+		return candidates
+
+	def query(self, window_below: fractions.Fraction, window_above: fractions.Fraction = fractions.Fraction(0), grade_texts: set[str] | None = None):
+		# Every student is listed at the next boundary above their grade (if
+		# within the window below it) and, when window_above is given, at the
+		# boundary they have just passed. Students are classified by their
+		# grade, because a boundary which lies exactly on a rounding threshold
+		# may itself still give the worse grade.
+		groups = [ ]
+		for (boundary_index, boundary) in enumerate(self._boundaries):
+			if boundary_index == 0:
+				continue
+			if (grade_texts is not None) and (boundary.grade.text not in grade_texts):
+				continue
+			previous_boundary = self._boundaries[boundary_index - 1]
+			next_boundary = self._boundaries[boundary_index + 1] if (boundary_index + 1 < len(self._boundaries)) else None
+
+			below_start = bisect.bisect_left(self._points, max(boundary.points - window_below, previous_boundary.points))
+			above_end = bisect.bisect_right(self._points, boundary.points + window_above)
+			if next_boundary is not None:
+				above_end = min(above_end, bisect.bisect_right(self._points, next_boundary.points))
+
+			students = [ ]
+			for entry in self._entries[below_start : above_end]:
+				grade_value = entry.grade.grade.value
+				if boundary.grade.value < grade_value <= previous_boundary.grade.value:
+					below = True
+				elif (window_above > 0) and (grade_value == boundary.grade.value):
+					below = False
+				else:
+					continue
+				point_difference = boundary.points - entry.grade.grade.achieved_points
+				candidates = self.candidate_tasks(entry, point_difference) if below else [ ]
+				students.append(self.BorderlineStudent(entry = entry, point_difference = point_difference, candidate_tasks = candidates))
+			if len(students) > 0:
+				groups.append(self.BorderlineGroup(boundary = boundary, students = students))
+		return groups
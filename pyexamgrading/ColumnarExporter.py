@@ -0,0 +1,231 @@
+#	pyexamgrading - Manage grade computation of university exams
+#	Copyright (C) 2024-2024 Johannes Bauer
+#
+#	This file is part of pyexamgrading.
+#
+#	pyexamgrading is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyexamgrading is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyexamgrading; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import io
+import sys
+import json
+import math
+import zlib
+import array
+import struct
+
+class ColumnarExporter():
+	# Stdlib-only fallback format, used when pyarrow is not available. The
+	# file consists of the magic, then the zlib-compressed chunks of all
+	# columns, followed by a JSON footer which records, for every column, the
+	# offset and size of each of its chunks. Readers therefore only need to
+	# read the footer and the chunks of the columns they are interested in.
+	#
+	#   magic | chunk* | footer (JSON) | footer length (uint64 LE) | magic
+	#
+	# Every chunk starts with one validity byte per row. Float columns store
+	# little-endian doubles, bool columns one byte per row and string columns
+	# uint32 LE end offsets followed by the concatenated UTF-8 data.
+	MAGIC = b"PYEXCOL1"
+	VERSION = 1
+
+	def __init__(self, exam: "Exam", entries: list, chunk_rows: int = 65536, rank_index: "RankIndex | None" = None):
+		self._exam = exam
+		self._entries = entries
+		self._chunk_rows = chunk_rows
+		self._rank_index = rank_index
+
+	@property
+	def columns(self):
+		columns = [
+			("exam_name", "string", lambda entry: self._exam.name),
+			("exam_date", "string", lambda entry: self._exam.date),
+			("student_number", "string", lambda entry: entry.student.student_number),
+			("last_name", "string", lambda entry: entry.student.last_name),
+			("first_name", "string", lambda entry: entry.student.first_name),
+			("email", "string", lambda entry: entry.student.email),
+			("course", "string", lambda entry: entry.student.course),
+		]
+		for task in self._exam.structure:
+			columns.append((f"{task.name}:original", "float", lambda entry, name = task.name: self._task_points(entry, name, "original_points")))
+		for task in self._exam.structure:
+			columns.append((f"{task.name}:scaled", "float", lambda entry, name = task.name: self._task_points(entry, name, "scaled_points")))
+		columns += [
+			("total_points", "float", lambda entry: entry.grade.grade.achieved_points),
+			("max_points", "float", lambda entry: entry.grade.grade.max_points),
+			("percent", "float", lambda entry: 100 * entry.grade.grade.achieved_points / entry.grade.grade.max_points),
+			("grade", "float", lambda entry: entry.grade.grade.value),
+			("grade_text", "string", lambda entry: entry.grade.grade.text),
+			("passing", "bool", lambda entry: entry.grade.grade.passing),
+			("complete_data", "bool", lambda entry: entry.grade.complete_data),
+		]
+		if self._rank_index is not None:
+			columns += [
+				("rank", "float", lambda entry: self._rank_index.rank_of(entry.student.student_number) if (entry.student.student_number in self._rank_index) else None),
+				("percentile", "float", lambda entry: self._rank_index.percentile_of(entry.student.student_number) if (entry.student.student_number in self._rank_index) else None),
+			]
+		return columns
+
+	@staticmethod
+	def _task_points(entry: "StudentResult", task_name: str, field_name: str):
+		contribution = entry.grade.breakdown_by_task[task_name]
+		if contribution.missing_data:
+			return None
+		return getattr(contribution, field_name)
+
+	def _column_values(self, getter, entries: list):
+		values = [ getter(entry) for entry in entries ]
+		return [ value if ((value is None) or isinstance(value, (str, bool))) else float(value) for value in values ]
+
+	@staticmethod
+	def _encode_chunk( column_type: str, values: list):
+		chunk = bytearray(0 if (value is None) else 1 for value in values)
+		match column_type:
+			case "float":
+				doubles = array.array("d", (math.nan if (value is None) else value for value in values))
+				if sys.byteorder != "little":
+					doubles.byteswap()
+				chunk += doubles.tobytes()
+			case "bool":
+				chunk += bytes(1 if value else 0 for value in values)
+			case "string":
+				encoded = [ b"" if (value is None) else value.encode("utf-8") for value in values ]
+				offsets = array.array("I")
+				end = 0
+				for data in encoded:
+					end += len(data)
+					offsets.append(end)
+				if sys.byteorder != "little":
+					offsets.byteswap()
+				chunk += offsets.tobytes()
+				chunk += b"".join(encoded)
+		return zlib.compress(chunk)
+
+	def write_pyexcol(self, filename: str):
+		footer = {
+			"version": self.VERSION,
+			"exam": self._exam.name,
+			"row_count": len(self._entries),
+			"columns": [ ],
+		}
+		with open(filename, "wb") as f:
+			f.write(self.MAGIC)
+			for (name, column_type, getter) in self.columns:
+				column = { "name": name, "type": column_type, "chunks": [ ] }
+				for offset in range(0, len(self._entries), self._chunk_rows):
+					chunk_entries = self._entries[offset : offset + self._chunk_rows]
+					chunk = self._encode_chunk(column_type, self._column_values(getter, chunk_entries))
+					column["chunks"].append({ "offset": f.tell(), "length": len(chunk), "rows": len(chunk_entries) })
+					f.write(chunk)
+				footer["columns"].append(column)
+			footer_data = json.dumps(footer).encode("utf-8")
+			f.write(footer_data)
+			f.write(struct.pack("<Q", len(footer_data)))
+			f.write(self.MAGIC)
+
+	def write_parquet(self, filename: str):
+		try:
+			import pyarrow
+			import pyarrow.parquet
+		except ImportError as e:
+			raise ImportError("Writing Parquet files requires pyarrow; write a .pyexcol file instead or use the 'columnar' output type.") from e
+
+		arrow_types = {
+			"string": pyarrow.string(),
+			"float": pyarrow.float64(),
+			"bool": pyarrow.bool_(),
+		}
+		columns = self.columns
+		schema = pyarrow.schema([ (name, arrow_types[column_type]) for (name, column_type, getter) in columns ], metadata = { "exam": self._exam.name })
+		with pyarrow.parquet.ParquetWriter(filename, schema) as writer:
+			for offset in range(0, len(self._entries), self._chunk_rows):
+				chunk_entries = self._entries[offset : offset + self._chunk_rows]
+				arrays = [ pyarrow.array(self._column_values(getter, chunk_entries), type = arrow_types[column_type]) for (name, column_type, getter) in columns ]
+				writer.write_table(pyarrow.Table.from_arrays(arrays, schema = schema))
+
+	@staticmethod
+	def have_pyarrow():
+		try:
+			import pyarrow.parquet
+			return True
+		except ImportError:
+			return False
+
+	def write(self, filename: str):
+		if self.have_pyarrow():
+			self.write_parquet(filename)
+		else:
+			self.write_pyexcol(filename)
+
+class ColumnarReader():
+	def __init__(self, filename: str):
+		self._filename = filename
+		with open(filename, "rb") as f:
+			f.seek(-8 - 8, io.SEEK_END)
+			(footer_length, ) = struct.unpack("<Q", f.read(8))
+			if f.read(8) != ColumnarExporter.MAGIC:
+				raise ValueError(f"Not a columnar pyexamgrading file: {filename}")
+			f.seek(-8 - 8 - footer_length, io.SEEK_END)
+			self._footer = json.loads(f.read(footer_length))
+		self._columns = { column["name"]: column for column in self._footer["columns"] }
+
+	@property
+	def row_count(self):
+		return self._footer["row_count"]
+
+	@property
+	def column_names(self):
+		return list(self._columns)
+
+	@staticmethod
+	def _decode_chunk(column_type: str, data: bytes, rows: int):
+		validity = data[:rows]
+		payload = data[rows:]
+		match column_type:
+			case "float":
+				doubles = array.array("d")
+				doubles.frombytes(payload)
+				if sys.byteorder != "little":
+					doubles.byteswap()
+				values = list(doubles)
+			case "bool":
+				values = [ value != 0 for value in payload ]
+			case "string":
+				offsets = array.array("I")
+				offsets.frombytes(payload[:4 * rows])
+				if sys.byteorder != "little":
+					offsets.byteswap()
+				strings = payload[4 * rows:]
+				values = [ ]
+				start = 0
+				for end in offsets:
+					values.append(strings[start : end].decode("utf-8"))
+					start = end
+		return [ value if valid else None for (valid, value) in zip(validity, values) ]
+
+	def read_column(self, name: str):
+		column = self._columns[name]
+		values = [ ]
+		with open(self._filename, "rb") as f:
+			for chunk in column["chunks"]:
+				f.seek(chunk["offset"])
+				values += self._decode_chunk(column["type"], zlib.decompress(f.read(chunk["length"])), chunk["rows"])
+		return values
+
+	def read(self, column_names: list[str] | None = None):
+		if column_names is None:
+			column_names = self.column_names
+		return { name: self.read_column(name) for name in column_names }
@@ -0,0 +1,145 @@
+#	pyexamgrading - Manage grade computation of university exams
+#	Copyright (C) 2024-2024 Johannes Bauer
+#
+#	This file is part of pyexamgrading.
+#
+#	pyexamgrading is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyexamgrading is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyexamgrading; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import os
+import re
+import json
+import base64
+
+class EmailWriter():
+	# A multiple of 3 so that chunks encode to base64 without padding and can
+	# simply be concatenated.
+	_BASE64_CHUNK_SIZE = 3 * 64 * 1024
+
+	def __init__(self, output_filename: str, force: bool = False):
+		self._output_filename = output_filename
+		self._force = force
+		self._count = 0
+
+	@property
+	def count(self):
+		return self._count
+
+	@classmethod
+	def _write_base64(cls, f, data: bytes):
+		view = memoryview(data)
+		for offset in range(0, len(view), cls._BASE64_CHUNK_SIZE):
+			f.write(base64.b64encode(view[offset : offset + cls._BASE64_CHUNK_SIZE]).decode("ascii"))
+
+	def _write_student_object(self, f, student, pdf_data: bytes):
+		student_json = json.dumps(student.to_dict())
+		f.write(f"{{\"student\": {student_json}, \"result_pdf\": \"")
+		self._write_base64(f, pdf_data)
+		f.write("\"}")
+
+	def open(self):
+		pass
+
+	def write_global(self, exam):
+		raise NotImplementedError(self.__class__.__name__)
+
+	def write_individual(self, student, pdf_data: bytes):
+		raise NotImplementedError(self.__class__.__name__)
+
+	def close(self, success: bool = True):
+		pass
+
+	def __enter__(self):
+		self.open()
+		return self
+
+	def __exit__(self, *exception):
+		self.close(success = exception[0] is None)
+
+class JSONEmailWriter(EmailWriter):
+	def open(self):
+		self._tmp_filename = f"{self._output_filename}.{os.getpid()}.tmp"
+		self._f = open(self._tmp_filename, "x")
+
+	def write_global(self, exam):
+		global_json = json.dumps({ "exam": exam.to_dict() })
+		self._f.write(f"{{\"global\": {global_json}, \"individual\": [")
+
+	def write_individual(self, student, pdf_data: bytes):
+		if self._count > 0:
+			self._f.write(", ")
+		self._write_student_object(self._f, student, pdf_data)
+		self._count += 1
+
+	def close(self, success: bool = True):
+		if success:
+			self._f.write("]}")
+		self._f.close()
+		if success:
+			os.replace(self._tmp_filename, self._output_filename)
+		else:
+			os.unlink(self._tmp_filename)
+
+class NDJSONEmailWriter(EmailWriter):
+	def open(self):
+		self._f = open(self._output_filename, "w" if self._force else "x")
+
+	def write_global(self, exam):
+		self._f.write(json.dumps({ "global": { "exam": exam.to_dict() } }))
+		self._f.write("\n")
+		self._f.flush()
+
+	def write_individual(self, student, pdf_data: bytes):
+		self._write_student_object(self._f, student, pdf_data)
+		self._f.write("\n")
+		self._f.flush()
+		self._count += 1
+
+	def close(self, success: bool = True):
+		self._f.close()
+
+class DirectoryEmailWriter(EmailWriter):
+	_OUTPUT_FILENAME_REGEX = re.compile(r"(global\.json|\d{5}\.(json|pdf))(\.tmp)?")
+
+	def open(self):
+		os.makedirs(self._output_filename, exist_ok = self._force)
+
+		# Files are numbered by position, so output of an earlier run with
+		# more students would otherwise remain next to the new files.
+		for filename in os.listdir(self._output_filename):
+			if self._OUTPUT_FILENAME_REGEX.fullmatch(filename):
+				os.unlink(os.path.join(self._output_filename, filename))
+
+	def _write_json_file(self, filename: str, data: dict):
+		# Per-student JSON files only appear once complete so that a consumer
+		# which watches the directory never sees a partial file.
+		full_filename = os.path.join(self._output_filename, filename)
+		with open(f"{full_filename}.tmp", "w") as f:
+			json.dump(data, f)
+		os.replace(f"{full_filename}.tmp", full_filename)
+
+	def write_global(self, exam):
+		self._write_json_file("global.json", { "exam": exam.to_dict() })
+
+	def write_individual(self, student, pdf_data: bytes):
+		self._count += 1
+		pdf_filename = f"{self._count:05d}.pdf"
+		with open(os.path.join(self._output_filename, pdf_filename), "wb") as f:
+			f.write(pdf_data)
+		self._write_json_file(f"{self._count:05d}.json", {
+			"student": student.to_dict(),
+			"result_pdf_filename": pdf_filename,
+		})
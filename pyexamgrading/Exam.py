@@ -21,12 +21,14 @@
 
 import os
 import json
+import shutil
 import dataclasses
 import collections
 from .GradingScheme import GradingScheme
 from .Structure import Structure
 from .Student import Students
 from .ExamResults import ExamResults
+from .RankIndex import RankIndex
 
 @dataclasses.dataclass
 class ComputedGrade():
@@ -36,7 +38,12 @@ class ComputedGrade():
 	complete_data: bool
 
 class Exam():
-	def __init__(self, name: str, date: str, lecturer: str, grading_scheme: GradingScheme, structure: Structure, students: list["Student"] | None, results: ExamResults | None, mtime: float | None):
+	_pre_write_hook = None
+	TaskProgress = collections.namedtuple("TaskProgress", [ "task", "entered", "missing" ])
+	Progress = collections.namedtuple("Progress", [ "student_count", "complete_count", "entered", "total", "tasks" ])
+	_load_cache = None
+
+	def __init__(self, name: str, date: str, lecturer: str, grading_scheme: GradingScheme, structure: Structure, students: list["Student"] | None, results: ExamResults | None, mtime: float | None, previous_attempt: str | None = None):
 		self._name = name
 		self._date = date
 		self._lecturer = lecturer
@@ -49,6 +56,13 @@ class Exam():
 		if self._results is None:
 			self._results = ExamResults()
 		self._mtime = mtime
+		self._previous_attempt = previous_attempt
+		self._grade_cache = { }
+		self._grade_cache_generation = None
+		self._completeness = None
+		self._completeness_key = None
+		self._rank_index = None
+		self._rank_index_key = None
 
 	@property
 	def name(self):
@@ -86,11 +100,106 @@ class Exam():
 	def mtime(self):
 		return self._mtime
 
+	@property
+	def previous_attempt(self):
+		return self._previous_attempt
+
+	@previous_attempt.setter
+	def previous_attempt(self, value: str | None):
+		self._previous_attempt = value
+
 	def clear_results(self):
-		self._results = { }
+		self._results = ExamResults()
+		self._grade_cache_generation = None
+
+	def grade(self, student: "Student", completed_tasks: dict | None = None):
+		if completed_tasks is not None:
+			return self._grade(completed_tasks)
+
+		# Grades only depend on the results, so they remain valid until any
+		# result changes.
+		if self._grade_cache_generation != self.results.generation:
+			self._grade_cache = { }
+			self._grade_cache_generation = self.results.generation
+		if student.student_number not in self._grade_cache:
+			self._grade_cache[student.student_number] = self._grade(self.results.get_all(student))
+		return self._grade_cache[student.student_number]
+
+	def _completeness_masks(self):
+		# Bitsets of all students and of the students of each course, in the
+		# bit positions of the results' completeness matrix. They only need
+		# to be rebuilt when students are added or removed.
+		key = (id(self._results), id(self._students), self._students.generation)
+		if self._completeness_key != key:
+			all_mask = 0
+			course_masks = collections.defaultdict(int)
+			for student in self._students:
+				student_bit = self._results.student_mask([ student.student_number ])
+				all_mask |= student_bit
+				course_masks[student.course or ""] |= student_bit
+			structure_mask = self._results.task_mask(task.name for task in self._structure)
+			self._completeness = (all_mask, dict(course_masks), structure_mask)
+			self._completeness_key = key
+		return self._completeness
+
+	def _roster_mask(self, course: str | None = None, exact_course: bool = False):
+		(all_mask, course_masks, structure_mask) = self._completeness_masks()
+		if course is None:
+			return all_mask
+		if exact_course:
+			return course_masks.get(course, 0)
+		mask = 0
+		for (course_name, course_mask) in course_masks.items():
+			if course.lower() in course_name.lower():
+				mask |= course_mask
+		return mask
+
+	def has_complete_results(self, student: "Student"):
+		structure_mask = self._completeness_masks()[2]
+		return (self._results.tasks_with_result(student) & structure_mask) == structure_mask
+
+	def students_missing(self, task_name: str, course: str | None = None):
+		mask = self._roster_mask(course) & ~self._results.students_with_result(task_name)
+		return [ self._students.get_student_by_student_number(student_number) for student_number in self._results.student_numbers_of(mask) ]
+
+	def progress(self, course: str | None = None, exact_course: bool = False):
+		roster_mask = self._roster_mask(course, exact_course = exact_course)
+		student_count = roster_mask.bit_count()
+		complete_mask = roster_mask
+		tasks = [ ]
+		for task in self._structure:
+			task_mask = roster_mask & self._results.students_with_result(task.name)
+			complete_mask &= task_mask
+			entered = task_mask.bit_count()
+			tasks.append(self.TaskProgress(task = task, entered = entered, missing = student_count - entered))
+		entered = sum(task_progress.entered for task_progress in tasks)
+		return self.Progress(student_count = student_count, complete_count = complete_mask.bit_count(), entered = entered, total = student_count * len(tasks), tasks = tasks)
+
+	def _ranked_students(self):
+		# Everyone who has at least one result takes part in the ranking
+		return (student for student in self._students if (self._results.tasks_with_result(student) != 0))
+
+	def rank_index(self):
+		# Kept up to date by update_rank(); any other change of results or
+		# students causes a rebuild on the next access.
+		key = (id(self._results), self._results.generation, id(self._students), self._students.generation)
+		if self._rank_index_key != key:
+			self._rank_index = RankIndex.from_points({ student.student_number: self.grade(student).grade.achieved_points for student in self._ranked_students() }, max_points = self._structure.max_points)
+			self._rank_index_key = key
+		return self._rank_index
 
-	def grade(self, student: "Student"):
-		completed_tasks = self.results.get_all(student)
+	def update_rank(self, student: "Student"):
+		# Must be called after results of only this student have changed
+		if self._rank_index is None:
+			return self.rank_index()
+		if self._results.tasks_with_result(student) != 0:
+			self._rank_index.set(student.student_number, self.grade(student).grade.achieved_points)
+		else:
+			self._rank_index.remove(student.student_number)
+		self._rank_index_key = (id(self._results), self._results.generation, id(self._students), self._students.generation)
+		return self._rank_index
+
+	def _grade(self, completed_tasks: dict):
 		exam_grade_result = self.structure.grade(completed_tasks)
 		grade = self.grading_scheme.grade(exam_grade_result.total_points, self.structure.max_points)
 		next_best_grade = self.grading_scheme.next_best_grade_at(exam_grade_result.total_points, self.structure.max_points, must_be_passing_grade = True)
@@ -103,31 +212,93 @@ class Exam():
 		structure = Structure.from_dict(exam_data["structure"])
 		students = Students.from_list(exam_data.get("students", [ ]))
 		results = ExamResults(exam_data.get("results"))
-		return cls(name = exam_data["name"], date = exam_data["date"], lecturer = exam_data["lecturer"], grading_scheme = grading_scheme, structure = structure, students = students, results = results, mtime = mtime)
+		return cls(name = exam_data["name"], date = exam_data["date"], lecturer = exam_data["lecturer"], grading_scheme = grading_scheme, structure = structure, students = students, results = results, mtime = mtime, previous_attempt = exam_data.get("previous_attempt"))
 
 	def to_dict(self):
-		return collections.OrderedDict((
+		result = collections.OrderedDict((
 			("name", self._name),
 			("date", self._date),
 			("lecturer", self._lecturer),
-			("grading_scheme", self._grading_scheme.to_dict()),
-			("structure", self._structure.to_dict()),
-			("students", self._students.to_list()),
-			("results", self._results.to_dict()),
 		))
+		if self._previous_attempt is not None:
+			result["previous_attempt"] = self._previous_attempt
+		result["grading_scheme"] = self._grading_scheme.to_dict()
+		result["structure"] = self._structure.to_dict()
+		result["students"] = self._students.to_list()
+		result["results"] = self._results.to_dict()
+		return result
+
+	@classmethod
+	def set_load_cache(cls, cache: "ExamCache | None"):
+		cls._load_cache = cache
+
+	@classmethod
+	def set_pre_write_hook(cls, hook: "callable | None"):
+		cls._pre_write_hook = hook
 
 	@classmethod
 	def load_json(cls, filename: str):
+		if cls._load_cache is not None:
+			return cls._load_cache.load_json(filename)
+		return cls.load_json_uncached(filename)
+
+	@classmethod
+	def load_json_uncached(cls, filename: str):
 		mtime = os.stat(filename).st_mtime
 		with open(filename) as f:
 			exam_data = json.load(f)
 		return cls.from_dict(exam_data, mtime = mtime)
 
+	@staticmethod
+	def _json_value(value, level: int):
+		return json.dumps(value, indent = "\t").replace("\n", "\n" + ("\t" * level))
+
+	def _write_json_stream(self, f):
+		# Produces exactly the same output as json.dump(self.to_dict(), indent
+		# = "\t"), but never holds more than one student or one result set in
+		# memory at any time.
+		f.write("{\n")
+		for key in [ "name", "date", "lecturer" ]:
+			f.write(f"\t{json.dumps(key)}: {self._json_value(getattr(self, f'_{key}'), 1)},\n")
+		if self._previous_attempt is not None:
+			f.write(f"\t\"previous_attempt\": {self._json_value(self._previous_attempt, 1)},\n")
+		f.write(f"\t\"grading_scheme\": {self._json_value(self._grading_scheme.to_dict(), 1)},\n")
+		f.write(f"\t\"structure\": {self._json_value(self._structure.to_dict(), 1)},\n")
+
+		f.write("\t\"students\": [")
+		for (index, student) in enumerate(sorted(self._students)):
+			f.write(",\n\t\t" if (index > 0) else "\n\t\t")
+			f.write(self._json_value(student.to_dict(), 2))
+		f.write("\n\t],\n" if (len(self._students) > 0) else "],\n")
+
+		f.write("\t\"results\": {")
+		empty = True
+		for (index, (student_number, results)) in enumerate(self._results.serialized_items()):
+			empty = False
+			f.write(",\n\t\t" if (index > 0) else "\n\t\t")
+			f.write(f"{json.dumps(student_number)}: {self._json_value(results, 2)}")
+		f.write("}\n}\n" if empty else "\n\t}\n}\n")
+
 	def write_json(self, filename: str):
-		serialized_data = self.to_dict()
-		with open(filename, "w") as f:
-			json.dump(serialized_data, f, indent = "\t")
-			f.write("\n")
+		pre_write_hook = self.__class__._pre_write_hook
+		if pre_write_hook is not None:
+			pre_write_hook(self)
+
+		# Write to a temporary file next to the destination first and rename
+		# afterwards so that a crash never leaves a truncated exam behind.
+		tmp_filename = f"{filename}.{os.getpid()}.tmp"
+		try:
+			with open(tmp_filename, "x", buffering = 256 * 1024) as f:
+				self._write_json_stream(f)
+				f.flush()
+				os.fsync(f.fileno())
+			if os.path.exists(filename):
+				shutil.copymode(filename, tmp_filename)
+			os.replace(tmp_filename, filename)
+		except BaseException:
+			if os.path.exists(tmp_filename):
+				os.unlink(tmp_filename)
+			raise
 
 	def remove_student(self, student: "Student"):
 		self.students.remove(student)
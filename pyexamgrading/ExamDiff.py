@@ -0,0 +1,155 @@
+#	pyexamgrading - Manage grade computation of university exams
+#	Copyright (C) 2024-2024 Johannes Bauer
+#
+#	This file is part of pyexamgrading.
+#
+#	pyexamgrading is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyexamgrading is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyexamgrading; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import os
+import json
+import fractions
+import subprocess
+import collections
+from .Exam import Exam
+
+class ExamDiff():
+	TaskChange = collections.namedtuple("TaskChange", [ "task_name", "old_value", "new_value" ])
+	StudentDiff = collections.namedtuple("StudentDiff", [ "student_number", "old_student", "new_student", "changed_fields", "task_changes", "old_grade", "new_grade" ])
+
+	def __init__(self, old_data: dict, new_data: dict):
+		# Results are only parsed and graded for students whose raw entries
+		# differ, so the full result sets are never converted to fractions.
+		self._old_results = old_data.get("results") or { }
+		self._new_results = new_data.get("results") or { }
+		self._old_exam = Exam.from_dict(dict(old_data, results = None))
+		self._new_exam = Exam.from_dict(dict(new_data, results = None))
+		self._structure_changed = old_data["structure"] != new_data["structure"]
+		self._grading_scheme_changed = old_data["grading_scheme"] != new_data["grading_scheme"]
+		self._metadata_changes = [ key for key in [ "name", "date", "lecturer", "previous_attempt" ] if old_data.get(key) != new_data.get(key) ]
+		self._students = self._compare()
+
+	@classmethod
+	def load_source(cls, source: str):
+		# Either a file name or a git revision in the form "rev:path".
+		if (not os.path.exists(source)) and (":" in source):
+			data = subprocess.check_output([ "git", "show", source ], stdin = subprocess.DEVNULL)
+			return json.loads(data)
+		with open(source) as f:
+			return json.load(f)
+
+	@classmethod
+	def from_sources(cls, old_source: str, new_source: str):
+		return cls(cls.load_source(old_source), cls.load_source(new_source))
+
+	@property
+	def structure_changed(self):
+		return self._structure_changed
+
+	@property
+	def grading_scheme_changed(self):
+		return self._grading_scheme_changed
+
+	@property
+	def metadata_changes(self):
+		return self._metadata_changes
+
+	@property
+	def students(self):
+		return self._students
+
+	@property
+	def grade_changes(self):
+		return [ student_diff for student_diff in self._students if self.grade_changed(student_diff) ]
+
+	@staticmethod
+	def grade_changed(student_diff: StudentDiff):
+		if (student_diff.old_grade is None) or (student_diff.new_grade is None):
+			return student_diff.old_grade is not student_diff.new_grade
+		return student_diff.old_grade.grade.text != student_diff.new_grade.grade.text
+
+	@staticmethod
+	def passing_changed(student_diff: StudentDiff):
+		if (student_diff.old_grade is None) or (student_diff.new_grade is None):
+			return False
+		return student_diff.old_grade.grade.passing != student_diff.new_grade.grade.passing
+
+	@staticmethod
+	def _parse_results(raw_results: dict):
+		return { name: fractions.Fraction(value) for (name, value) in raw_results.items() if (value is not None) }
+
+	def _task_changes(self, old_results: dict, new_results: dict):
+		task_names = list(old_results) + [ task_name for task_name in new_results if (task_name not in old_results) ]
+		return [ self.TaskChange(task_name = task_name, old_value = old_results.get(task_name), new_value = new_results.get(task_name)) for task_name in task_names if old_results.get(task_name) != new_results.get(task_name) ]
+
+	def _compare(self):
+		regrade_all = self._structure_changed or self._grading_scheme_changed
+		old_students = { student.student_number: student for student in self._old_exam.students }
+		new_students = { student.student_number: student for student in self._new_exam.students }
+		student_numbers = list(old_students) + [ student_number for student_number in new_students if (student_number not in old_students) ]
+
+		differences = [ ]
+		for student_number in student_numbers:
+			old_student = old_students.get(student_number)
+			new_student = new_students.get(student_number)
+			old_raw_results = self._old_results.get(student_number) or { }
+			new_raw_results = self._new_results.get(student_number) or { }
+			if (old_student is not None) and (new_student is not None):
+				if (old_raw_results == new_raw_results) and (old_student == new_student) and (not regrade_all):
+					continue
+				changed_fields = [ field for field in [ "last_name", "first_name", "email", "course", "custom" ] if getattr(old_student, field) != getattr(new_student, field) ]
+			else:
+				changed_fields = [ ]
+
+			old_results = self._parse_results(old_raw_results)
+			new_results = self._parse_results(new_raw_results)
+			task_changes = self._task_changes(old_results, new_results)
+			old_grade = None if (old_student is None) else self._old_exam.grade(old_student, old_results)
+			new_grade = None if (new_student is None) else self._new_exam.grade(new_student, new_results)
+			student_diff = self.StudentDiff(student_number = student_number, old_student = old_student, new_student = new_student, changed_fields = changed_fields, task_changes = task_changes, old_grade = old_grade, new_grade = new_grade)
+			if (old_student is not None) and (new_student is not None) and (len(changed_fields) == 0) and (len(task_changes) == 0) and (not self.grade_changed(student_diff)):
+				# Only the textual representation changed, e.g. "0.5" vs. "1/2",
+				# or a structure change that does not affect this student.
+				continue
+			differences.append(student_diff)
+		return differences
+
+	@property
+	def has_differences(self):
+		return self._structure_changed or self._grading_scheme_changed or (len(self._metadata_changes) > 0) or (len(self._students) > 0)
+
+	def to_dict(self):
+		def grade_dict(grade):
+			if grade is None:
+				return None
+			return { "grade": grade.grade.text, "passing": grade.grade.passing, "points": float(grade.grade.achieved_points), "complete_data": grade.complete_data }
+
+		return {
+			"structure_changed": self._structure_changed,
+			"grading_scheme_changed": self._grading_scheme_changed,
+			"metadata_changes": self._metadata_changes,
+			"students": [ {
+				"student_number": student_diff.student_number,
+				"name": (student_diff.new_student or student_diff.old_student).full_name,
+				"status": "added" if (student_diff.old_student is None) else ("removed" if (student_diff.new_student is None) else "changed"),
+				"changed_fields": student_diff.changed_fields,
+				"task_changes": [ { "task": task_change.task_name, "old": None if (task_change.old_value is None) else str(task_change.old_value), "new": None if (task_change.new_value is None) else str(task_change.new_value) } for task_change in student_diff.task_changes ],
+				"old_grade": grade_dict(student_diff.old_grade),
+				"new_grade": grade_dict(student_diff.new_grade),
+				"grade_changed": self.grade_changed(student_diff),
+				"passing_changed": self.passing_changed(student_diff),
+			} for student_diff in self._students ],
+		}
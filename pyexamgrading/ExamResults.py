@@ -27,6 +27,69 @@ class ExamResults():
 		if self._results_by_student_number is None:
 			self._results_by_student_number = { }
 		self._results_by_student_number = { student_number: { name: fractions.Fraction(value) for (name, value) in self._results_by_student_number[student_number].items() } for student_number in self._results_by_student_number }
+		self._generation = 0
+
+		# Completeness matrix: every student and every task gets a fixed bit
+		# position. For each task there is a bitset of students that have a
+		# result and for each student a bitset of tasks with a result.
+		self._student_numbers = [ ]
+		self._student_slots = { }
+		self._task_names = [ ]
+		self._task_slots = { }
+		self._task_masks = { }
+		self._student_masks = { }
+		for (student_number, results) in self._results_by_student_number.items():
+			for (task_name, value) in results.items():
+				self._mark(student_number, task_name, value is not None)
+
+	@property
+	def generation(self):
+		return self._generation
+
+	@staticmethod
+	def _slot(slots: dict, names: list, name: str):
+		if name not in slots:
+			slots[name] = len(names)
+			names.append(name)
+		return slots[name]
+
+	def _mark(self, student_number: str, task_name: str, present: bool):
+		student_bit = 1 << self._slot(self._student_slots, self._student_numbers, student_number)
+		task_bit = 1 << self._slot(self._task_slots, self._task_names, task_name)
+		if present:
+			self._task_masks[task_name] = self._task_masks.get(task_name, 0) | student_bit
+			self._student_masks[student_number] = self._student_masks.get(student_number, 0) | task_bit
+		else:
+			self._task_masks[task_name] = self._task_masks.get(task_name, 0) & ~student_bit
+			self._student_masks[student_number] = self._student_masks.get(student_number, 0) & ~task_bit
+
+	@staticmethod
+	def _bits(mask: int):
+		while mask:
+			lowest_bit = mask & -mask
+			yield lowest_bit.bit_length() - 1
+			mask ^= lowest_bit
+
+	def student_mask(self, student_numbers):
+		mask = 0
+		for student_number in student_numbers:
+			mask |= 1 << self._slot(self._student_slots, self._student_numbers, student_number)
+		return mask
+
+	def task_mask(self, task_names):
+		mask = 0
+		for task_name in task_names:
+			mask |= 1 << self._slot(self._task_slots, self._task_names, task_name)
+		return mask
+
+	def students_with_result(self, task_name: str):
+		return self._task_masks.get(task_name, 0)
+
+	def tasks_with_result(self, student: "Student"):
+		return self._student_masks.get(student.student_number, 0)
+
+	def student_numbers_of(self, student_mask: int):
+		return [ self._student_numbers[slot] for slot in self._bits(student_mask) ]
 
 	def get_all(self, student: "Student"):
 		student_key = student.student_number
@@ -44,13 +107,38 @@ class ExamResults():
 		return self.get(student, task_name) is not None
 
 	def set(self, student: "Student", task_name: str, value: fractions.Fraction | None):
+		if value is None:
+			self.remove(student, task_name)
+			return
 		student_key = student.student_number
 		if student_key not in self._results_by_student_number:
 			self._results_by_student_number[student_key] = { }
 		self._results_by_student_number[student_key][task_name] = value
+		self._mark(student_key, task_name, True)
+		self._generation += 1
+
+	def remove(self, student: "Student", task_name: str):
+		student_key = student.student_number
+		if task_name not in self._results_by_student_number.get(student_key, { }):
+			return
+		del self._results_by_student_number[student_key][task_name]
+		self._mark(student_key, task_name, False)
+		self._generation += 1
 
 	def remove_student(self, student: "Student"):
-		del self._results_by_student_number[student.student_number]
+		self._results_by_student_number.pop(student.student_number, None)
+		if student.student_number in self._student_slots:
+			student_bit = 1 << self._student_slots[student.student_number]
+			for slot in self._bits(self._student_masks.pop(student.student_number, 0)):
+				self._task_masks[self._task_names[slot]] &= ~student_bit
+		self._generation += 1
+
+	def items(self):
+		return self._results_by_student_number.items()
+
+	def serialized_items(self):
+		for (student_number, results) in self._results_by_student_number.items():
+			yield (student_number, { name: str(value) for (name, value) in results.items() if (value is not None) })
 
 	def to_dict(self):
-		return { student_number: { name: str(value) for (name, value) in self._results_by_student_number[student_number].items() } for student_number in self._results_by_student_number }
+		return dict(self.serialized_items())
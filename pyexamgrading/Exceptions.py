@@ -23,3 +23,5 @@ class TestCorrectionException(Exception): pass
 class DuplicateException(TestCorrectionException): pass
 class UnknownElementException(TestCorrectionException): pass
 class UndefinedElementException(TestCorrectionException): pass
+class RenderingException(TestCorrectionException): pass
+class ValidationException(TestCorrectionException): pass
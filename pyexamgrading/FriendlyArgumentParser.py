@@ -55,6 +55,12 @@ def baseint(value, default_base = 10):
 	else:
 		return int(value, default_base)
 
+def posint(value):
+	value = int(value)
+	if value < 1:
+		raise argparse.ArgumentTypeError(f"must be a positive integer, not {value}")
+	return value
+
 def baseint_unit(value, default_base = 10):
 	units = (
 		("k",	1000),
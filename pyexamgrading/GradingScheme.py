@@ -31,6 +31,7 @@ class GradingSchemeType(enum.Enum):
 class GradingScheme():
 	Grade = collections.namedtuple("Grade", [ "text", "value", "passing", "achieved_points", "max_points" ])
 	HypotheticalGrade = collections.namedtuple("HypotheticalGrade", [ "point_difference", "grade" ])
+	GradeBoundary = collections.namedtuple("GradeBoundary", [ "points", "grade" ])
 
 	def __init__(self, grading_scheme_type: GradingSchemeType, parameters: dict):
 		self._grading_scheme_type = grading_scheme_type
@@ -55,6 +56,10 @@ class GradingScheme():
 				parameters["cutoff_high"] = fractions.Fraction(data.get("cutoff_high", 100)) / 100
 		return cls(grading_scheme_type = grading_scheme_type, parameters = parameters)
 
+	@property
+	def _cutoff_grade(self):
+		return fractions.Fraction(5) if (self.grading_scheme_type == GradingSchemeType.GermanUniversityLinear) else fractions.Fraction(4)
+
 	def grade(self, points: fractions.Fraction, max_points: fractions.Fraction):
 		assert(isinstance(points, fractions.Fraction))
 		assert(isinstance(max_points, fractions.Fraction))
@@ -70,7 +75,7 @@ class GradingScheme():
 				computed_grade = 1 + (fractions.Fraction("3.05") * posrange)
 
 
-				cutoff_grade = fractions.Fraction(5) if (self.grading_scheme_type == GradingSchemeType.GermanUniversityLinear) else fractions.Fraction(4)
+				cutoff_grade = self._cutoff_grade
 				if computed_grade > cutoff_grade:
 					computed_grade = fractions.Fraction(5)
 				elif computed_grade < fractions.Fraction(1):
@@ -82,6 +87,40 @@ class GradingScheme():
 				text = f"{rounded_grade:.1f}"
 				return self.Grade(text = text, value = rounded_grade, passing = passing, achieved_points = points, max_points = max_points)
 
+	def _threshold_points(self, grade_value: fractions.Fraction, max_points: fractions.Fraction):
+		# Exact number of points at which the computed grade reaches the
+		# rounding threshold of the given grade. Depending on how the
+		# threshold is rounded, exactly these points may still give the
+		# worse grade; any more points give this grade.
+		match self.grading_scheme_type:
+			case GradingSchemeType.GermanUniversityLinear | GradingSchemeType.GermanUniversityCutoff:
+				threshold = min(grade_value + fractions.Fraction(1, 20), self._cutoff_grade)
+				cutoff_range = self._parameters["cutoff_high"] - self._parameters["cutoff_low"]
+				return max_points * (self._parameters["cutoff_high"] - ((threshold - 1) * cutoff_range / fractions.Fraction("3.05")))
+
+	def boundaries(self, max_points: fractions.Fraction, resolution: fractions.Fraction = fractions.Fraction(1, 100)):
+		# Grades never get worse with more points, so every grade is found by
+		# bisection on a grid of the given resolution, starting from the worst
+		# grade. Its exact boundary then lies between two grid steps.
+		steps = int(max_points / resolution)
+		boundaries = [ self.GradeBoundary(points = fractions.Fraction(0), grade = self.grade(fractions.Fraction(0), max_points)) ]
+		while True:
+			current_value = boundaries[-1].grade.value
+			if self.grade(steps * resolution, max_points).value >= current_value:
+				break
+			(low, high) = (int(boundaries[-1].points / resolution), steps)
+			while low + 1 < high:
+				middle = (low + high) // 2
+				if self.grade(middle * resolution, max_points).value < current_value:
+					high = middle
+				else:
+					low = middle
+			grade = self.grade(high * resolution, max_points)
+			points = self._threshold_points(grade.value, max_points)
+			assert((high - 1) * resolution <= points <= high * resolution)
+			boundaries.append(self.GradeBoundary(points = points, grade = grade))
+		return boundaries
+
 	def next_best_grade_at(self, points: fractions.Fraction, max_points: fractions.Fraction, step: fractions.Fraction = fractions.Fraction(1, 2), max_steps: int = 100, must_be_passing_grade: bool = False):
 		base_grade = self.grade(points, max_points).text
 		for i in range(1, max_steps + 1):
@@ -0,0 +1,122 @@
+#	pyexamgrading - Manage grade computation of university exams
+#	Copyright (C) 2024-2024 Johannes Bauer
+#
+#	This file is part of pyexamgrading.
+#
+#	pyexamgrading is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyexamgrading is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyexamgrading; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import concurrent.futures
+from .Exam import Exam
+from .Statistics import StatisticsAccumulator
+
+class GroupedStatistics():
+	def __init__(self, group_by: list[str]):
+		for key in group_by:
+			if (key != "course") and (not key.startswith("custom.")):
+				raise ValueError(f"Can only group by 'course' or 'custom.<name>', not: {key}")
+		self._group_by = group_by
+		self._groups = { }
+		self._total = StatisticsAccumulator(per_task = True)
+
+	@classmethod
+	def parse_group_by(cls, text: str):
+		return [ key.strip() for key in text.split(",") if (key.strip() != "") ]
+
+	@property
+	def group_by(self):
+		return self._group_by
+
+	@property
+	def total(self):
+		return self._total
+
+	@property
+	def groups(self):
+		return dict(sorted(self._groups.items()))
+
+	def group_key(self, student: "Student"):
+		values = [ ]
+		for key in self._group_by:
+			if key == "course":
+				value = student.course
+			else:
+				value = student.custom.get(key[len("custom."):])
+			values.append("none" if (value is None) else str(value))
+		return tuple(values)
+
+	def add(self, student: "Student", computed_grade: "ComputedGrade"):
+		# Single pass: every grade is added to its group's accumulator and
+		# to the total, groups are found by hashing their key.
+		group_key = self.group_key(student)
+		if group_key not in self._groups:
+			self._groups[group_key] = StatisticsAccumulator(per_task = True)
+		self._groups[group_key].add(computed_grade)
+		self._total.add(computed_grade)
+		return self
+
+	def merge(self, other: "GroupedStatistics"):
+		for (group_key, accumulator) in other._groups.items():
+			if group_key not in self._groups:
+				self._groups[group_key] = StatisticsAccumulator(per_task = True)
+			self._groups[group_key].merge(accumulator)
+		self._total.merge(other._total)
+		return self
+
+	def to_dict(self):
+		return {
+			"group_by": self._group_by,
+			"groups": [ [ list(group_key), accumulator.to_dict() ] for (group_key, accumulator) in self._groups.items() ],
+			"total": self._total.to_dict(),
+		}
+
+	@classmethod
+	def from_dict(cls, data: dict):
+		grouped = cls(data["group_by"])
+		grouped._groups = { tuple(group_key): StatisticsAccumulator.from_dict(accumulator) for (group_key, accumulator) in data["groups"] }
+		grouped._total = StatisticsAccumulator.from_dict(data["total"])
+		return grouped
+
+	@classmethod
+	def from_exam(cls, exam: "Exam", group_by: list[str], search: str | None = None, filter_course: str | None = None, include_incomplete: bool = False, shard_index: int = 0, shard_count: int = 1):
+		grouped = cls(group_by)
+		for (student_index, student) in enumerate(exam.students):
+			if (student_index % shard_count) != shard_index:
+				continue
+			if (search is not None) and (not student.matches(search)):
+				continue
+			if (filter_course is not None) and (not filter_course.lower() in (student.course or "").lower()):
+				continue
+			if (not include_incomplete) and (not exam.has_complete_results(student)):
+				continue
+			grouped.add(student, exam.grade(student))
+		return grouped
+
+	@classmethod
+	def _aggregate_shard(cls, exam_json: str, group_by: list[str], search: str | None, filter_course: str | None, include_incomplete: bool, shard_index: int, shard_count: int):
+		exam = Exam.load_json(exam_json)
+		return cls.from_exam(exam, group_by, search = search, filter_course = filter_course, include_incomplete = include_incomplete, shard_index = shard_index, shard_count = shard_count).to_dict()
+
+	@classmethod
+	def from_exam_parallel(cls, exam_json: str, group_by: list[str], search: str | None = None, filter_course: str | None = None, include_incomplete: bool = False, shard_count: int = 2):
+		# Every worker process loads the exam, grades its share of the
+		# students and sends back its partial aggregates, which are merged.
+		grouped = cls(group_by)
+		with concurrent.futures.ProcessPoolExecutor(max_workers = shard_count) as executor:
+			futures = [ executor.submit(cls._aggregate_shard, exam_json, group_by, search, filter_course, include_incomplete, shard_index, shard_count) for shard_index in range(shard_count) ]
+			for future in futures:
+				grouped.merge(cls.from_dict(future.result()))
+		return grouped
@@ -0,0 +1,140 @@
+#	pyexamgrading - Manage grade computation of university exams
+#	Copyright (C) 2024-2024 Johannes Bauer
+#
+#	This file is part of pyexamgrading.
+#
+#	pyexamgrading is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyexamgrading is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyexamgrading; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import math
+import collections
+
+class ItemAnalysis():
+	TaskAnalysis = collections.namedtuple("TaskAnalysis", [ "task", "count", "mean", "stddev", "difficulty", "item_total_correlation", "corrected_item_total_correlation", "alpha_if_deleted", "histogram" ])
+
+	def __init__(self, exam: "Exam", entries: list, bins: int = 5):
+		self._exam = exam
+		self._tasks = list(exam.structure)
+		self._bins = bins
+		self._student_count = len(entries)
+
+		# Score matrix with students as rows, then transposed into one column
+		# per task so that all sums are computed by the builtins over whole
+		# columns instead of element by element.
+		self._original = [ [ float(contribution.original_points) for contribution in entry.grade.breakdown_by_task.values() ] for entry in entries ]
+		self._scaled = [ [ float(contribution.scaled_points) for contribution in entry.grade.breakdown_by_task.values() ] for entry in entries ]
+		self._totals = [ math.fsum(row) for row in self._scaled ]
+		self._original_columns = list(zip(*self._original)) or [ () for task in self._tasks ]
+		self._scaled_columns = list(zip(*self._scaled)) or [ () for task in self._tasks ]
+		self._tasks_analysis = None
+		self._alpha = None
+		self._analyze()
+
+	@property
+	def student_count(self):
+		return self._student_count
+
+	@property
+	def tasks(self):
+		return self._tasks_analysis
+
+	@property
+	def cronbach_alpha(self):
+		return self._alpha
+
+	@staticmethod
+	def _variance(count: int, total: float, total_squares: float):
+		if count < 2:
+			return None
+		return max(0.0, (total_squares - total * total / count) / (count - 1))
+
+	@staticmethod
+	def _correlation(covariance: float, variance1: float | None, variance2: float | None):
+		if (variance1 is None) or (variance2 is None) or (variance1 <= 0) or (variance2 <= 0):
+			return None
+		return covariance / math.sqrt(variance1 * variance2)
+
+	@staticmethod
+	def _alpha_from_variances(item_count: int, item_variance_sum: float, total_variance: float | None):
+		if (item_count < 2) or (total_variance is None) or (total_variance <= 0):
+			return None
+		return item_count / (item_count - 1) * (1 - item_variance_sum / total_variance)
+
+	def _histogram(self, column: tuple, max_points: float):
+		histogram = [ 0 ] * self._bins
+		if max_points <= 0:
+			return histogram
+		for value in column:
+			histogram[min(max(int(value / max_points * self._bins), 0), self._bins - 1)] += 1
+		return histogram
+
+	def _analyze(self):
+		n = self._student_count
+		sum_t = math.fsum(self._totals)
+		var_t = self._variance(n, sum_t, math.sumprod(self._totals, self._totals))
+
+		# Everything per task follows from the sums of x, x² and x·total,
+		# e.g., the corrected item-total correlation correlates x with
+		# (total - x) using cov(x, total - x) = cov(x, total) - var(x).
+		item_variances = [ ]
+		covariances = [ ]
+		for column in self._scaled_columns:
+			sum_x = math.fsum(column)
+			item_variances.append(self._variance(n, sum_x, math.sumprod(column, column)))
+			covariances.append(((math.sumprod(column, self._totals) - sum_x * sum_t / n) / (n - 1)) if (n >= 2) else None)
+		item_variance_sum = math.fsum(variance for variance in item_variances if variance is not None)
+		self._alpha = self._alpha_from_variances(len(self._tasks), item_variance_sum, var_t)
+
+		self._tasks_analysis = [ ]
+		for (task_index, task) in enumerate(self._tasks):
+			original_column = self._original_columns[task_index]
+			max_points = float(task.max_points)
+			var_x = item_variances[task_index]
+			cov_xt = covariances[task_index]
+			sum_original = math.fsum(original_column)
+			mean = (sum_original / n) if (n > 0) else None
+			var_original = self._variance(n, sum_original, math.sumprod(original_column, original_column))
+			stddev = None if (var_original is None) else math.sqrt(var_original)
+
+			if (var_x is None) or (cov_xt is None):
+				item_total = None
+				corrected = None
+				alpha_if_deleted = None
+			else:
+				item_total = self._correlation(cov_xt, var_x, var_t)
+				var_rest = var_t - 2 * cov_xt + var_x
+				corrected = self._correlation(cov_xt - var_x, var_x, var_rest)
+				alpha_if_deleted = self._alpha_from_variances(len(self._tasks) - 1, item_variance_sum - var_x, var_rest)
+
+			self._tasks_analysis.append(self.TaskAnalysis(task = task, count = n, mean = mean, stddev = stddev, difficulty = None if ((mean is None) or (max_points == 0)) else mean / max_points, item_total_correlation = item_total, corrected_item_total_correlation = corrected, alpha_if_deleted = alpha_if_deleted, histogram = self._histogram(original_column, max_points)))
+
+	def to_dict(self):
+		return {
+			"student_count": self.student_count,
+			"cronbach_alpha": self.cronbach_alpha,
+			"tasks": [ {
+				"name": analysis.task.name,
+				"group": analysis.task.group,
+				"max_points": float(analysis.task.max_points),
+				"mean": analysis.mean,
+				"stddev": analysis.stddev,
+				"difficulty": analysis.difficulty,
+				"item_total_correlation": analysis.item_total_correlation,
+				"corrected_item_total_correlation": analysis.corrected_item_total_correlation,
+				"alpha_if_deleted": analysis.alpha_if_deleted,
+				"histogram": analysis.histogram,
+			} for analysis in self.tasks ],
+		}
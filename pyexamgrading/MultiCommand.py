@@ -26,6 +26,7 @@
 import sys
 import collections
 import textwrap
+import importlib
 
 from .FriendlyArgumentParser import FriendlyArgumentParser
 from .PrefixMatcher import PrefixMatcher
@@ -34,10 +35,12 @@ class MultiCommand():
 	RegisteredCommand = collections.namedtuple("RegisteredCommand", [ "name", "description", "parsergenerator", "action", "aliases", "visible" ])
 	ParseResult = collections.namedtuple("ParseResults", [ "cmd", "args" ])
 
-	def __init__(self, description = None, trailing_text = None, run_method = False):
+	def __init__(self, description = None, trailing_text = None, run_method = False, entry_point_group = None):
 		self._description = description
 		self._trailing_text = trailing_text
 		self._run_method = run_method
+		self._entry_point_group = entry_point_group
+		self._entry_points_loaded = False
 		self._commands = { }
 		self._aliases = { }
 		self._cmdorder = [ ]
@@ -61,7 +64,34 @@ class MultiCommand():
 		self._commands[commandname] = cmd
 		self._cmdorder.append(commandname)
 
+	@staticmethod
+	def _resolve_action(action):
+		# Actions may be given lazily as "module.name:ClassName" so that the
+		# module is only imported when the command is actually run.
+		if isinstance(action, str):
+			(module_name, class_name) = action.split(":", maxsplit = 1)
+			action = getattr(importlib.import_module(module_name), class_name)
+		return action
+
+	def _load_entry_points(self):
+		# Third-party commands are discovered through the entry point group;
+		# each entry point refers to a function that is called with this
+		# MultiCommand instance and that registers its commands. This is only
+		# done when needed, because scanning installed packages is slow.
+		if (self._entry_point_group is None) or self._entry_points_loaded:
+			return
+		self._entry_points_loaded = True
+		import importlib.metadata
+		for entry_point in importlib.metadata.entry_points(group = self._entry_point_group):
+			# A single broken plugin must not take down the whole program.
+			try:
+				register_function = entry_point.load()
+				register_function(self)
+			except Exception as e:
+				print(f"Warning: unable to load command plugin '{entry_point.name}' ({entry_point.value}): {e.__class__.__name__}: {e}", file = sys.stderr)
+
 	def _show_syntax(self, msg = None):
+		self._load_entry_points()
 		output_file = sys.stderr if (msg is not None) else sys.stdout
 		if msg is not None:
 			print(f"Error: {msg}", file = output_file)
@@ -105,7 +135,11 @@ class MultiCommand():
 		if len(cmdline) < 1:
 			self._raise_error("No command supplied.")
 
-		# Check if we can match the command portion
+		# Check if we can match the command portion. Commands registered
+		# through entry points are only looked for if the command does not
+		# match any of the already registered commands.
+		if len(PrefixMatcher(self._getcmdnames()).match(cmdline[0])) == 0:
+			self._load_entry_points()
 		pm = PrefixMatcher(self._getcmdnames() | set([ "-h", "--help" ]))
 		try:
 			supplied_cmd = pm.matchunique(cmdline[0])
@@ -127,10 +161,14 @@ class MultiCommand():
 
 	def run(self, cmdline, silent = False):
 		parseresult = self.parse(cmdline, silent)
+		return self.run_parsed(parseresult)
+
+	def run_parsed(self, parseresult):
 		if parseresult.cmd.action is None:
 			raise Exception("Should run command '%s', but no action was registered." % (parseresult.cmd.name))
-		result = parseresult.cmd.action(parseresult.cmd.name, parseresult.args)
-		if self._run_method:
+		action = self._resolve_action(parseresult.cmd.action)
+		result = action(parseresult.cmd.name, parseresult.args)
+		if self._run_method and isinstance(result, BaseAction):
 			result = result.run()
 		return result
 
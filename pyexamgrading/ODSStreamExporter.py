@@ -0,0 +1,441 @@
+#	pyexamgrading - Manage grade computation of university exams
+#	Copyright (C) 2024-2024 Johannes Bauer
+#
+#	This file is part of pyexamgrading.
+#
+#	pyexamgrading is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyexamgrading is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyexamgrading; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import io
+import math
+import time
+import socket
+import getpass
+import zipfile
+import datetime
+import fractions
+import xml.sax.saxutils
+from .GradingScheme import GradingSchemeType
+from .Tools import Tools
+from .Statistics import ValueStatistics
+
+class ODSStreamExporter():
+	# Writes the same three sheets as ODSExporter, but generates content.xml
+	# row by row directly into the ZIP file instead of building the whole
+	# document in memory first. Conditional formats are replaced by cell
+	# styles which are determined when the row is written.
+	_NAMESPACES = {
+		"office": "urn:oasis:names:tc:opendocument:xmlns:office:1.0",
+		"style": "urn:oasis:names:tc:opendocument:xmlns:style:1.0",
+		"text": "urn:oasis:names:tc:opendocument:xmlns:text:1.0",
+		"table": "urn:oasis:names:tc:opendocument:xmlns:table:1.0",
+		"fo": "urn:oasis:names:tc:opendocument:xmlns:xsl-fo-compatible:1.0",
+		"number": "urn:oasis:names:tc:opendocument:xmlns:datastyle:1.0",
+		"meta": "urn:oasis:names:tc:opendocument:xmlns:meta:1.0",
+		"of": "urn:oasis:names:tc:opendocument:xmlns:of:1.2",
+	}
+	_AUTOMATIC_STYLES = """
+		<number:number-style style:name="N0"><number:number number:decimal-places="0" number:min-decimal-places="0" number:min-integer-digits="1"/></number:number-style>
+		<number:number-style style:name="N1"><number:number number:decimal-places="1" number:min-decimal-places="1" number:min-integer-digits="1"/></number:number-style>
+		<number:number-style style:name="N2"><number:number number:decimal-places="2" number:min-decimal-places="2" number:min-integer-digits="1"/></number:number-style>
+		<number:percentage-style style:name="P0"><number:number number:decimal-places="0" number:min-decimal-places="0" number:min-integer-digits="1"/><number:text>%</number:text></number:percentage-style>
+		<number:percentage-style style:name="P1"><number:number number:decimal-places="1" number:min-decimal-places="1" number:min-integer-digits="1"/><number:text>%</number:text></number:percentage-style>
+		<number:date-style style:name="D0"><number:year number:style="long"/><number:text>-</number:text><number:month number:style="long"/><number:text>-</number:text><number:day number:style="long"/><number:text> </number:text><number:hours number:style="long"/><number:text>:</number:text><number:minutes number:style="long"/><number:text>:</number:text><number:seconds number:style="long"/></number:date-style>
+		<style:style style:name="heading" style:family="table-cell"><style:text-properties fo:font-weight="bold"/></style:style>
+		<style:style style:name="heading_ralign" style:family="table-cell"><style:paragraph-properties fo:text-align="end"/><style:text-properties fo:font-weight="bold"/></style:style>
+		<style:style style:name="heading_90deg" style:family="table-cell"><style:table-cell-properties style:rotation-angle="90"/><style:text-properties fo:font-weight="bold"/></style:style>
+		<style:style style:name="#" style:family="table-cell" style:data-style-name="N0"/>
+		<style:style style:name="#.#" style:family="table-cell" style:data-style-name="N1"/>
+		<style:style style:name="#.##" style:family="table-cell" style:data-style-name="N2"/>
+		<style:style style:name="#%" style:family="table-cell" style:data-style-name="P0"/>
+		<style:style style:name="#.#%" style:family="table-cell" style:data-style-name="P1"/>
+		<style:style style:name="datetime" style:family="table-cell" style:data-style-name="D0"><style:paragraph-properties fo:text-align="start"/></style:style>
+		<style:style style:name="failed" style:family="table-cell"><style:table-cell-properties fo:background-color="{red}"/></style:style>
+		<style:style style:name="barely_failed" style:family="table-cell"><style:table-cell-properties fo:background-color="{light-red}"/></style:style>
+		<style:style style:name="exceptional" style:family="table-cell"><style:table-cell-properties fo:background-color="{green}"/></style:style>
+		<style:style style:name="#.#_failed" style:family="table-cell" style:data-style-name="N1"><style:table-cell-properties fo:background-color="{red}"/></style:style>
+		<style:style style:name="#.#_barely_failed" style:family="table-cell" style:data-style-name="N1"><style:table-cell-properties fo:background-color="{light-red}"/></style:style>
+		<style:style style:name="#.#_exceptional" style:family="table-cell" style:data-style-name="N1"><style:table-cell-properties fo:background-color="{green}"/></style:style>
+		<style:style style:name="#.##_bad_result" style:family="table-cell" style:data-style-name="N2"><style:table-cell-properties fo:background-color="{red}"/></style:style>
+		<style:style style:name="#.##_mediocre_result" style:family="table-cell" style:data-style-name="N2"><style:table-cell-properties fo:background-color="{yellow}"/></style:style>
+		<style:style style:name="#.##_exceptional" style:family="table-cell" style:data-style-name="N2"><style:table-cell-properties fo:background-color="{green}"/></style:style>
+		<style:style style:name="#%_bad_result" style:family="table-cell" style:data-style-name="P0"><style:table-cell-properties fo:background-color="{red}"/></style:style>
+		<style:style style:name="#%_mediocre_result" style:family="table-cell" style:data-style-name="P0"><style:table-cell-properties fo:background-color="{yellow}"/></style:style>
+		<style:style style:name="#%_exceptional" style:family="table-cell" style:data-style-name="P0"><style:table-cell-properties fo:background-color="{green}"/></style:style>
+		<style:style style:name="co1.5" style:family="table-column"><style:table-column-properties style:column-width="1.5cm"/></style:style>
+		<style:style style:name="co3" style:family="table-column"><style:table-column-properties style:column-width="3cm"/></style:style>
+		<style:style style:name="co4" style:family="table-column"><style:table-column-properties style:column-width="4cm"/></style:style>
+		<style:style style:name="co5" style:family="table-column"><style:table-column-properties style:column-width="5cm"/></style:style>
+		<style:style style:name="co7" style:family="table-column"><style:table-column-properties style:column-width="7cm"/></style:style>
+		<style:style style:name="co12" style:family="table-column"><style:table-column-properties style:column-width="12cm"/></style:style>
+	"""
+	_RESULTS_SHEET = "Ergebnisse"
+	_OVERVIEW_SHEET = "Notenschlüssel"
+	_METADATA_SHEET = "Informationen"
+
+	def __init__(self, exam: "Exam", entries: list, stats, statistics: "StatisticsAccumulator", values_only: bool = False):
+		self._exam = exam
+		self._entries = entries
+		self._stats = stats
+		self._statistics = statistics
+		self._values_only = values_only
+		self._task_count = self._exam.structure.task_count
+		self._col_ids = {
+			"result_pts_original": 5,
+			"result_pts_scaled": 5 + self._task_count,
+			"result_pts_sum": 5 + (2 * self._task_count),
+			"result_pts_percent": 5 + (2 * self._task_count) + 1,
+			"grade": 5 + (2 * self._task_count) + 2,
+			"original_grade": 5 + (2 * self._task_count) + 3,
+			"grade_difference": 5 + (2 * self._task_count) + 4,
+			"pts_missing_to_pass": 5 + (2 * self._task_count) + 5,
+		}
+		# Fixed rows of the grade overview sheet, referenced by formulas
+		self._overview_rows = {
+			"cutoff_low": 1,
+			"cutoff_high": 2,
+			"exam_count": 4,
+			"max_points": 5,
+			"passing_points": 6,
+			"passing_count": 7,
+			"failed_count": 8,
+			"barely_passing_grade": 9,
+			"barely_failed_count": 10,
+			"exceptional_grade": 11,
+			"exceptional_passed_count": 12,
+			"grade_average": 13,
+			"best_grade": 14,
+			"worst_grade": 15,
+		}
+		if (not self._values_only) and (self._exam.grading_scheme.grading_scheme_type not in [ GradingSchemeType.GermanUniversityLinear, GradingSchemeType.GermanUniversityCutoff ]):
+			raise NotImplementedError(self._exam.grading_scheme.grading_scheme_type)
+
+	@staticmethod
+	def _col_name(x: int):
+		name = ""
+		x += 1
+		while x > 0:
+			(x, remainder) = divmod(x - 1, 26)
+			name = chr(ord("A") + remainder) + name
+		return name
+
+	@classmethod
+	def _ref(cls, x: int, y: int):
+		return f"[.{cls._col_name(x)}{y + 1}]"
+
+	@classmethod
+	def _range_ref(cls, x: int, y1: int, y2: int):
+		return f"[.{cls._col_name(x)}{y1 + 1}:.{cls._col_name(x)}{y2 + 1}]"
+
+	def _overview_ref(self, field_name: str, column: int = 1):
+		return f"[$'{self._OVERVIEW_SHEET}'.${self._col_name(column)}${self._overview_rows[field_name] + 1}]"
+
+	@property
+	def _grade_range_ref(self):
+		col = self._col_name(self._col_ids["grade"])
+		return f"[$'{self._RESULTS_SHEET}'.${col}$2:.${col}${len(self._entries) + 1}]"
+
+	@staticmethod
+	def _cell(value = None, style: str | None = None, formula: str | None = None):
+		attrs = ""
+		if style is not None:
+			attrs += f" table:style-name={xml.sax.saxutils.quoteattr(style)}"
+		if formula is not None:
+			attrs += f" table:formula={xml.sax.saxutils.quoteattr('of:=' + formula)}"
+
+		if value is None:
+			return f"<table:table-cell{attrs}/>"
+		elif isinstance(value, str):
+			return f"<table:table-cell{attrs} office:value-type=\"string\"><text:p>{xml.sax.saxutils.escape(value)}</text:p></table:table-cell>"
+		elif isinstance(value, datetime.datetime):
+			return f"<table:table-cell{attrs} office:value-type=\"date\" office:date-value=\"{value.strftime('%Y-%m-%dT%H:%M:%S')}\"><text:p>{value.strftime('%Y-%m-%d %H:%M:%S')}</text:p></table:table-cell>"
+		else:
+			if isinstance(value, bool):
+				value = int(value)
+			if isinstance(value, fractions.Fraction):
+				value = float(value)
+			if (style is not None) and ("%" in style):
+				value_type = "percentage"
+			else:
+				value_type = "float"
+			return f"<table:table-cell{attrs} office:value-type=\"{value_type}\" office:value=\"{value!r}\"/>"
+
+	@staticmethod
+	def _row(cells: list[str], hidden: bool = False):
+		visibility = " table:visibility=\"collapse\"" if hidden else ""
+		return f"<table:table-row{visibility}>{''.join(cells)}</table:table-row>\n"
+
+	@staticmethod
+	def _columns(column_styles: list[tuple[str, bool]]):
+		columns = [ ]
+		for (style, hidden) in column_styles:
+			visibility = " table:visibility=\"collapse\"" if hidden else ""
+			columns.append(f"<table:table-column table:style-name=\"{style}\"{visibility}/>")
+		return "".join(columns) + "\n"
+
+	def _formula(self, formula: str):
+		return None if self._values_only else formula
+
+	def _grade_formula(self, percent_ref: str):
+		high = self._overview_ref("cutoff_high")
+		low = self._overview_ref("cutoff_low")
+		formula = f"1+3.05*({high}-{percent_ref})/({high}-{low})"
+		if self._exam.grading_scheme.grading_scheme_type == GradingSchemeType.GermanUniversityCutoff:
+			formula = f"IF({formula}>4;5;MEDIAN(1;{formula};5))"
+		else:
+			formula = f"MEDIAN(1;{formula};5)"
+
+		# Round half to even with one decimal digit, like the Python
+		# implementation does for Fractions
+		return f"IF(MOD(({formula})*10;2)=0.5;ROUNDDOWN({formula};1);ROUND({formula};1))"
+
+	@property
+	def _passing_points(self):
+		return self._exam.grading_scheme.parameters["cutoff_low"] * self._exam.structure.max_points
+
+	def _grade_style(self, grade_value: fractions.Fraction):
+		if grade_value > fractions.Fraction("4.1"):
+			return "#.#_failed"
+		elif grade_value > 4:
+			return "#.#_barely_failed"
+		elif grade_value <= fractions.Fraction("1.3"):
+			return "#.#_exceptional"
+		else:
+			return "#.#"
+
+	@staticmethod
+	def _result_style(style: str, ratio: float):
+		if ratio < 0.5:
+			return f"{style}_bad_result"
+		elif ratio < 0.75:
+			return f"{style}_mediocre_result"
+		elif ratio > 0.9:
+			return f"{style}_exceptional"
+		return style
+
+	def _result_row(self, y: int, entry: "StudentResult"):
+		grade = entry.grade.grade
+		cells = [ self._cell(value) for value in [ entry.student.last_name, entry.student.first_name, entry.student.course, entry.student.email, entry.student.student_number ] ]
+
+		for contribution in entry.grade.breakdown_by_task.values():
+			if not contribution.missing_data:
+				cells.append(self._cell(contribution.original_points, style = "#.#"))
+			else:
+				cells.append(self._cell())
+
+		for (task_index, contribution) in enumerate(entry.grade.breakdown_by_task.values()):
+			original_ref = self._ref(self._col_ids["result_pts_original"] + task_index, y)
+			cells.append(self._cell(contribution.scaled_points, style = "#.#", formula = self._formula(f"{original_ref}*{contribution.task.scalar.numerator}/{contribution.task.scalar.denominator}")))
+
+		scaled_first = self._col_name(self._col_ids["result_pts_scaled"])
+		scaled_last = self._col_name(self._col_ids["result_pts_sum"] - 1)
+		cells.append(self._cell(grade.achieved_points, style = "#.#", formula = self._formula(f"SUM([.{scaled_first}{y + 1}:.{scaled_last}{y + 1}])")))
+
+		sum_ref = self._ref(self._col_ids["result_pts_sum"], y)
+		cells.append(self._cell(grade.achieved_points / grade.max_points, style = "#.#%", formula = self._formula(f"{sum_ref}/{self._overview_ref('max_points')}")))
+
+		percent_ref = self._ref(self._col_ids["result_pts_percent"], y)
+		cells.append(self._cell(grade.value, style = self._grade_style(grade.value), formula = self._formula(self._grade_formula(percent_ref))))
+
+		# Original grade and difference. For difference, make negative
+		# numbers be the negative consenquences
+		cells.append(self._cell(grade.value, style = "#.#"))
+		cells.append(self._cell(0, style = "#.#", formula = self._formula(f"{self._ref(self._col_ids['original_grade'], y)}-{self._ref(self._col_ids['grade'], y)}")))
+
+		missing_to_pass = self._passing_points - grade.achieved_points
+		if missing_to_pass > 0:
+			missing_to_pass_value = fractions.Fraction(math.ceil(missing_to_pass * 2), 2)
+		else:
+			missing_to_pass_value = ""
+		missing_to_pass_formula = f"({self._overview_ref('passing_points')}-{sum_ref})"
+		cells.append(self._cell(missing_to_pass_value, style = "#.#", formula = self._formula(f"IF({missing_to_pass_formula}>0;ROUNDUP({missing_to_pass_formula}*2)/2;\"\")")))
+		return self._row(cells)
+
+	def _write_results(self, f):
+		column_styles = [ ("co4", False), ("co3", False), ("co1.5", False), ("co7", True), ("co1.5", False) ]
+		column_styles += [ ("co1.5", False) ] * self._task_count
+		column_styles += [ ("co1.5", True) ] * self._task_count
+		column_styles += [ ("co1.5", False), ("co1.5", False), ("co1.5", False), ("co1.5", True), ("co1.5", True), ("co1.5", False) ]
+		f.write(f"<table:table table:name={xml.sax.saxutils.quoteattr(self._RESULTS_SHEET)}>")
+		f.write(self._columns(column_styles))
+
+		heading = [ "Nachname", "Vorname", "Kurs", "E-Mail", "Matrikel" ]
+		heading += [ task.name for task in self._exam.structure ]
+		heading += [ f"Punkte: {task.name}" for task in self._exam.structure ]
+		heading += [ "Punkte gesamt", "Ergebnis in %", "Note", "Ursprüngliche Note", "Notenänderung", "Punkte zu Bestehensgrenze" ]
+		f.write(self._row([ self._cell(text, style = "heading" if (x < 5) else "heading_90deg") for (x, text) in enumerate(heading) ]))
+
+		task_statistics = [ ValueStatistics() for task in self._exam.structure ]
+		for (y, entry) in enumerate(self._entries, 1):
+			f.write(self._result_row(y, entry))
+			for (task_index, contribution) in enumerate(entry.grade.breakdown_by_task.values()):
+				if not contribution.missing_data:
+					task_statistics[task_index].add(contribution.original_points)
+
+		# Per-task summary below the results
+		last_y = len(self._entries)
+		f.write(self._row([ ]))
+		summary_rows = [ [ self._cell() ] * 4 + [ self._cell(text, style = "heading_ralign") ] for text in [ "Ø:", "Ø prozentual:", "Bestwertung:", "Bestwertung prozentual:" ] ]
+		for (task_index, task) in enumerate(self._exam.structure):
+			x = self._col_ids["result_pts_original"] + task_index
+			average = task_statistics[task_index].mean
+			best = task_statistics[task_index].max
+			summary_rows[0].append(self._cell(average, style = "#.##", formula = self._formula(f"SUBTOTAL(1;{self._range_ref(x, 1, last_y)})")))
+			summary_rows[1].append(self._cell(None if (average is None) else (average / task.max_points), style = self._result_style("#%", 1 if (average is None) else average / task.max_points), formula = self._formula(f"{self._ref(x, last_y + 2)}/{float(task.max_points)!r}")))
+			summary_rows[2].append(self._cell(best, style = "#.##", formula = self._formula(f"SUBTOTAL(4;{self._range_ref(x, 1, last_y)})")))
+			summary_rows[3].append(self._cell(None if (best is None) else (best / task.max_points), style = self._result_style("#%", 1 if (best is None) else best / task.max_points), formula = self._formula(f"{self._ref(x, last_y + 4)}/{float(task.max_points)!r}")))
+
+		for row in summary_rows:
+			row += [ self._cell() ] * self._task_count
+
+		max_points = self._exam.structure.max_points
+		for (col_id, average, best, style, best_subtotal) in [
+				("result_pts_sum", self._statistics.points.mean, self._statistics.points.max, "#.##", 4),
+				("result_pts_percent", self._statistics.points.mean / max_points, self._statistics.points.max / max_points, "#%", 4),
+				("grade", self._statistics.grades.mean, self._statistics.grades.min, "#.#", 5),
+			]:
+			x = self._col_ids[col_id]
+			summary_rows[0].append(self._cell(average, style = style, formula = self._formula(f"SUBTOTAL(1;{self._range_ref(x, 1, last_y)})")))
+			summary_rows[1].append(self._cell())
+			summary_rows[2].append(self._cell(best, style = style, formula = self._formula(f"SUBTOTAL({best_subtotal};{self._range_ref(x, 1, last_y)})")))
+			summary_rows[3].append(self._cell())
+
+		for row in summary_rows:
+			f.write(self._row(row))
+		f.write("</table:table>\n")
+
+	def _write_grade_overview(self, f):
+		f.write(f"<table:table table:name={xml.sax.saxutils.quoteattr(self._OVERVIEW_SHEET)}>")
+		f.write(self._columns([ ("co5", False), ("co3", False), ("co3", False) ]))
+
+		statistics = self._statistics
+		count = statistics.count
+		grade_range = self._grade_range_ref
+		barely_passing_grade = fractions.Fraction("4.1")
+		exceptional_grade = fractions.Fraction("1.3")
+		passing_count = sum(grade_count.count for grade_count in statistics.grade_counts if grade_count.value <= 4)
+		failed_count = count - passing_count
+		barely_failed_count = sum(grade_count.count for grade_count in statistics.grade_counts if 4 < grade_count.value <= barely_passing_grade)
+		exceptional_passed_count = sum(grade_count.count for grade_count in statistics.grade_counts if grade_count.value <= exceptional_grade)
+
+		fields = {
+			"exam_count":					("Gesamtzahl Arbeiten:", count, None, None),
+			"max_points":					("Gesamtzahl Punkte:", self._exam.structure.max_points, "#.#", None),
+			"passing_points":				("Bestehensgrenze (Punkte):", self._passing_points, "#.#", f"{self._overview_ref('cutoff_low')}*{self._overview_ref('max_points')}"),
+			"passing_count":				("Anzahl bestanden:", passing_count, None, f"COUNTIFS({grade_range};\"<=4\")"),
+			"failed_count":					("Anzahl nicht bestanden:", failed_count, "failed", f"COUNTIFS({grade_range};\">4\")"),
+			"barely_passing_grade":			("Knapp bestanden bei Note:", barely_passing_grade, "#.#", None),
+			"barely_failed_count":			("Anzahl knapp nicht bestanden:", barely_failed_count, "barely_failed", f"COUNTIFS({grade_range};\">4\";{grade_range};\"<=\"&{self._overview_ref('barely_passing_grade')})"),
+			"exceptional_grade":			("Ausgezeichnet bestanden bei Note:", exceptional_grade, "#.#", None),
+			"exceptional_passed_count":		("Anzahl ausgezeichnet bestanden:", exceptional_passed_count, "exceptional", f"COUNTIFS({grade_range};\"<=\"&{self._overview_ref('exceptional_grade')})"),
+			"grade_average":				("Notendurchschnitt:", statistics.grades.mean, "#.#", f"AVERAGE({grade_range})"),
+			"best_grade":					("Beste Note:", statistics.grades.min, "#.#", f"MIN({grade_range})"),
+			"worst_grade":					("Schlechteste Note:", statistics.grades.max, "#.#", f"MAX({grade_range})"),
+		}
+
+		rows = { }
+		if self._exam.grading_scheme.grading_scheme_type in [ GradingSchemeType.GermanUniversityLinear, GradingSchemeType.GermanUniversityCutoff ]:
+			rows[self._overview_rows["cutoff_low"]] = self._row([ self._cell("Bestehensgrenze (%):", style = "heading_ralign"), self._cell(self._exam.grading_scheme.parameters["cutoff_low"], style = "#%") ])
+			rows[self._overview_rows["cutoff_high"]] = self._row([ self._cell("Obergrenze (%):", style = "heading_ralign"), self._cell(self._exam.grading_scheme.parameters["cutoff_high"], style = "#%") ])
+		for (field_name, (text, value, style, formula)) in fields.items():
+			cells = [ self._cell(text, style = "heading_ralign"), self._cell(value, style = style, formula = None if (formula is None) else self._formula(formula)) ]
+			if field_name in [ "passing_count", "failed_count", "barely_failed_count", "exceptional_passed_count" ]:
+				cells.append(self._cell(value / count, style = "#%", formula = self._formula(f"{self._overview_ref(field_name)}/{self._overview_ref('exam_count')}")))
+			rows[self._overview_rows[field_name]] = self._row(cells, hidden = field_name in [ "barely_passing_grade", "exceptional_grade" ])
+
+		for y in range(max(rows) + 1):
+			f.write(rows.get(y, self._row([ ])))
+
+		# Grade table
+		f.write(self._row([ ]))
+		y = max(rows) + 2
+		f.write(self._row([ self._cell(text, style = "heading") for text in [ "Punkte", "Ergebnis in %", "Note" ] ]))
+		max_points = self._exam.structure.max_points
+		pts = max_points
+		while True:
+			y += 1
+			grade = self._exam.grading_scheme.grade(pts, max_points)
+			f.write(self._row([
+				self._cell(pts, style = "#.#"),
+				self._cell(pts / max_points, style = "#.#%", formula = self._formula(f"{self._ref(0, y)}/{self._overview_ref('max_points')}")),
+				self._cell(grade.value, style = "#.#", formula = self._formula(self._grade_formula(self._ref(1, y)))),
+			]))
+			pts -= fractions.Fraction(1, 2)
+			if pts < 0:
+				break
+		f.write("</table:table>\n")
+
+	def _write_metadata(self, f):
+		f.write(f"<table:table table:name={xml.sax.saxutils.quoteattr(self._METADATA_SHEET)}>")
+		f.write(self._columns([ ("co5", False), ("co12", False) ]))
+		rows = [
+			("Prüfungsfach:", self._exam.name, None),
+			("Prüfungsdatum:", self._exam.date, None),
+			("Prüfer:", self._exam.lecturer, None),
+			("Erstellungsdatum:", datetime.datetime.now(), "datetime"),
+			("Letzte Datenänderung:", datetime.datetime.fromtimestamp(self._exam.mtime), "datetime"),
+			("SHA-256 der Quelldaten:", Tools.hashdict(self._exam.to_dict()), None),
+			("Export erzeugt von:", f"{getpass.getuser()}@{socket.gethostname()}", None),
+			("Export-Modus:", "Nur Werte" if self._values_only else "Formeln", None),
+		]
+		for (text, value, style) in rows:
+			f.write(self._row([ self._cell(text, style = "heading"), self._cell(value, style = style) ]))
+		f.write("</table:table>\n")
+
+	def _write_content(self, f):
+		namespaces = " ".join(f"xmlns:{prefix}=\"{uri}\"" for (prefix, uri) in self._NAMESPACES.items())
+		f.write("<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n")
+		f.write(f"<office:document-content {namespaces} office:version=\"1.3\">\n")
+		f.write("<office:automatic-styles>")
+		automatic_styles = self._AUTOMATIC_STYLES
+		for (name, color) in [ ("red", "#f4786f"), ("light-red", "#f4ada8"), ("green", "#67ac6d"), ("yellow", "#ffc342") ]:
+			automatic_styles = automatic_styles.replace(f"{{{name}}}", color)
+		f.write(automatic_styles)
+		f.write("</office:automatic-styles>\n")
+		f.write("<office:body><office:spreadsheet>\n")
+		self._write_results(f)
+		self._write_grade_overview(f)
+		self._write_metadata(f)
+		f.write("</office:spreadsheet></office:body></office:document-content>\n")
+
+	def _manifest(self):
+		return "\n".join([
+			"<?xml version=\"1.0\" encoding=\"UTF-8\"?>",
+			"<manifest:manifest xmlns:manifest=\"urn:oasis:names:tc:opendocument:xmlns:manifest:1.0\" manifest:version=\"1.3\">",
+			"<manifest:file-entry manifest:full-path=\"/\" manifest:version=\"1.3\" manifest:media-type=\"application/vnd.oasis.opendocument.spreadsheet\"/>",
+			"<manifest:file-entry manifest:full-path=\"content.xml\" manifest:media-type=\"text/xml\"/>",
+			"<manifest:file-entry manifest:full-path=\"meta.xml\" manifest:media-type=\"text/xml\"/>",
+			"</manifest:manifest>",
+		]) + "\n"
+
+	def _meta(self):
+		return "\n".join([
+			"<?xml version=\"1.0\" encoding=\"UTF-8\"?>",
+			f"<office:document-meta xmlns:office=\"{self._NAMESPACES['office']}\" xmlns:meta=\"{self._NAMESPACES['meta']}\" office:version=\"1.3\">",
+			f"<office:meta><meta:generator>pyexamgrading</meta:generator><meta:creation-date>{datetime.datetime.now().strftime('%Y-%m-%dT%H:%M:%S')}</meta:creation-date></office:meta>",
+			"</office:document-meta>",
+		]) + "\n"
+
+	def write(self, output_filename: str):
+		with zipfile.ZipFile(output_filename, "w", compression = zipfile.ZIP_DEFLATED) as zf:
+			# The mimetype must be the first entry and stored uncompressed.
+			zf.writestr(zipfile.ZipInfo("mimetype"), "application/vnd.oasis.opendocument.spreadsheet", compress_type = zipfile.ZIP_STORED)
+			zf.writestr("META-INF/manifest.xml", self._manifest())
+			zf.writestr("meta.xml", self._meta())
+			content_info = zipfile.ZipInfo("content.xml", date_time = time.localtime()[:6])
+			content_info.compress_type = zipfile.ZIP_DEFLATED
+			with zf.open(content_info, "w", force_zip64 = True) as raw_f, io.TextIOWrapper(io.BufferedWriter(raw_f, buffer_size = 256 * 1024), encoding = "utf-8") as f:
+				self._write_content(f)
@@ -0,0 +1,106 @@
+#	pyexamgrading - Manage grade computation of university exams
+#	Copyright (C) 2024-2024 Johannes Bauer
+#
+#	This file is part of pyexamgrading.
+#
+#	pyexamgrading is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyexamgrading is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyexamgrading; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import os
+
+class PDFCache():
+	def __init__(self, cache_dir: str, max_size: int = 512 * 1024 * 1024):
+		self._cache_dir = cache_dir
+		self._max_size = max_size
+		self._entries = None
+		self._total_size = 0
+		self._hits = 0
+		self._misses = 0
+		os.makedirs(self._cache_dir, exist_ok = True)
+
+	@classmethod
+	def default_cache_dir(cls):
+		cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+		return os.path.join(cache_home, "pyexamgrading", "pdf")
+
+	@property
+	def hits(self):
+		return self._hits
+
+	@property
+	def misses(self):
+		return self._misses
+
+	def _filename(self, key: str):
+		return os.path.join(self._cache_dir, f"{key}.pdf")
+
+	def _scan(self):
+		self._entries = { }
+		self._total_size = 0
+		for direntry in os.scandir(self._cache_dir):
+			if direntry.is_file() and direntry.name.endswith(".pdf"):
+				stat = direntry.stat()
+				self._entries[direntry.name[:-4]] = (stat.st_mtime, stat.st_size)
+				self._total_size += stat.st_size
+
+	def contains(self, key: str):
+		if os.path.exists(self._filename(key)):
+			return True
+		self._misses += 1
+		return False
+
+	def get(self, key: str):
+		try:
+			with open(self._filename(key), "rb") as f:
+				data = f.read()
+		except FileNotFoundError:
+			self._misses += 1
+			return None
+
+		# The modification time marks the last use of an entry so that the
+		# least recently used entries are evicted first.
+		os.utime(self._filename(key))
+		if self._entries is not None:
+			self._entries[key] = (os.stat(self._filename(key)).st_mtime, len(data))
+		self._hits += 1
+		return data
+
+	def put(self, key: str, data: bytes):
+		if self._entries is None:
+			self._scan()
+		tmp_filename = f"{self._filename(key)}.{os.getpid()}.tmp"
+		with open(tmp_filename, "wb") as f:
+			f.write(data)
+		os.replace(tmp_filename, self._filename(key))
+
+		if key in self._entries:
+			self._total_size -= self._entries[key][1]
+		self._entries[key] = (os.stat(self._filename(key)).st_mtime, len(data))
+		self._total_size += len(data)
+		self._evict()
+
+	def _evict(self):
+		if self._total_size <= self._max_size:
+			return
+		for (key, (mtime, size)) in sorted(self._entries.items(), key = lambda item: item[1][0]):
+			if self._total_size <= self._max_size:
+				break
+			try:
+				os.unlink(self._filename(key))
+			except FileNotFoundError:
+				pass
+			del self._entries[key]
+			self._total_size -= size
@@ -0,0 +1,115 @@
+#	pyexamgrading - Manage grade computation of university exams
+#	Copyright (C) 2024-2024 Johannes Bauer
+#
+#	This file is part of pyexamgrading.
+#
+#	pyexamgrading is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyexamgrading is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyexamgrading; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import math
+import fractions
+
+class RankIndex():
+	# Fenwick tree over point totals, discretized to the given resolution.
+	# Students whose totals fall into the same bucket share a rank. The tree
+	# grows by doubling when a total exceeds its range (e.g., bonus points).
+	def __init__(self, resolution: fractions.Fraction = fractions.Fraction(1, 100), max_points: fractions.Fraction | None = None):
+		self._resolution = resolution
+		self._size = 1
+		if max_points is not None:
+			self._size = 1 << max(0, self._bucket(max_points)).bit_length()
+		self._tree = [ 0 ] * (self._size + 1)
+		self._buckets = { }
+
+	@classmethod
+	def from_points(cls, points_by_key: dict, resolution: fractions.Fraction = fractions.Fraction(1, 100), max_points: fractions.Fraction | None = None):
+		index = cls(resolution = resolution, max_points = max_points)
+		index._buckets = { key: index._bucket(points) for (key, points) in points_by_key.items() }
+		index._rebuild(max(index._buckets.values(), default = 0))
+		return index
+
+	@classmethod
+	def from_entries(cls, entries: list, resolution: fractions.Fraction = fractions.Fraction(1, 100)):
+		return cls.from_points({ entry.student.student_number: entry.grade.grade.achieved_points for entry in entries }, resolution = resolution)
+
+	@property
+	def count(self):
+		return len(self._buckets)
+
+	def _bucket(self, points: fractions.Fraction):
+		return max(0, math.floor(points / self._resolution))
+
+	def _rebuild(self, max_bucket: int):
+		# Linear-time construction from the bucket counts
+		while self._size <= max_bucket:
+			self._size *= 2
+		self._tree = [ 0 ] * (self._size + 1)
+		for bucket in self._buckets.values():
+			self._tree[bucket + 1] += 1
+		for position in range(1, self._size + 1):
+			parent = position + (position & -position)
+			if parent <= self._size:
+				self._tree[parent] += self._tree[position]
+
+	def _add(self, bucket: int, delta: int):
+		position = bucket + 1
+		while position <= self._size:
+			self._tree[position] += delta
+			position += position & -position
+
+	def _count_at_most(self, bucket: int):
+		position = min(bucket + 1, self._size)
+		total = 0
+		while position > 0:
+			total += self._tree[position]
+			position -= position & -position
+		return total
+
+	def set(self, key, points: fractions.Fraction | None):
+		self.remove(key)
+		if points is None:
+			return
+		bucket = self._bucket(points)
+		self._buckets[key] = bucket
+		if bucket >= self._size:
+			self._rebuild(bucket)
+		else:
+			self._add(bucket, 1)
+
+	def remove(self, key):
+		bucket = self._buckets.pop(key, None)
+		if bucket is not None:
+			self._add(bucket, -1)
+
+	def __contains__(self, key):
+		return key in self._buckets
+
+	def rank(self, points: fractions.Fraction):
+		# 1 + number of students with strictly more points
+		return 1 + self.count - self._count_at_most(self._bucket(points))
+
+	def percentile(self, points: fractions.Fraction):
+		# Percentage of all students who achieved these points or fewer
+		if self.count == 0:
+			return None
+		return 100 * self._count_at_most(self._bucket(points)) / self.count
+
+	def rank_of(self, key):
+		bucket = self._buckets[key]
+		return 1 + self.count - self._count_at_most(bucket)
+
+	def percentile_of(self, key):
+		return 100 * self._count_at_most(self._buckets[key]) / self.count
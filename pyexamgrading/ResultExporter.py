@@ -20,61 +20,84 @@
 #	Johannes Bauer <JohannesBauer@gmx.de>
 
 import os
+import re
+import sys
 import csv
+import json
 import collections
 import shutil
 import tempfile
 import fractions
+import hashlib
+import functools
+import threading
 import subprocess
-import mako.lookup
+import concurrent.futures
 from pyexamgrading.GradingScheme import GradingSchemeType
-from pyexamgrading.WorkDir import WorkDir
-from pyexamgrading.ODSExporter import ODSExporter
+from pyexamgrading.Exceptions import RenderingException
+from pyexamgrading.Tools import Tools
+from pyexamgrading.Statistics import StatisticsAccumulator
+from pyexamgrading.RankIndex import RankIndex
 
 StudentResult = collections.namedtuple("StudentResult", [ "student", "grade" ])
+RenderedPDF = collections.namedtuple("RenderedPDF", [ "entry", "pdf_data", "error" ])
 
 class ResultExporter():
 	Statistics = collections.namedtuple("Statistics", [ "average_grade", "percentile" ])
+	_AUX_ENTRY_PAGE_REGEX = re.compile(r"\\pyexamentrypage\{(?P<index>\d+)\}\{(?P<page>\d+)\}")
+	_LOG_PAGE_COUNT_REGEX = re.compile(r"Output written on .*?\((?P<page_count>\d+) pages?")
+	_MAX_DEFAULT_BATCH_SIZE = 32
+	_TEMPLATE_LOOKUPS = { }
+	_TEMPLATE_LOOKUPS_LOCK = threading.Lock()
 
-	def __init__(self, exam: "Exam", entries: list[StudentResult], min_participants_stats: int):
+	def __init__(self, exam: "Exam", entries: list[StudentResult], min_participants_stats: int, pdf_cache: "PDFCache | None" = None, template_dirs: list[str] | None = None, cohort: "ResultExporter | None" = None):
 		self._exam = exam
 		self._entries = entries
 		self._min_participants_stats = min_participants_stats
+		self._pdf_cache = pdf_cache
+		self._template_dirs = tuple(os.path.realpath(template_dir) for template_dir in (template_dirs or [ ])) + (os.path.realpath(f"{os.path.dirname(__file__)}/templates"), )
+		self._statistics = StatisticsAccumulator.from_grades(entry.grade for entry in entries)
+		self._rank_index = RankIndex.from_entries(entries)
 		self._stats = self._compute_stats()
+		self._cohort = cohort
+
+	@property
+	def stats(self):
+		return self._stats
+
+	@property
+	def cohort(self):
+		return self._cohort
 
 	@property
 	def total_student_count(self):
 		return len(self._entries)
 
+	@property
+	def statistics(self):
+		return self._statistics
+
+	@property
+	def rank_index(self):
+		return self._rank_index
+
 	@property
 	def average_grade(self):
-		return sum(entry.grade.grade.value for entry in self._entries) / self.total_student_count
+		return self._statistics.grades.mean
 
 	@property
 	def average_points(self):
-		return sum(entry.grade.grade.achieved_points for entry in self._entries) / self.total_student_count
+		return self._statistics.points.mean
 
 	@property
 	def include_statistics(self):
 		return len(self._entries) >= self._min_participants_stats
 
 	def _compute_stats(self):
-		grades = [ ]
-		for entry in self._entries:
-			grades.append((entry.grade.grade.value, entry.grade.grade.text))
-		grades.sort()
-
-		last_value = None
-		percentile = { }
-		for (counter, (value, text)) in enumerate(grades):
-			if value != last_value:
-				last_value = value
-				percentile[text] = 100 * (len(self._entries) - counter) / len(self._entries)
-
-		return self.Statistics(average_grade = self.average_grade, percentile = percentile)
+		return self.Statistics(average_grade = self.average_grade, percentile = self._statistics.grade_percentiles)
 
 	def export_csv(self, entries: list[StudentResult], filename: str):
-		self._entries.sort(key = lambda entry: (entry.student.course, entry.student.last_name, entry.student.first_name))
+		entries = sorted(entries, key = lambda entry: (entry.student.course, entry.student.last_name, entry.student.first_name))
 		with open(filename, "w") as f:
 			writer = csv.writer(f)
 
@@ -98,17 +121,41 @@ class ResultExporter():
 	def export_all_csv(self, filename: str):
 		return self.export_csv(entries = self._entries, filename = filename)
 
+	@classmethod
+	def default_template_module_dir(cls):
+		cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+		return os.path.join(cache_home, "pyexamgrading", "mako")
+
+	@classmethod
+	def _get_template_lookup(cls, template_dirs: tuple[str]):
+		# Lookups are shared by all exporters of the process so that every
+		# template is compiled only once. The compiled modules are also kept
+		# on disk, where Mako recompiles them when the template's mtime is
+		# newer. Every set of template directories gets its own module
+		# directory, since modules are named after the template URI.
+		import mako.lookup
+
+		with cls._TEMPLATE_LOOKUPS_LOCK:
+			if template_dirs not in cls._TEMPLATE_LOOKUPS:
+				module_dir = os.path.join(cls.default_template_module_dir(), hashlib.sha256("\0".join(template_dirs).encode()).hexdigest()[:16])
+				try:
+					os.makedirs(module_dir, exist_ok = True)
+				except OSError:
+					module_dir = None
+				cls._TEMPLATE_LOOKUPS[template_dirs] = mako.lookup.TemplateLookup(list(template_dirs), module_directory = module_dir, strict_undefined = True)
+			return cls._TEMPLATE_LOOKUPS[template_dirs]
+
 	def export_tex(self, entries: list[StudentResult], filename: str):
 		def error_function(msg):
 			raise Exception(msg)
-		self._entries.sort(key = lambda entry: (entry.student.course, entry.student.student_number))
-		lookup = mako.lookup.TemplateLookup([ f"{os.path.dirname(__file__)}/templates" ],strict_undefined = True)
-		template = lookup.get_template("export.tex")
+		entries = self._tex_order(entries)
+		template = self._get_template_lookup(self._template_dirs).get_template("export.tex")
 		template_vars = {
 			"exporter": self,
 			"entries": entries,
 			"exam": self._exam,
 			"stats": self._stats,
+			"cohort": self._cohort,
 			"error": error_function,
 
 			"fractions": fractions,
@@ -121,18 +168,269 @@ class ResultExporter():
 	def export_all_tex(self, filename: str):
 		return self.export_tex(entries = self._entries, filename = filename)
 
+	def _html_data(self, entries: list[StudentResult]):
+		# All figures are gathered in a single pass over the entries; the
+		# table and charts are then rendered by the browser.
+		max_points = self._exam.structure.max_points
+		tasks = list(self._exam.structure)
+		columns = [ { "name": name, "type": "text" } for name in [ "Nachname", "Vorname", "Kurs", "Matrikel" ] ]
+		columns += [ { "name": task.name, "type": "number" } for task in tasks ]
+		columns += [ { "name": "Punkte", "type": "number" }, { "name": "Ergebnis", "type": "percent" }, { "name": "Note", "type": "number" }, { "name": "Rang", "type": "integer" } ]
+
+		point_bucket_count = 10
+		rows = [ ]
+		flags = [ ]
+		statistics = StatisticsAccumulator()
+		task_sums = [ 0 ] * len(tasks)
+		task_counts = [ 0 ] * len(tasks)
+		task_best = [ None ] * len(tasks)
+		for entry in entries:
+			grade = entry.grade.grade
+			row = [ entry.student.last_name, entry.student.first_name, entry.student.course, entry.student.student_number ]
+			for (task_index, contribution) in enumerate(entry.grade.breakdown_by_task.values()):
+				if contribution.missing_data:
+					row.append(None)
+					continue
+				row.append(round(float(contribution.original_points), 3))
+				task_sums[task_index] += contribution.original_points
+				task_counts[task_index] += 1
+				if (task_best[task_index] is None) or (contribution.original_points > task_best[task_index]):
+					task_best[task_index] = contribution.original_points
+			rank = self._rank_index.rank_of(entry.student.student_number) if (entry.student.student_number in self._rank_index) else None
+			row += [ round(float(grade.achieved_points), 3), round(float(grade.achieved_points / grade.max_points * 100), 3), float(grade.value), rank ]
+			rows.append(row)
+			flags.append((1 if grade.passing else 0) | (2 if entry.grade.complete_data else 0))
+
+			statistics.add(entry.grade)
+
+		point_buckets = statistics.points.histogram(point_bucket_count, 0, max_points)
+		bucket_width = max_points / point_bucket_count
+		return {
+			"columns": columns,
+			"rows": rows,
+			"flags": flags,
+			"tasks": [ { "name": task.name, "max_points": float(task.max_points), "sum": float(task_sums[task_index]), "count": task_counts[task_index], "best": None if (task_best[task_index] is None) else float(task_best[task_index]) } for (task_index, task) in enumerate(tasks) ],
+			"statistics": {
+				"count": statistics.count,
+				"passed": statistics.passed_count,
+				"incomplete": statistics.incomplete_count,
+				"max_points": float(max_points),
+				"average_grade": float(statistics.grades.mean or 0),
+				"average_points": float(statistics.points.mean or 0),
+				"grade_histogram": [ { "label": grade_count.text, "count": grade_count.count, "failed": not grade_count.passing } for grade_count in statistics.grade_counts ],
+				"point_histogram": [ { "label": f"{float(bucket_index * bucket_width):.1f} - {float((bucket_index + 1) * bucket_width):.1f}", "count": point_buckets[bucket_index], "failed": False } for bucket_index in reversed(range(point_bucket_count)) ],
+			},
+		}
+
+	def export_html(self, entries: list[StudentResult], filename: str):
+		entries = sorted(entries, key = lambda entry: (entry.student.course or "", entry.student.last_name, entry.student.first_name))
+		data_json = json.dumps(self._html_data(entries), ensure_ascii = False, separators = (",", ":"))
+		# Must not terminate the enclosing script element
+		data_json = data_json.replace("<", "\\u003c")
+		template = self._get_template_lookup(self._template_dirs).get_template("export.html")
+		rendered = template.render(exam = self._exam, data_json = data_json)
+		with open(filename, "w") as f:
+			f.write(rendered)
+
+	def export_all_html(self, filename: str):
+		return self.export_html(entries = self._entries, filename = filename)
+
+	def _run_pdflatex(self, tmpdir: str, tex_filename: str):
+		# Every invocation runs in its own directory and never waits for
+		# input on errors, so that several can safely run concurrently.
+		result = subprocess.run([ "pdflatex", "-interaction=nonstopmode", "-halt-on-error", tex_filename ], cwd = tmpdir, stdin = subprocess.DEVNULL, stdout = subprocess.PIPE, stderr = subprocess.STDOUT)
+		if result.returncode != 0:
+			log_tail = "\n".join(result.stdout.decode("utf-8", errors = "replace").rstrip("\n").split("\n")[-10:])
+			raise RenderingException(f"pdflatex failed with status {result.returncode}:\n{log_tail}")
+
 	def export_pdf(self, entries: list[StudentResult], filename: str):
 		with tempfile.TemporaryDirectory() as tmpdir:
 			tex_filename = f"{tmpdir}/pyexam.tex"
 			pdf_filename = f"{tmpdir}/pyexam.pdf"
 			self.export_tex(entries = entries, filename = tex_filename)
-			with WorkDir(tmpdir):
-				subprocess.check_call([ "pdflatex", tex_filename ])
+			self._run_pdflatex(tmpdir, tex_filename)
 			shutil.move(pdf_filename, filename)
 
+	def _render_pdf_data(self, entries: list[StudentResult]):
+		with tempfile.TemporaryDirectory() as tmpdir:
+			tex_filename = f"{tmpdir}/pyexam.tex"
+			self.export_tex(entries = entries, filename = tex_filename)
+			self._run_pdflatex(tmpdir, tex_filename)
+			with open(f"{tmpdir}/pyexam.pdf", "rb") as f:
+				return f.read()
+
+	@staticmethod
+	@functools.cache
+	def _pdflatex_version():
+		try:
+			return subprocess.check_output([ "pdflatex", "--version" ], stdin = subprocess.DEVNULL).decode("utf-8", errors = "replace").split("\n")[0]
+		except (OSError, subprocess.CalledProcessError):
+			return None
+
+	@property
+	def can_split_pdfs(self):
+		return shutil.which("qpdf") is not None
+
+	@functools.cached_property
+	def _template_digest(self):
+		# User templates may override or include any file of the template
+		# directories, so all of them are part of the digest.
+		digest = hashlib.sha256()
+		for (dir_index, template_dir) in enumerate(self._template_dirs):
+			for filename in sorted(os.listdir(template_dir)):
+				full_filename = os.path.join(template_dir, filename)
+				if os.path.isfile(full_filename):
+					with open(full_filename, "rb") as f:
+						digest.update(f"{dir_index}/{filename}\0".encode())
+						digest.update(hashlib.sha256(f.read()).digest())
+		return digest.hexdigest()
+
+	@functools.cached_property
+	def _exam_render_key(self):
+		return {
+			"name": self._exam.name,
+			"date": self._exam.date,
+			"lecturer": self._exam.lecturer,
+			"grading_scheme": self._exam.grading_scheme.to_dict(),
+			"structure": self._exam.structure.to_dict(),
+			"template": self._template_digest,
+			"pdflatex": self._pdflatex_version(),
+		}
+
+	@staticmethod
+	def _statistics_key(total_student_count: int, stats: "ResultExporter.Statistics", grade: "ComputedGrade"):
+		# Formatted exactly like in the template, so that a small change in
+		# the cohort does not invalidate every sheet.
+		return [ total_student_count, f"{stats.average_grade:.1f}", f"{stats.percentile[grade.grade.text]:.0f}" ]
+
+	def _pdf_cache_key(self, entry: StudentResult):
+		# Everything which is rendered into an individual PDF must be part of
+		# the key, including the statistics shown for the whole cohort.
+		grade = entry.grade
+		key_data = {
+			"exam": self._exam_render_key,
+			"student": entry.student.to_dict(),
+			"grade": [ grade.grade.text, str(grade.grade.value), grade.grade.passing, str(grade.grade.achieved_points), str(grade.grade.max_points) ],
+			"next_best_grade": None if (grade.next_best_grade is None) else [ str(grade.next_best_grade.point_difference), grade.next_best_grade.grade.text ],
+			"breakdown": [ [ name, str(contribution.original_points), str(contribution.scaled_points), contribution.missing_data ] for (name, contribution) in grade.breakdown_by_task.items() ],
+			"complete_data": grade.complete_data,
+			"statistics": None if (not self.include_statistics) else self._statistics_key(self.total_student_count, self._stats, grade),
+			"cohort_statistics": None if ((self._cohort is None) or (not self._cohort.include_statistics)) else self._statistics_key(self._cohort.total_student_count, self._cohort.stats, grade),
+		}
+		return Tools.hashdict(key_data)
+
+	@staticmethod
+	def _tex_order(entries: list[StudentResult]):
+		return sorted(entries, key = lambda entry: (entry.student.course, entry.student.student_number))
+
+	def _render_pdf_batch(self, entries: list[StudentResult]):
+		# Renders all entries into a single document with one pdflatex run,
+		# then splits the result into one PDF per entry. The template records
+		# the first page of each entry in the .aux file.
+		with tempfile.TemporaryDirectory() as tmpdir:
+			tex_filename = f"{tmpdir}/pyexam.tex"
+			self.export_tex(entries = entries, filename = tex_filename)
+			self._run_pdflatex(tmpdir, tex_filename)
+
+			with open(f"{tmpdir}/pyexam.aux") as f:
+				start_pages = { int(rematch["index"]): int(rematch["page"]) for rematch in self._AUX_ENTRY_PAGE_REGEX.finditer(f.read()) }
+			with open(f"{tmpdir}/pyexam.log", encoding = "latin1") as f:
+				rematch = self._LOG_PAGE_COUNT_REGEX.search(f.read())
+			if (rematch is None) or (len(start_pages) != len(entries)):
+				raise RenderingException(f"Unable to determine page ranges of {len(entries)} entries in batch document.")
+			page_count = int(rematch["page_count"])
+
+			pdf_data_by_student_number = { }
+			for (index, entry) in enumerate(self._tex_order(entries)):
+				first_page = start_pages[index]
+				last_page = start_pages[index + 1] - 1 if ((index + 1) in start_pages) else page_count
+				split_filename = f"{tmpdir}/entry_{index}.pdf"
+				subprocess.check_call([ "qpdf", "--empty", "--pages", f"{tmpdir}/pyexam.pdf", f"{first_page}-{last_page}", "--", split_filename ], stdin = subprocess.DEVNULL)
+				with open(split_filename, "rb") as f:
+					pdf_data_by_student_number[entry.student.student_number] = f.read()
+			return [ pdf_data_by_student_number[entry.student.student_number] for entry in entries ]
+
+	def _render_pdf_chunk(self, entries: list[StudentResult]):
+		if len(entries) > 1:
+			try:
+				return [ (pdf_data, None) for pdf_data in self._render_pdf_batch(entries) ]
+			except Exception as e:
+				# Fall back to rendering each entry separately so that errors
+				# can be attributed to individual entries.
+				print(f"Warning: rendering a batch of {len(entries)} PDFs failed, rendering them individually: {e.__class__.__name__}: {e}", file = sys.stderr)
+
+		results = [ ]
+		for entry in entries:
+			try:
+				results.append((self._render_pdf_data([ entry ]), None))
+			except Exception as e:
+				results.append((None, e))
+		return results
+
+	def render_individual_pdfs(self, entries: list[StudentResult], jobs: int | None = None, batch_size: int | None = None):
+		# Renders one PDF per entry. Entries which are not already in the
+		# cache are split into batches, each rendered by one pdflatex run, and
+		# up to "jobs" batches are rendered concurrently. Results are yielded
+		# in the order of the given entries and only a limited number of
+		# batches is kept in memory at any time.
+		jobs = jobs or os.cpu_count() or 1
+		if self._pdf_cache is not None:
+			cache_keys = [ self._pdf_cache_key(entry) for entry in entries ]
+			missing = [ index for (index, cache_key) in enumerate(cache_keys) if not self._pdf_cache.contains(cache_key) ]
+		else:
+			cache_keys = None
+			missing = list(range(len(entries)))
+
+		if batch_size is None:
+			batch_size = min((len(missing) + jobs - 1) // jobs, self._MAX_DEFAULT_BATCH_SIZE) if self.can_split_pdfs else 1
+		batch_size = max(1, batch_size)
+		chunks = [ missing[offset : offset + batch_size] for offset in range(0, len(missing), batch_size) ]
+		chunk_by_index = { index: chunk_no for (chunk_no, chunk) in enumerate(chunks) for index in chunk }
+
+		with concurrent.futures.ThreadPoolExecutor(max_workers = jobs) as pool:
+			futures = { }
+			rendered = { }
+			for (index, entry) in enumerate(entries):
+				if index not in chunk_by_index:
+					pdf_data = self._pdf_cache.get(cache_keys[index])
+					if pdf_data is not None:
+						yield RenderedPDF(entry = entry, pdf_data = pdf_data, error = None)
+						continue
+					# Evicted in the meantime, render synchronously
+					(pdf_data, error) = self._render_pdf_chunk([ entry ])[0]
+				else:
+					chunk_no = chunk_by_index[index]
+					for ahead_chunk_no in range(chunk_no, min(chunk_no + 2 * jobs, len(chunks))):
+						if (ahead_chunk_no not in futures) and (ahead_chunk_no not in rendered):
+							futures[ahead_chunk_no] = pool.submit(self._render_pdf_chunk, [ entries[chunk_index] for chunk_index in chunks[ahead_chunk_no] ])
+					if chunk_no not in rendered:
+						rendered = { chunk_no: dict(zip(chunks[chunk_no], futures.pop(chunk_no).result())) }
+					(pdf_data, error) = rendered[chunk_no][index]
+
+				if (error is None) and (cache_keys is not None):
+					self._pdf_cache.put(cache_keys[index], pdf_data)
+				yield RenderedPDF(entry = entry, pdf_data = pdf_data, error = error)
+
 	def export_all_pdf(self, filename: str):
 		return self.export_pdf(entries = self._entries, filename = filename)
 
-	def export_all_ods(self, filename: str):
-		ods_exporter = ODSExporter(exam = self._exam, entries = self._entries, stats = self._stats)
+	def export_all_parquet(self, filename: str):
+		from pyexamgrading.ColumnarExporter import ColumnarExporter
+		ColumnarExporter(exam = self._exam, entries = self._entries, rank_index = self._rank_index).write_parquet(filename)
+
+	def export_all_pyexcol(self, filename: str):
+		from pyexamgrading.ColumnarExporter import ColumnarExporter
+		ColumnarExporter(exam = self._exam, entries = self._entries, rank_index = self._rank_index).write_pyexcol(filename)
+
+	def export_all_columnar(self, filename: str):
+		from pyexamgrading.ColumnarExporter import ColumnarExporter
+		ColumnarExporter(exam = self._exam, entries = self._entries, rank_index = self._rank_index).write(filename)
+
+	def export_all_ods(self, filename: str, streaming: bool = False, values_only: bool = False):
+		if streaming or values_only:
+			from pyexamgrading.ODSStreamExporter import ODSStreamExporter
+			ods_exporter = ODSStreamExporter(exam = self._exam, entries = self._entries, stats = self._stats, statistics = self._statistics, values_only = values_only)
+		else:
+			from pyexamgrading.ODSExporter import ODSExporter
+			ods_exporter = ODSExporter(exam = self._exam, entries = self._entries, stats = self._stats)
 		ods_exporter.write(filename)
@@ -0,0 +1,141 @@
+#	pyexamgrading - Manage grade computation of university exams
+#	Copyright (C) 2024-2024 Johannes Bauer
+#
+#	This file is part of pyexamgrading.
+#
+#	pyexamgrading is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyexamgrading is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyexamgrading; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import fractions
+import collections
+from .WhatIf import StructureWhatIf
+from .Exceptions import TestCorrectionException
+
+class SensitivityAnalysis():
+	GradeChange = collections.namedtuple("GradeChange", [ "entry", "points", "grade" ])
+	ScenarioResult = collections.namedtuple("ScenarioResult", [ "task", "scenario", "max_points", "changed", "improved", "worsened", "newly_passed", "newly_failed", "mean_grade_change", "changes" ])
+
+	def __init__(self, exam: "Exam", entries: list):
+		self._exam = exam
+		self._entries = entries
+		self._tasks = list(exam.structure)
+		self._max_points = exam.structure.max_points
+
+		# Most scenarios only replace a single task's contribution, so they
+		# are evaluated as total - contribution + alternative on the
+		# precomputed totals and per-task columns instead of regrading every
+		# student. Dropping a task changes the scalars of its group, so it is
+		# evaluated on per-group subtotals of the reduced structure instead.
+		self._what_if = StructureWhatIf(exam, entries)
+		self._totals = [ entry.grade.grade.achieved_points for entry in entries ]
+		self._original_columns = { task.name: [ entry.grade.breakdown_by_task[task.name].original_points for entry in entries ] for task in self._tasks }
+		self._scaled_columns = { task.name: [ entry.grade.breakdown_by_task[task.name].scaled_points for entry in entries ] for task in self._tasks }
+
+	@property
+	def student_count(self):
+		return len(self._entries)
+
+	@property
+	def tasks(self):
+		return self._tasks
+
+	def _replaced(self, task: "StructureTask", alternatives: list):
+		return [ total - contribution + alternative for (total, contribution, alternative) in zip(self._totals, self._scaled_columns[task.name], alternatives) ]
+
+	def _evaluate(self, task: "StructureTask", scenario: str, totals: list, max_points: fractions.Fraction):
+		changes = [ ]
+		(improved, worsened, newly_passed, newly_failed) = (0, 0, 0, 0)
+		grade_change_sum = fractions.Fraction(0)
+		for (entry, total, points) in zip(self._entries, self._totals, totals):
+			if (points == total) and (max_points == self._max_points):
+				continue
+			old_grade = entry.grade.grade
+			new_grade = self._exam.grading_scheme.grade(points, max_points)
+			if new_grade.value == old_grade.value:
+				continue
+			changes.append(self.GradeChange(entry = entry, points = points, grade = new_grade))
+			grade_change_sum += new_grade.value - old_grade.value
+			if new_grade.value < old_grade.value:
+				improved += 1
+			else:
+				worsened += 1
+			if new_grade.passing and (not old_grade.passing):
+				newly_passed += 1
+			elif (not new_grade.passing) and old_grade.passing:
+				newly_failed += 1
+		mean_grade_change = (grade_change_sum / len(self._entries)) if (len(self._entries) > 0) else fractions.Fraction(0)
+		return self.ScenarioResult(task = task, scenario = scenario, max_points = max_points, changed = len(changes), improved = improved, worsened = worsened, newly_passed = newly_passed, newly_failed = newly_failed, mean_grade_change = mean_grade_change, changes = changes)
+
+	def drop(self, task: "StructureTask"):
+		# Same as removing the task from the structure and regrading: the
+		# remaining tasks of its group are rescaled to the group's weight.
+		# Returns None when the structure is not gradable without the task.
+		try:
+			structure = self._exam.structure.with_changes(remove_tasks = [ task.name ])
+			max_points = structure.max_points
+		except (KeyError, ZeroDivisionError, TestCorrectionException):
+			return None
+		if max_points <= 0:
+			return None
+		return self._evaluate(task, "drop", self._what_if.totals(structure), max_points)
+
+	def full_credit(self, task: "StructureTask"):
+		full_points = task.scalar * task.max_points
+		return self._evaluate(task, "full", self._replaced(task, [ full_points ] * len(self._entries)), self._max_points)
+
+	def shift(self, task: "StructureTask", delta: fractions.Fraction):
+		alternatives = [ task.scalar * min(max(original_points + delta, 0), task.max_points) for original_points in self._original_columns[task.name] ]
+		return self._evaluate(task, f"{'+' if (delta >= 0) else ''}{delta}", self._replaced(task, alternatives), self._max_points)
+
+	def scale(self, task: "StructureTask", factor: fractions.Fraction):
+		alternatives = [ task.scalar * min(max(original_points * factor, 0), task.max_points) for original_points in self._original_columns[task.name] ]
+		return self._evaluate(task, f"×{factor}", self._replaced(task, alternatives), self._max_points)
+
+	def analyze(self, deltas: list[fractions.Fraction] | None = None, factors: list[fractions.Fraction] | None = None, task_names: set[str] | None = None):
+		results = [ ]
+		for task in self._tasks:
+			if (task_names is not None) and (task.name not in task_names):
+				continue
+			drop_result = self.drop(task)
+			if drop_result is not None:
+				results.append(drop_result)
+			results.append(self.full_credit(task))
+			for delta in (deltas or [ ]):
+				results.append(self.shift(task, delta))
+			for factor in (factors or [ ]):
+				results.append(self.scale(task, factor))
+		return results
+
+	@staticmethod
+	def to_dict(results: list):
+		return [ {
+			"task": result.task.name,
+			"scenario": result.scenario,
+			"max_points": float(result.max_points),
+			"changed": result.changed,
+			"improved": result.improved,
+			"worsened": result.worsened,
+			"newly_passed": result.newly_passed,
+			"newly_failed": result.newly_failed,
+			"mean_grade_change": float(result.mean_grade_change),
+			"changes": [ {
+				"student_number": change.entry.student.student_number,
+				"name": change.entry.student.full_name,
+				"old_grade": change.entry.grade.grade.text,
+				"new_grade": change.grade.text,
+				"points": float(change.points),
+			} for change in result.changes ],
+		} for result in results ]
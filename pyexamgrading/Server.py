@@ -0,0 +1,188 @@
+#	pyexamgrading - Manage grade computation of university exams
+#	Copyright (C) 2024-2024 Johannes Bauer
+#
+#	This file is part of pyexamgrading.
+#
+#	pyexamgrading is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyexamgrading is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyexamgrading; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import os
+import sys
+import json
+import socket
+import traceback
+import contextlib
+from .Exam import Exam
+from .WorkDir import WorkDir
+
+class ExamCache():
+	def __init__(self):
+		self._exams = { }
+		self._handed_out = { }
+
+	def load_json(self, filename: str):
+		key = os.path.realpath(filename)
+		stat = os.stat(key)
+		cached = self._exams.get(key)
+		if (cached is not None) and (cached[0] == (stat.st_mtime_ns, stat.st_size)):
+			exam = cached[1]
+		else:
+			exam = Exam.load_json_uncached(filename)
+			self._exams[key] = ((stat.st_mtime_ns, stat.st_size), exam)
+		self._handed_out[key] = (exam, exam.results.generation, len(exam.students))
+		return exam
+
+	@contextlib.contextmanager
+	def session(self):
+		# Exams which have been modified in memory by a command (e.g., by
+		# hypothesizing results) are evicted afterwards so that the next
+		# command sees the state that is on disk again.
+		self._handed_out = { }
+		try:
+			yield self
+		finally:
+			for (key, (exam, generation, student_count)) in self._handed_out.items():
+				if (exam.results.generation != generation) or (len(exam.students) != student_count):
+					self._exams.pop(key, None)
+			self._handed_out = { }
+
+	def __len__(self):
+		return len(self._exams)
+
+class _ForwardingStream():
+	def __init__(self, connection: socket.socket, stream_name: str):
+		self._connection = connection
+		self._stream_name = stream_name
+		self._buffer = [ ]
+
+	def write(self, text: str):
+		self._buffer.append(text)
+		if "\n" in text:
+			self.flush()
+		return len(text)
+
+	def flush(self):
+		if len(self._buffer) > 0:
+			ExamServer.send_message(self._connection, { self._stream_name: "".join(self._buffer) })
+			self._buffer = [ ]
+
+	def isatty(self):
+		return False
+
+class ExamServer():
+	_UNSUPPORTED_COMMANDS = set([ "enter", "serve" ])
+
+	def __init__(self, socket_filename: str, multicommand: "MultiCommand", verbose: int = 0):
+		self._socket_filename = socket_filename
+		self._mc = multicommand
+		self._verbose = verbose
+		self._cache = ExamCache()
+
+	@staticmethod
+	def send_message(connection: socket.socket, message: dict):
+		connection.sendall((json.dumps(message) + "\n").encode("utf-8"))
+
+	def _remove_stale_socket(self):
+		if not os.path.exists(self._socket_filename):
+			return
+		probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		try:
+			probe.connect(self._socket_filename)
+		except ConnectionRefusedError:
+			os.unlink(self._socket_filename)
+		else:
+			raise FileExistsError(f"Another server is already listening on {self._socket_filename}")
+		finally:
+			probe.close()
+
+	def _execute(self, argv: list[str]):
+		parseresult = self._mc.parse(argv)
+		if parseresult.cmd.name in self._UNSUPPORTED_COMMANDS:
+			print(f"Command '{parseresult.cmd.name}' cannot be run through the server.", file = sys.stderr)
+			return 1
+		return self._mc.run_parsed(parseresult)
+
+	def _handle(self, connection: socket.socket):
+		with connection.makefile("r", encoding = "utf-8") as f:
+			request_line = f.readline()
+		if request_line == "":
+			# Client disconnected without sending a request (e.g., a probe
+			# whether the server is alive)
+			return
+		request = json.loads(request_line)
+		if self._verbose >= 1:
+			print(f"Request: {' '.join(request['argv'])}", file = sys.stderr)
+
+		stdout = _ForwardingStream(connection, "stdout")
+		stderr = _ForwardingStream(connection, "stderr")
+		with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr), WorkDir(request["cwd"]), self._cache.session():
+			try:
+				returncode = self._execute(request["argv"])
+			except SystemExit as e:
+				returncode = e.code
+			except Exception:
+				traceback.print_exc()
+				returncode = 1
+			stdout.flush()
+			stderr.flush()
+		if not isinstance(returncode, int):
+			returncode = 0 if (returncode is None) else 1
+		self.send_message(connection, { "returncode": returncode })
+
+	def serve_forever(self):
+		self._remove_stale_socket()
+		server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		server.bind(self._socket_filename)
+		os.chmod(self._socket_filename, 0o600)
+		server.listen()
+		Exam.set_load_cache(self._cache)
+		print(f"Listening on {self._socket_filename}", file = sys.stderr)
+		try:
+			while True:
+				(connection, address) = server.accept()
+				with connection:
+					try:
+						self._handle(connection)
+					except (BrokenPipeError, ConnectionResetError):
+						pass
+					except Exception:
+						traceback.print_exc()
+		finally:
+			Exam.set_load_cache(None)
+			server.close()
+			os.unlink(self._socket_filename)
+
+class ExamClient():
+	def __init__(self, socket_filename: str):
+		self._socket_filename = socket_filename
+
+	def run(self, argv: list[str]):
+		with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+			connection.connect(self._socket_filename)
+			ExamServer.send_message(connection, { "argv": argv, "cwd": os.getcwd() })
+			with connection.makefile("r", encoding = "utf-8") as f:
+				for line in f:
+					message = json.loads(line)
+					if "stdout" in message:
+						sys.stdout.write(message["stdout"])
+						sys.stdout.flush()
+					elif "stderr" in message:
+						sys.stderr.write(message["stderr"])
+						sys.stderr.flush()
+					elif "returncode" in message:
+						return message["returncode"]
+		print("Connection to server lost before command finished.", file = sys.stderr)
+		return 1
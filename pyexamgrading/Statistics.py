@@ -0,0 +1,287 @@
+#	pyexamgrading - Manage grade computation of university exams
+#	Copyright (C) 2024-2024 Johannes Bauer
+#
+#	This file is part of pyexamgrading.
+#
+#	pyexamgrading is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyexamgrading is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyexamgrading; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import math
+import fractions
+import collections
+
+class ValueStatistics():
+	def __init__(self):
+		self._count = 0
+		self._sum = 0
+		# Welford's online algorithm for the variance
+		self._mean = 0.0
+		self._m2 = 0.0
+		self._min = None
+		self._max = None
+		self._value_counts = collections.Counter()
+
+	@property
+	def count(self):
+		return self._count
+
+	@property
+	def sum(self):
+		return self._sum
+
+	@property
+	def mean(self):
+		return (self._sum / self._count) if (self._count > 0) else None
+
+	@property
+	def variance(self):
+		return (self._m2 / (self._count - 1)) if (self._count > 1) else None
+
+	@property
+	def stddev(self):
+		variance = self.variance
+		return None if (variance is None) else math.sqrt(variance)
+
+	@property
+	def min(self):
+		return self._min
+
+	@property
+	def max(self):
+		return self._max
+
+	@property
+	def value_counts(self):
+		return self._value_counts
+
+	def add(self, value: fractions.Fraction, count: int = 1):
+		self._count += count
+		self._sum += value * count
+		delta = float(value) - self._mean
+		self._mean += delta * count / self._count
+		self._m2 += delta * (float(value) - self._mean) * count
+		if (self._min is None) or (value < self._min):
+			self._min = value
+		if (self._max is None) or (value > self._max):
+			self._max = value
+		self._value_counts[value] += count
+
+	def merge(self, other: "ValueStatistics"):
+		if other._count == 0:
+			return self
+		if self._count == 0:
+			(self._mean, self._m2) = (other._mean, other._m2)
+		else:
+			count = self._count + other._count
+			delta = other._mean - self._mean
+			self._m2 += other._m2 + delta * delta * self._count * other._count / count
+			self._mean += delta * other._count / count
+		self._count += other._count
+		self._sum += other._sum
+		self._min = other._min if ((self._min is None) or (other._min < self._min)) else self._min
+		self._max = other._max if ((self._max is None) or (other._max > self._max)) else self._max
+		self._value_counts.update(other._value_counts)
+		return self
+
+	def to_dict(self):
+		return {
+			"count": self._count,
+			"sum": str(self._sum),
+			"mean": self._mean,
+			"m2": self._m2,
+			"min": None if (self._min is None) else str(self._min),
+			"max": None if (self._max is None) else str(self._max),
+			"value_counts": [ [ str(value), count ] for (value, count) in self._value_counts.items() ],
+		}
+
+	@classmethod
+	def from_dict(cls, data: dict):
+		statistics = cls()
+		statistics._count = data["count"]
+		statistics._sum = fractions.Fraction(data["sum"])
+		statistics._mean = data["mean"]
+		statistics._m2 = data["m2"]
+		statistics._min = None if (data["min"] is None) else fractions.Fraction(data["min"])
+		statistics._max = None if (data["max"] is None) else fractions.Fraction(data["max"])
+		statistics._value_counts = collections.Counter({ fractions.Fraction(value): count for (value, count) in data["value_counts"] })
+		return statistics
+
+	def percentile(self, percent: float):
+		# Nearest-rank order statistic. Grades and points only take few
+		# distinct values, so walking the sorted distinct values is much
+		# cheaper than sorting all of them.
+		if self._count == 0:
+			return None
+		rank = max(1, math.ceil(percent / 100 * self._count))
+		seen = 0
+		for value in sorted(self._value_counts):
+			seen += self._value_counts[value]
+			if seen >= rank:
+				return value
+		return self._max
+
+	@property
+	def median(self):
+		return self.percentile(50)
+
+	def histogram(self, bucket_count: int, min_value: float, max_value: float):
+		buckets = [ 0 ] * bucket_count
+		bucket_width = (max_value - min_value) / bucket_count
+		if bucket_width == 0:
+			return None
+		for (value, count) in self._value_counts.items():
+			bucket_index = int((value - min_value) / bucket_width)
+			if bucket_index < 0:
+				bucket_index = 0
+			elif bucket_index >= bucket_count:
+				bucket_index = bucket_count - 1
+			buckets[bucket_index] += count
+		return buckets
+
+class StatisticsAccumulator():
+	GradeCount = collections.namedtuple("GradeCount", [ "text", "value", "passing", "count" ])
+
+	def __init__(self, per_task: bool = False):
+		self._count = 0
+		self._passed_count = 0
+		self._complete_count = 0
+		self._points = ValueStatistics()
+		self._percentages = ValueStatistics()
+		self._grades = ValueStatistics()
+		self._grade_counts = { }
+		self._task_points = collections.OrderedDict() if per_task else None
+
+	@classmethod
+	def from_grades(cls, computed_grades: "iterable[ComputedGrade]", per_task: bool = False):
+		accumulator = cls(per_task = per_task)
+		for computed_grade in computed_grades:
+			accumulator.add(computed_grade)
+		return accumulator
+
+	@property
+	def count(self):
+		return self._count
+
+	@property
+	def passed_count(self):
+		return self._passed_count
+
+	@property
+	def failed_count(self):
+		return self._count - self._passed_count
+
+	@property
+	def complete_count(self):
+		return self._complete_count
+
+	@property
+	def incomplete_count(self):
+		return self._count - self._complete_count
+
+	@property
+	def points(self):
+		return self._points
+
+	@property
+	def percentages(self):
+		return self._percentages
+
+	@property
+	def grades(self):
+		return self._grades
+
+	@property
+	def task_points(self):
+		# Original (unscaled) points of every task, only counting entered results
+		return self._task_points
+
+	@property
+	def grade_counts(self):
+		return sorted(self._grade_counts.values(), key = lambda grade_count: grade_count.value)
+
+	@property
+	def grade_percentiles(self):
+		# Percentage of all students who achieved this grade or a worse one
+		percentiles = { }
+		below = 0
+		for grade_count in self.grade_counts:
+			percentiles[grade_count.text] = 100 * (self._count - below) / self._count
+			below += grade_count.count
+		return percentiles
+
+	def add(self, computed_grade: "ComputedGrade"):
+		grade = computed_grade.grade
+		self._count += 1
+		if grade.passing:
+			self._passed_count += 1
+		if computed_grade.complete_data:
+			self._complete_count += 1
+		self._points.add(grade.achieved_points)
+		self._percentages.add(grade.achieved_points / grade.max_points * 100)
+		self._grades.add(grade.value)
+		grade_count = self._grade_counts.get(grade.text)
+		self._grade_counts[grade.text] = self.GradeCount(text = grade.text, value = grade.value, passing = grade.passing, count = 1 if (grade_count is None) else grade_count.count + 1)
+		if self._task_points is not None:
+			for (task_name, contribution) in computed_grade.breakdown_by_task.items():
+				if task_name not in self._task_points:
+					self._task_points[task_name] = ValueStatistics()
+				if not contribution.missing_data:
+					self._task_points[task_name].add(contribution.original_points)
+		return self
+
+	def merge(self, other: "StatisticsAccumulator"):
+		self._count += other._count
+		self._passed_count += other._passed_count
+		self._complete_count += other._complete_count
+		self._points.merge(other._points)
+		self._percentages.merge(other._percentages)
+		self._grades.merge(other._grades)
+		for (text, other_count) in other._grade_counts.items():
+			grade_count = self._grade_counts.get(text)
+			self._grade_counts[text] = other_count if (grade_count is None) else grade_count._replace(count = grade_count.count + other_count.count)
+		if (self._task_points is not None) and (other._task_points is not None):
+			for (task_name, task_points) in other._task_points.items():
+				if task_name not in self._task_points:
+					self._task_points[task_name] = ValueStatistics()
+				self._task_points[task_name].merge(task_points)
+		return self
+
+	def to_dict(self):
+		return {
+			"count": self._count,
+			"passed_count": self._passed_count,
+			"complete_count": self._complete_count,
+			"points": self._points.to_dict(),
+			"percentages": self._percentages.to_dict(),
+			"grades": self._grades.to_dict(),
+			"grade_counts": [ [ grade_count.text, str(grade_count.value), grade_count.passing, grade_count.count ] for grade_count in self._grade_counts.values() ],
+			"task_points": None if (self._task_points is None) else [ [ task_name, task_points.to_dict() ] for (task_name, task_points) in self._task_points.items() ],
+		}
+
+	@classmethod
+	def from_dict(cls, data: dict):
+		accumulator = cls(per_task = data["task_points"] is not None)
+		accumulator._count = data["count"]
+		accumulator._passed_count = data["passed_count"]
+		accumulator._complete_count = data["complete_count"]
+		accumulator._points = ValueStatistics.from_dict(data["points"])
+		accumulator._percentages = ValueStatistics.from_dict(data["percentages"])
+		accumulator._grades = ValueStatistics.from_dict(data["grades"])
+		accumulator._grade_counts = { text: cls.GradeCount(text = text, value = fractions.Fraction(value), passing = passing, count = count) for (text, value, passing, count) in data["grade_counts"] }
+		if data["task_points"] is not None:
+			for (task_name, task_points) in data["task_points"]:
+				accumulator._task_points[task_name] = ValueStatistics.from_dict(task_points)
+		return accumulator
@@ -25,7 +25,7 @@ import collections
 import functools
 import fractions
 from .Tools import Tools
-from .Exceptions import DuplicateException
+from .Exceptions import DuplicateException, UnknownElementException
 
 class ScalingMode(enum.Enum):
 	Points = "scale_points"
@@ -120,6 +120,29 @@ class Structure():
 			"tasks": [ task.to_dict() for task in self ],
 		}
 
+	def with_changes(self, groups: dict[str, fractions.Fraction] | None = None, reference_group: str | None = None, task_scaling: dict[str, tuple[ScalingMode, fractions.Fraction] | None] | None = None, remove_tasks: list[str] | None = None):
+		# Scalars and the cached maxima are derived once at construction, so
+		# a modified structure is always built anew from its serialization.
+		data = self.to_dict()
+		if groups is not None:
+			data["groups"].update({ key: str(value) for (key, value) in groups.items() })
+		if reference_group is not None:
+			data["reference_group"] = reference_group
+		for (task_name, scaling) in (task_scaling or { }).items():
+			if not self.has_task_with_name(task_name):
+				raise UnknownElementException(f"No such task: {task_name}")
+			task_data = data["tasks"][list(self._tasks_by_name).index(task_name)]
+			for scale_mode in ScalingMode:
+				task_data.pop(scale_mode.value, None)
+			if scaling is not None:
+				(scale_mode, scale_value) = scaling
+				task_data[scale_mode.value] = str(scale_value)
+		for task_name in (remove_tasks or [ ]):
+			if not self.has_task_with_name(task_name):
+				raise UnknownElementException(f"No such task: {task_name}")
+		data["tasks"] = [ task_data for task_data in data["tasks"] if task_data["name"] not in (remove_tasks or [ ]) ]
+		return self.from_dict(data)
+
 	def dump(self):
 		for task in self:
 			print(task)
@@ -134,12 +157,14 @@ class Structure():
 				relative_scalar = self._groups[task.group] / self.reference_group_weight * reference_group_max_points / self.max_points_by_group[task.group]
 				task.scalar = relative_scalar
 
-			match task.scale_mode:
-				case ScalingMode.Points:
-					task.scalar = task.scalar * task.scale_value / task.max_points
+			if task.scale_mode == ScalingMode.Points:
+				task.scalar = task.scalar * task.scale_value / task.max_points
 
-				case ScalingMode.Percentage:
-					task.scalar = task.scalar * (task.scale_value / 100) / task.max_points * self.max_points
+		# Percentages refer to the maximum, which can only be determined once
+		# all other scalars are known.
+		for task in self:
+			if task.scale_mode == ScalingMode.Percentage:
+				task.scalar = task.scalar * (task.scale_value / 100) / task.max_points * self.max_points
 
 	@classmethod
 	def from_dict(cls, data: dict):
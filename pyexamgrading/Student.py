@@ -68,6 +68,11 @@ class Students():
 		self._students_by_email = { }
 		self._students_by_student_number = { }
 		self._active_student_count = 0
+		self._generation = 0
+
+	@property
+	def generation(self):
+		return self._generation
 
 	@property
 	def active_student_count(self):
@@ -82,6 +87,7 @@ class Students():
 		self._students_by_student_number[student.student_number] = student
 		if student.active:
 			self._active_student_count += 1
+		self._generation += 1
 		return student
 
 	def remove(self, student: Student):
@@ -89,6 +95,7 @@ class Students():
 			self._active_student_count -= 1
 		del self._students_by_email[student.email]
 		del self._students_by_student_number[student.student_number]
+		self._generation += 1
 
 	@classmethod
 	def load_students_json(cls, filename: str):
@@ -0,0 +1,81 @@
+#	pyexamgrading - Manage grade computation of university exams
+#	Copyright (C) 2024-2024 Johannes Bauer
+#
+#	This file is part of pyexamgrading.
+#
+#	pyexamgrading is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyexamgrading is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyexamgrading; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import collections
+from .Exceptions import ValidationException
+
+class ExamValidator():
+	Anomaly = collections.namedtuple("Anomaly", [ "kind", "student_number", "task_name", "value" ])
+	DESCRIPTIONS = collections.OrderedDict((
+		("orphan_student", "results for a student who is not part of the exam"),
+		("unknown_task", "result for a task which is not part of the structure"),
+		("negative", "negative result"),
+		("over_max", "result exceeds the maximum points of the task"),
+	))
+
+	def __init__(self, exam: "Exam"):
+		self._exam = exam
+		# The structure is compiled into a plain lookup table once so that the
+		# scan itself only does dictionary lookups and comparisons.
+		self._max_points = { task.name: (task.max_points.numerator, task.max_points.denominator) for task in exam.structure }
+		self._student_numbers = set(student.student_number for student in exam.students)
+
+	def scan(self):
+		anomalies = [ ]
+		max_points = self._max_points
+		for (student_number, results) in self._exam.results.items():
+			if student_number not in self._student_numbers:
+				anomalies.append(self.Anomaly(kind = "orphan_student", student_number = student_number, task_name = None, value = None))
+			for (task_name, value) in results.items():
+				task_max_points = max_points.get(task_name)
+				if task_max_points is None:
+					anomalies.append(self.Anomaly(kind = "unknown_task", student_number = student_number, task_name = task_name, value = value))
+				elif value is None:
+					continue
+				elif value.numerator < 0:
+					anomalies.append(self.Anomaly(kind = "negative", student_number = student_number, task_name = task_name, value = value))
+				elif value.numerator * task_max_points[1] > task_max_points[0] * value.denominator:
+					# Same as value > max_points, but on plain integers which is
+					# considerably faster than comparing fractions.
+					anomalies.append(self.Anomaly(kind = "over_max", student_number = student_number, task_name = task_name, value = value))
+		return anomalies
+
+	@classmethod
+	def counts(cls, anomalies: list):
+		counter = collections.Counter(anomaly.kind for anomaly in anomalies)
+		return collections.OrderedDict((kind, counter[kind]) for kind in cls.DESCRIPTIONS)
+
+	@classmethod
+	def describe(cls, anomaly: Anomaly):
+		location = f"student {anomaly.student_number}"
+		if anomaly.task_name is not None:
+			location += f", task '{anomaly.task_name}'"
+		if anomaly.value is not None:
+			location += f", value {anomaly.value}"
+		return f"{cls.DESCRIPTIONS[anomaly.kind]}: {location}"
+
+	@classmethod
+	def check_exam(cls, exam: "Exam"):
+		# Suitable as a pre-write hook of Exam.write_json()
+		anomalies = cls(exam).scan()
+		if len(anomalies) > 0:
+			summary = ", ".join(f"{count} {kind}" for (kind, count) in cls.counts(anomalies).items() if (count > 0))
+			raise ValidationException(f"Refusing to write exam with {len(anomalies)} invalid result(s) ({summary}); first: {cls.describe(anomalies[0])}")
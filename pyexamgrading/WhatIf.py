@@ -0,0 +1,106 @@
+#	pyexamgrading - Manage grade computation of university exams
+#	Copyright (C) 2024-2024 Johannes Bauer
+#
+#	This file is part of pyexamgrading.
+#
+#	pyexamgrading is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyexamgrading is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyexamgrading; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import fractions
+import collections
+
+class StructureWhatIf():
+	StudentChange = collections.namedtuple("StudentChange", [ "entry", "old_points", "new_points", "old_grade", "new_grade" ])
+	WhatIfResult = collections.namedtuple("WhatIfResult", [ "structure", "old_max_points", "new_max_points", "changed", "improved", "worsened", "newly_passed", "newly_failed", "students" ])
+
+	def __init__(self, exam: "Exam", entries: list):
+		self._exam = exam
+		self._entries = entries
+		self._columns = { task.name: [ entry.grade.breakdown_by_task[task.name].original_points for entry in entries ] for task in exam.structure }
+		self._subtotals = { }
+
+	@staticmethod
+	def _term_key(task: "StructureTask"):
+		# All unscaled tasks of a group share the same scalar, so they are
+		# summed up once per group; scaled tasks each form their own term.
+		if task.scale_mode is None:
+			return ("group", task.group)
+		else:
+			return ("task", task.name)
+
+	def _subtotal(self, task_names: tuple[str]):
+		if task_names not in self._subtotals:
+			subtotal = [ fractions.Fraction(0) ] * len(self._entries)
+			for task_name in task_names:
+				subtotal = [ value + points for (value, points) in zip(subtotal, self._columns[task_name]) ]
+			self._subtotals[task_names] = subtotal
+		return self._subtotals[task_names]
+
+	def totals(self, structure: "Structure"):
+		terms = collections.OrderedDict()
+		for task in structure:
+			term_key = self._term_key(task)
+			if term_key not in terms:
+				terms[term_key] = (task.scalar, [ ])
+			terms[term_key][1].append(task.name)
+
+		totals = [ fractions.Fraction(0) ] * len(self._entries)
+		for (scalar, task_names) in terms.values():
+			subtotal = self._subtotal(tuple(task_names))
+			totals = [ total + scalar * value for (total, value) in zip(totals, subtotal) ]
+		return totals
+
+	def evaluate(self, structure: "Structure"):
+		students = [ ]
+		(changed, improved, worsened, newly_passed, newly_failed) = (0, 0, 0, 0, 0)
+		max_points = structure.max_points
+		for (entry, points) in zip(self._entries, self.totals(structure)):
+			old_grade = entry.grade.grade
+			new_grade = self._exam.grading_scheme.grade(points, max_points)
+			if new_grade.value != old_grade.value:
+				changed += 1
+				if new_grade.value < old_grade.value:
+					improved += 1
+				else:
+					worsened += 1
+				if new_grade.passing and (not old_grade.passing):
+					newly_passed += 1
+				elif (not new_grade.passing) and old_grade.passing:
+					newly_failed += 1
+			students.append(self.StudentChange(entry = entry, old_points = old_grade.achieved_points, new_points = points, old_grade = old_grade, new_grade = new_grade))
+		return self.WhatIfResult(structure = structure, old_max_points = self._exam.structure.max_points, new_max_points = max_points, changed = changed, improved = improved, worsened = worsened, newly_passed = newly_passed, newly_failed = newly_failed, students = students)
+
+	@staticmethod
+	def to_dict(result: WhatIfResult):
+		return {
+			"structure": result.structure.to_dict(),
+			"old_max_points": float(result.old_max_points),
+			"new_max_points": float(result.new_max_points),
+			"changed": result.changed,
+			"improved": result.improved,
+			"worsened": result.worsened,
+			"newly_passed": result.newly_passed,
+			"newly_failed": result.newly_failed,
+			"students": [ {
+				"student_number": change.entry.student.student_number,
+				"name": change.entry.student.full_name,
+				"course": change.entry.student.course,
+				"old_points": float(change.old_points),
+				"new_points": float(change.new_points),
+				"old_grade": change.old_grade.text,
+				"new_grade": change.new_grade.text,
+			} for change in result.students ],
+		}
@@ -0,0 +1,170 @@
+#	pyexamgrading - Manage grade computation of university exams
+#	Copyright (C) 2024-2024 Johannes Bauer
+#
+#	This file is part of pyexamgrading.
+#
+#	pyexamgrading is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyexamgrading is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyexamgrading; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import os
+import json
+import collections
+import concurrent.futures
+from .Exam import Exam
+from .Exceptions import TestCorrectionException
+
+def _index_exam_file(filename: str):
+	try:
+		with open(filename) as f:
+			exam_data = json.load(f)
+	except (ValueError, OSError) as e:
+		return (None, f"{e.__class__.__name__}: {e}")
+	if (not isinstance(exam_data, dict)) or any(key not in exam_data for key in [ "name", "grading_scheme", "structure" ]):
+		return (None, None)
+
+	try:
+		return (_index_exam(Exam.from_dict(exam_data)), None)
+	except (TestCorrectionException, ValueError, KeyError, TypeError) as e:
+		return (None, f"{e.__class__.__name__}: {e}")
+
+def _index_exam(exam: Exam):
+	entries = [ ]
+	for student in exam.students:
+		grade = exam.grade(student)
+		entries.append({
+			"student_number": student.student_number,
+			"last_name": student.last_name,
+			"first_name": student.first_name,
+			"course": student.course,
+			"grade": grade.grade.text,
+			"passing": grade.grade.passing,
+			"achieved_points": str(grade.grade.achieved_points),
+			"complete_data": grade.complete_data,
+		})
+	return {
+		"name": exam.name,
+		"date": exam.date,
+		"lecturer": exam.lecturer,
+		"max_points": str(exam.structure.max_points),
+		"entries": entries,
+	}
+
+class Workspace():
+	INDEX_VERSION = 1
+	TranscriptEntry = collections.namedtuple("TranscriptEntry", [ "filename", "exam", "entry" ])
+	CourseSummary = collections.namedtuple("CourseSummary", [ "filename", "exam", "total_count", "passed_count", "incomplete_count" ])
+	RefreshResult = collections.namedtuple("RefreshResult", [ "updated", "removed", "unchanged", "unindexable" ])
+
+	def __init__(self, root_dir: str, index_filename: str | None = None):
+		self._root_dir = root_dir
+		self._index_filename = index_filename or os.path.join(root_dir, ".pyexam_workspace.json")
+		self._files = { }
+		self._by_student = None
+		self._by_course = None
+		self._load_index()
+
+	@property
+	def exam_count(self):
+		return sum(1 for file_info in self._files.values() if file_info["exam"] is not None)
+
+	def _load_index(self):
+		try:
+			with open(self._index_filename) as f:
+				index = json.load(f)
+		except FileNotFoundError:
+			return
+		if index.get("version") == self.INDEX_VERSION:
+			self._files = index["files"]
+
+	def _write_index(self):
+		tmp_filename = f"{self._index_filename}.{os.getpid()}.tmp"
+		with open(tmp_filename, "w") as f:
+			json.dump({ "version": self.INDEX_VERSION, "files": self._files }, f, separators = (",", ":"))
+		os.replace(tmp_filename, self._index_filename)
+
+	def _scan(self):
+		index_filename = os.path.abspath(self._index_filename)
+		for (dirname, subdirs, filenames) in os.walk(self._root_dir):
+			subdirs[:] = sorted(subdir for subdir in subdirs if not subdir.startswith("."))
+			for filename in sorted(filenames):
+				if (not filename.endswith(".json")) or filename.startswith("."):
+					continue
+				full_filename = os.path.join(dirname, filename)
+				if os.path.abspath(full_filename) == index_filename:
+					continue
+				try:
+					stat = os.stat(full_filename)
+				except OSError:
+					# Vanished in the meantime or a dangling symlink
+					continue
+				yield (os.path.relpath(full_filename, self._root_dir), stat)
+
+	def refresh(self, jobs: int | None = None, rebuild: bool = False):
+		present = { }
+		outdated = [ ]
+		for (relpath, stat) in self._scan():
+			present[relpath] = stat
+			file_info = self._files.get(relpath)
+			if rebuild or (file_info is None) or (file_info["mtime"] != stat.st_mtime) or (file_info["size"] != stat.st_size):
+				outdated.append(relpath)
+
+		removed = [ relpath for relpath in self._files if relpath not in present ]
+		for relpath in removed:
+			del self._files[relpath]
+
+		filenames = [ os.path.join(self._root_dir, relpath) for relpath in outdated ]
+		if (jobs == 1) or (len(filenames) < 2):
+			indexed = [ _index_exam_file(filename) for filename in filenames ]
+		else:
+			with concurrent.futures.ProcessPoolExecutor(max_workers = jobs) as pool:
+				indexed = list(pool.map(_index_exam_file, filenames, chunksize = 4))
+		unindexable = [ ]
+		for (relpath, (exam_info, error)) in zip(outdated, indexed):
+			stat = present[relpath]
+			self._files[relpath] = { "mtime": stat.st_mtime, "size": stat.st_size, "exam": exam_info, "error": error }
+			if error is not None:
+				unindexable.append((relpath, error))
+
+		if (len(outdated) > 0) or (len(removed) > 0):
+			self._write_index()
+			self._by_student = None
+			self._by_course = None
+		return self.RefreshResult(updated = outdated, removed = removed, unchanged = len(present) - len(outdated), unindexable = unindexable)
+
+	def _build_lookup(self):
+		self._by_student = collections.defaultdict(list)
+		self._by_course = collections.defaultdict(lambda: collections.defaultdict(list))
+		for (relpath, file_info) in sorted(self._files.items()):
+			exam_info = file_info["exam"]
+			if exam_info is None:
+				continue
+			for entry in exam_info["entries"]:
+				self._by_student[entry["student_number"]].append(self.TranscriptEntry(filename = relpath, exam = exam_info, entry = entry))
+				self._by_course[entry["course"]][relpath].append(entry)
+
+	def transcript(self, student_number: str):
+		if self._by_student is None:
+			self._build_lookup()
+		return self._by_student.get(student_number, [ ])
+
+	def course_summary(self, course: str):
+		if self._by_course is None:
+			self._build_lookup()
+		summaries = [ ]
+		for (relpath, entries) in self._by_course.get(course, { }).items():
+			complete_entries = [ entry for entry in entries if entry["complete_data"] ]
+			summaries.append(self.CourseSummary(filename = relpath, exam = self._files[relpath]["exam"], total_count = len(complete_entries), passed_count = sum(1 for entry in complete_entries if entry["passing"]), incomplete_count = len(entries) - len(complete_entries)))
+		return summaries
@@ -19,43 +19,37 @@
 #
 #	Johannes Bauer <JohannesBauer@gmx.de>
 
+import os
 import sys
 import fractions
 import pyexamgrading
 from .MultiCommand import MultiCommand
-from .GradingScheme import GradingSchemeType
-from .actions.ActionNewExam import ActionNewExam
-from .actions.ActionEnterResults import ActionEnterResults
-from .actions.ActionImport import ActionImport
-from .actions.ActionPrint import ActionPrint
-from .actions.ActionEmail import ActionEmail
-from .actions.ActionExport import ActionExport
-from .actions.ActionTable import ActionTable
-from .actions.ActionRemoveStudent import ActionRemoveStudent
+from .FriendlyArgumentParser import posint
 
-def main():
-	mc = MultiCommand(description = "Grade exams and allow for import and export of various data", trailing_text = f"pyexamgrading v{pyexamgrading.VERSION}", run_method = True)
+def create_multicommand():
+	mc = MultiCommand(description = "Grade exams and allow for import and export of various data", trailing_text = f"pyexamgrading v{pyexamgrading.VERSION}. To send a command to a running server, use 'pyexam --connect socket_filename [command] [options]'.", run_method = True, entry_point_group = "pyexamgrading.commands")
 
 	def genparser(parser):
+		parser.add_argument("-p", "--previous-attempt", metavar = "filename", help = "Link the new exam as a retake of this exam file. The path is stored relative to the new exam file.")
 		parser.add_argument("-f", "--force", action = "store_true", help = "Overwrite output file if it already exists.")
 		parser.add_argument("-v", "--verbose", action = "count", default = 0, help = "Increase verbosity. Can be given multiple times.")
 		parser.add_argument("exam_definition_json", help = "Input JSON filename containing the exam stucture.")
 		parser.add_argument("exam_json", help = "Output JSON filename containing the graded exam.")
 		parser.add_argument("students_json", nargs = "+", help = "Input JSON filename(s) containing the participants of the exam.")
-	mc.register("new", "Create a new exam file", genparser, action = ActionNewExam)
+	mc.register("new", "Create a new exam file", genparser, action = "pyexamgrading.actions.ActionNewExam:ActionNewExam")
 
 	def genparser(parser):
 		parser.add_argument("-a", "--enter-all-results", action = "store_true", help = "Ask for input of all results, even if they have been already entered.")
 		parser.add_argument("-v", "--verbose", action = "count", default = 0, help = "Increase verbosity. Can be given multiple times.")
 		parser.add_argument("exam_json", help = "JSON filename containing the graded exam.")
-	mc.register("enter", "Interactively enter graded data", genparser, action = ActionEnterResults)
+	mc.register("enter", "Interactively enter graded data", genparser, action = "pyexamgrading.actions.ActionEnterResults:ActionEnterResults")
 
 	def genparser(parser):
 		parser.add_argument("-o", "--overwrite-results", action = "store_true", help = "Overwrite results when they are already entered.")
 		parser.add_argument("-v", "--verbose", action = "count", default = 0, help = "Increase verbosity. Can be given multiple times.")
 		parser.add_argument("exam_json", help = "JSON filename containing the graded exam.")
 		parser.add_argument("csv_filename", help = "CSV file to import results from.")
-	mc.register("import", "Import CSV data, for example from MOODLE", genparser, action = ActionImport)
+	mc.register("import", "Import CSV data, for example from MOODLE", genparser, action = "pyexamgrading.actions.ActionImport:ActionImport")
 
 	def genparser(parser):
 		parser.add_argument("-a", "--show-all", action = "store_true", help = "Show all students, even those with incomplete data.")
@@ -64,10 +58,11 @@ def main():
 		parser.add_argument("-c", "--filter-course", metavar = "pattern", help = "Show only students which match this course.")
 		parser.add_argument("-S", "--sort-criteria", choices = [ "name", "grade" ], default = "name", help = "Sort shown students by these criteria. Can be one of %(choices)s, defaults to %(default)s.")
 		parser.add_argument("-b", "--breakdown", action = "store_true", help = "Show an individual task breakdown for each result.")
+		parser.add_argument("-R", "--rank", action = "store_true", help = "Show the rank and percentile of each student among all students who have results.")
 		parser.add_argument("-H", "--hypothesize", choices = [ "no", "best", "half", "worst", "avg" ], default = "no", help = "When not all grades are present, model a grade hypothesis. Can be one of %(choices)s, defaults to '%(default)s'.")
 		parser.add_argument("-v", "--verbose", action = "count", default = 0, help = "Increase verbosity. Can be given multiple times.")
 		parser.add_argument("exam_json", help = "JSON filename containing the graded exam.")
-	mc.register("print", "Show exam data and grading", genparser, action = ActionPrint)
+	mc.register("print", "Show exam data and grading", genparser, action = "pyexamgrading.actions.ActionPrint:ActionPrint")
 
 	def genparser(parser):
 #		parser.add_argument("-f", "--only-failed", action = "store_true", help = "Show only students which failed the exam.")
@@ -75,24 +70,37 @@ def main():
 		parser.add_argument("-s", "--search", metavar = "pattern", help = "Show only students which match this pattern.")
 		parser.add_argument("-c", "--filter-course", metavar = "pattern", help = "Show only students which match this course.")
 		parser.add_argument("--min-participants-stats", metavar = "count", type = int, default = 10, help = "By default, statistical information is not shown for privacy purposes below this number of participants of a test. By default, this is %(default)d.")
+		parser.add_argument("-t", "--output-type", choices = [ "auto", "json", "ndjson", "dir" ], default = "auto", help = "Write the output in this format. 'json' is a single Makomailer-compatible JSON file, 'ndjson' writes the global data and then one line per student as soon as their PDF is rendered, 'dir' writes a directory with a JSON file for the global data and a JSON and PDF file for every student. When 'auto', 'ndjson' is used for files ending in .ndjson or .jsonl, 'dir' for existing directories or names ending in a slash and 'json' otherwise. Defaults to %(default)s.")
+		parser.add_argument("--template-dir", metavar = "path", action = "append", default = [ ], help = "Directory which is searched for templates before the built-in ones, e.g., to supply a customized export.tex. Can be given multiple times.")
+		parser.add_argument("-j", "--jobs", metavar = "count", type = int, default = None, help = "Number of PDFs which are rendered concurrently. Defaults to the number of CPUs.")
+		parser.add_argument("-b", "--batch-size", metavar = "count", type = int, default = None, help = "Number of students whose PDFs are rendered in a single pdflatex run and then split into individual PDFs using qpdf. By default, students are distributed evenly across all jobs, with at most 32 students per batch, when qpdf is available and rendered individually otherwise.")
+		parser.add_argument("--cache-dir", metavar = "path", help = "Directory in which rendered PDFs are cached so that only PDFs of students whose result changed are rendered again. Defaults to ~/.cache/pyexamgrading/pdf.")
+		parser.add_argument("--cache-size", metavar = "MiB", type = int, default = 512, help = "Maximum size of the PDF cache; least recently used PDFs are removed when it is exceeded. Defaults to %(default)d MiB.")
+		parser.add_argument("--no-cache", action = "store_true", help = "Do not use the PDF cache, always render all PDFs.")
 		parser.add_argument("-v", "--verbose", action = "count", default = 0, help = "Increase verbosity. Can be given multiple times.")
 		parser.add_argument("exam_json", help = "JSON filename containing the graded exam.")
-		parser.add_argument("output_filename", help = "Output filename containing the rendered data as Makomailer-compatible JSON.")
-	mc.register("email", "Show email addresses of selected students", genparser, action = ActionEmail)
+		parser.add_argument("output_filename", help = "Output filename or directory containing the rendered data.")
+	mc.register("email", "Show email addresses of selected students", genparser, action = "pyexamgrading.actions.ActionEmail:ActionEmail")
 
 	def genparser(parser):
 		parser.add_argument("-a", "--show-all", action = "store_true", help = "Export all students, even those with incomplete data.")
-		parser.add_argument("-t", "--output-type", choices = [ "auto", "csv", "tex", "pdf", "ods" ], default = "auto", help = "Export in this output format. Can be one of %(default)s, defaults to %(default)s. When 'auto', the filename extension must clearly indicate the file type.")
+		parser.add_argument("-t", "--output-type", choices = [ "auto", "csv", "tex", "pdf", "ods", "html", "parquet", "pyexcol", "columnar" ], default = "auto", help = "Export in this output format. Can be one of %(choices)s, defaults to %(default)s. 'parquet' requires pyarrow, 'pyexcol' is a column-oriented format which only needs the standard library and 'columnar' uses Parquet when pyarrow is installed and pyexcol otherwise. When 'auto', the extension of every output filename must clearly indicate its file type.")
 		parser.add_argument("-s", "--search", metavar = "pattern", help = "Show only students which match this pattern.")
 		parser.add_argument("-c", "--filter-course", metavar = "pattern", help = "Show only students which match this course.")
 		parser.add_argument("--min-participants-stats", metavar = "count", type = int, default = 10, help = "By default, statistical information is not shown for privacy purposes below this number of participants of a test. By default, this is %(default)d.")
+		parser.add_argument("-j", "--jobs", metavar = "count", type = int, default = None, help = "Number of outputs which are written concurrently when several output files or groups are written. Defaults to the number of CPUs.")
+		parser.add_argument("--streaming-ods", action = "store_true", help = "Write ODS files row by row directly into the output file instead of building the document in memory first. Intended for very large cohorts; conditional formatting is replaced by fixed cell colors.")
+		parser.add_argument("--values-only", action = "store_true", help = "When writing ODS files, store computed values instead of formulas, e.g., for archival copies. Implies --streaming-ods.")
+		parser.add_argument("--template-dir", metavar = "path", action = "append", default = [ ], help = "Directory which is searched for templates before the built-in ones, e.g., to supply a customized export.tex. Can be given multiple times.")
 		parser.add_argument("-f", "--force", action = "store_true", help = "Overwrite output file if it already exists.")
 		parser.add_argument("-v", "--verbose", action = "count", default = 0, help = "Increase verbosity. Can be given multiple times.")
 		parser.add_argument("exam_json", help = "JSON filename containing the graded exam.")
-		parser.add_argument("output_filename", help = "Output filename containing the rendered data.")
-	mc.register("export", "Export exam data", genparser, action = ActionExport)
+		parser.add_argument("--split-by", metavar = "key", help = "Write one output per group of students instead of a single one. The key can be 'course' or 'custom.<name>' for a custom student field. Output filenames then must contain '{group}', which is replaced by the group value. Statistics are computed per group; the cohort-wide statistics are additionally shown in the per-student TeX and PDF output.")
+		parser.add_argument("output_filename", nargs = "+", help = "Output filename(s) containing the rendered data. When several are given, the exam is loaded and graded once and all outputs are written concurrently.")
+	mc.register("export", "Export exam data", genparser, action = "pyexamgrading.actions.ActionExport:ActionExport")
 
 	def genparser(parser):
+		from .GradingScheme import GradingSchemeType
 		parser.add_argument("--start-at", metavar = "value", type = fractions.Fraction, default = "0", help = "Start the grading table at this value. By default, this is %(default)s.")
 		parser.add_argument("--end-at", metavar = "value", type = fractions.Fraction, default = None, help = "End the grading table at this value. By default, this is the same as the total points value.")
 		parser.add_argument("--step", metavar = "value", type = fractions.Fraction, default = "0.5", help = "Print graduation with this step size. By default, this is %(default)s.")
@@ -100,15 +108,158 @@ def main():
 		parser.add_argument("-o", "--option", metavar = "key=value", action = "append", default = [ ], help = "Set various variables of the grading scheme. Must be in key=value format. Can be specified multiple times.")
 		parser.add_argument("-v", "--verbose", action = "count", default = 0, help = "Increase verbosity. Can be given multiple times.")
 		parser.add_argument("scheme_type", type = GradingSchemeType, help = f"Grading scheme name. Must be one of {', '.join(gst.value for gst in GradingSchemeType)}")
-	mc.register("table", "Print a grading table", genparser, action = ActionTable)
+	mc.register("table", "Print a grading table", genparser, action = "pyexamgrading.actions.ActionTable:ActionTable")
 
 	def genparser(parser):
 		parser.add_argument("-n", "--no-result-for", metavar = "part_name", help = "Remove all students which do not have a result for the given subtype set.")
 		parser.add_argument("-c", "--commit", action = "store_true", help = "Commit changes to exam file.")
 		parser.add_argument("-v", "--verbose", action = "count", default = 0, help = "Increase verbosity. Can be given multiple times.")
 		parser.add_argument("exam_json", help = "JSON filename containing the graded exam.")
-	mc.register("remove", "Remove student(s) from an exam file", genparser, action = ActionRemoveStudent)
+	mc.register("remove", "Remove student(s) from an exam file", genparser, action = "pyexamgrading.actions.ActionRemoveStudent:ActionRemoveStudent")
+
+	def genparser(parser):
+		parser.add_argument("-s", "--student", metavar = "student_number", help = "Show the transcript of all exam results of the student with this student number.")
+		parser.add_argument("-c", "--course", metavar = "course", help = "Show pass rates of all exams which students of this course participated in.")
+		parser.add_argument("-o", "--output-filename", metavar = "filename", help = "Write the query result as CSV to this file instead of printing it.")
+		parser.add_argument("-j", "--jobs", metavar = "count", type = int, default = None, help = "Number of parallel processes used to index exam files. Defaults to the number of CPUs.")
+		parser.add_argument("-i", "--index-file", metavar = "filename", help = "Filename of the persistent workspace index. Defaults to .pyexam_workspace.json inside the workspace directory.")
+		parser.add_argument("-r", "--rebuild", action = "store_true", help = "Re-index all exam files, even those which have not changed.")
+		parser.add_argument("-n", "--no-refresh", action = "store_true", help = "Do not look for changed exam files, only query the existing index.")
+		parser.add_argument("-v", "--verbose", action = "count", default = 0, help = "Increase verbosity. Can be given multiple times.")
+		parser.add_argument("directory", help = "Workspace directory which is searched recursively for exam JSON files.")
+	mc.register("workspace", "Index many exams and query results across them", genparser, action = "pyexamgrading.actions.ActionWorkspace:ActionWorkspace")
+
+	def genparser(parser):
+		from .Attempts import ResolutionPolicy
+		parser.add_argument("-p", "--policy", choices = [ policy.value for policy in ResolutionPolicy ], default = "best", help = "Determines which attempt counts as the final grade. Can be one of %(choices)s, defaults to %(default)s.")
+		parser.add_argument("-c", "--carry-over", metavar = "group", action = "append", default = [ ], help = "Results of tasks in this group are carried over from previous attempts when they are missing in a later attempt (e.g., laboratory results). Can be specified multiple times.")
+		parser.add_argument("-o", "--output-filename", metavar = "filename", help = "Write the resolved grades as CSV to this file instead of printing them.")
+		parser.add_argument("-v", "--verbose", action = "count", default = 0, help = "Increase verbosity. Can be given multiple times.")
+		parser.add_argument("exam_json", nargs = "+", help = "JSON filename(s) of all attempts in chronological order. When only one file is given, previous attempts are found by following its previous_attempt link.")
+	mc.register("resolve", "Determine final grades across several attempts of an exam", genparser, action = "pyexamgrading.actions.ActionResolveAttempts:ActionResolveAttempts")
+
+	def genparser(parser):
+		parser.add_argument("-s", "--search", metavar = "pattern", help = "Analyze only students which match this pattern.")
+		parser.add_argument("-c", "--filter-course", metavar = "pattern", help = "Analyze only students which match this course.")
+		parser.add_argument("-b", "--bins", metavar = "count", type = posint, default = 5, help = "Number of bins of the score distribution of each task. Defaults to %(default)d.")
+		parser.add_argument("-t", "--output-format", choices = [ "text", "csv", "json" ], default = "text", help = "Output format. Can be one of %(choices)s, defaults to %(default)s.")
+		parser.add_argument("-o", "--output-filename", metavar = "filename", help = "Write the analysis to this file instead of stdout.")
+		parser.add_argument("-f", "--force", action = "store_true", help = "Overwrite output file if it already exists.")
+		parser.add_argument("-v", "--verbose", action = "count", default = 0, help = "Increase verbosity. Can be given multiple times.")
+		parser.add_argument("exam_json", help = "JSON filename containing the graded exam.")
+	mc.register("analyze", "Item analysis of all tasks: difficulty, discrimination and reliability", genparser, action = "pyexamgrading.actions.ActionAnalyze:ActionAnalyze")
+
+	def genparser(parser):
+		parser.add_argument("-w", "--window", metavar = "points", type = fractions.Fraction, default = fractions.Fraction(2), help = "List students whose points are at most this far below a grade boundary. Defaults to %(default)s points.")
+		parser.add_argument("-a", "--above", metavar = "points", type = fractions.Fraction, default = fractions.Fraction(0), help = "Additionally list students who have passed a grade boundary by at most this many points. Defaults to %(default)s points.")
+		parser.add_argument("-g", "--grade", metavar = "grade", action = "append", default = [ ], help = "Only consider the boundary of this grade, e.g., '4.0'. Can be specified multiple times.")
+		parser.add_argument("-p", "--passing-only", action = "store_true", help = "Only consider the boundary between failing and passing.")
+		parser.add_argument("--complete-only", action = "store_true", help = "Omit students with incomplete data. By default they are included, with missing results counting as zero points.")
+		parser.add_argument("-s", "--search", metavar = "pattern", help = "Show only students which match this pattern.")
+		parser.add_argument("-c", "--filter-course", metavar = "pattern", help = "Show only students which match this course.")
+		parser.add_argument("-o", "--output-filename", metavar = "filename", help = "Write the report as CSV to this file instead of printing it.")
+		parser.add_argument("-f", "--force", action = "store_true", help = "Overwrite output file if it already exists.")
+		parser.add_argument("-v", "--verbose", action = "count", default = 0, help = "Increase verbosity. Can be given multiple times.")
+		parser.add_argument("exam_json", help = "JSON filename containing the graded exam.")
+	mc.register("borderline", "List students close to a grade boundary", genparser, action = "pyexamgrading.actions.ActionBorderline:ActionBorderline")
+
+	def genparser(parser):
+		parser.add_argument("-d", "--delta", metavar = "points", type = fractions.Fraction, action = "append", default = [ ], help = "Additionally rescore every task by plus and minus this many (unscaled) points, clamped to the valid range of the task. Can be specified multiple times.")
+		parser.add_argument("-x", "--scale", metavar = "factor", type = fractions.Fraction, action = "append", default = [ ], help = "Additionally rescore every task by multiplying the achieved points with this factor, clamped to the maximum of the task. Can be specified multiple times.")
+		parser.add_argument("-T", "--task", metavar = "name", action = "append", default = [ ], help = "Only analyze this task. Can be specified multiple times.")
+		parser.add_argument("-i", "--include-incomplete", action = "store_true", help = "Include students with incomplete data, counting missing results as zero points.")
+		parser.add_argument("-s", "--search", metavar = "pattern", help = "Analyze only students which match this pattern.")
+		parser.add_argument("-c", "--filter-course", metavar = "pattern", help = "Analyze only students which match this course.")
+		parser.add_argument("-t", "--output-format", choices = [ "text", "csv", "json" ], default = "text", help = "Output format. Can be one of %(choices)s, defaults to %(default)s.")
+		parser.add_argument("-o", "--output-filename", metavar = "filename", help = "Write the analysis to this file instead of stdout.")
+		parser.add_argument("-f", "--force", action = "store_true", help = "Overwrite output file if it already exists.")
+		parser.add_argument("-v", "--verbose", action = "count", default = 0, help = "Increase verbosity. Can be given multiple times.")
+		parser.add_argument("exam_json", help = "JSON filename containing the graded exam.")
+	mc.register("sensitivity", "Show how grades change when a task is dropped, fully credited or rescored", genparser, action = "pyexamgrading.actions.ActionSensitivity:ActionSensitivity")
+
+	def genparser(parser):
+		parser.add_argument("-g", "--group-weight", metavar = "group=weight", action = "append", default = [ ], help = "Propose a new weight for this group, e.g., 'labor=30'. Can be specified multiple times.")
+		parser.add_argument("-r", "--reference-group", metavar = "group", help = "Propose a new reference group.")
+		parser.add_argument("-P", "--scale-points", metavar = "task=points", action = "append", default = [ ], help = "Propose scaling this task to the given number of points. Can be specified multiple times.")
+		parser.add_argument("-p", "--scale-percentage", metavar = "task=percent", action = "append", default = [ ], help = "Propose scaling this task to the given percentage of the total. Can be specified multiple times.")
+		parser.add_argument("-u", "--unscale", metavar = "task", action = "append", default = [ ], help = "Propose removing the scaling of this task. Can be specified multiple times.")
+		parser.add_argument("-S", "--structure", metavar = "filename", help = "Start from the structure in this JSON file (either an exam or a bare structure) instead of the exam's own structure.")
+		parser.add_argument("-i", "--interactive", action = "store_true", help = "Interactively modify the structure and see the effect after every change.")
+		parser.add_argument("-a", "--show-all", action = "store_true", help = "Show all students, not only those whose grade changes.")
+		parser.add_argument("-s", "--search", metavar = "pattern", help = "Consider only students which match this pattern.")
+		parser.add_argument("-c", "--filter-course", metavar = "pattern", help = "Consider only students which match this course.")
+		parser.add_argument("-t", "--output-format", choices = [ "text", "csv", "json" ], default = "text", help = "Output format. Can be one of %(choices)s, defaults to %(default)s.")
+		parser.add_argument("-o", "--output-filename", metavar = "filename", help = "Write the comparison to this file instead of stdout.")
+		parser.add_argument("-f", "--force", action = "store_true", help = "Overwrite output file, and files written by the interactive save command, if they already exist.")
+		parser.add_argument("-v", "--verbose", action = "count", default = 0, help = "Increase verbosity. Can be given multiple times.")
+		parser.add_argument("exam_json", help = "JSON filename containing the graded exam.")
+	mc.register("whatif", "Compare grades under a modified exam structure", genparser, action = "pyexamgrading.actions.ActionWhatIf:ActionWhatIf")
+
+	def genparser(parser):
+		parser.add_argument("-g", "--grades-only", action = "store_true", help = "Only show students whose grade changed.")
+		parser.add_argument("-e", "--exit-code", action = "store_true", help = "Exit with status 1 if there are any differences, like 'git diff --exit-code'.")
+		parser.add_argument("-t", "--output-format", choices = [ "text", "json" ], default = "text", help = "Output format. Can be one of %(choices)s, defaults to %(default)s.")
+		parser.add_argument("-o", "--output-filename", metavar = "filename", help = "Write the differences to this file instead of stdout.")
+		parser.add_argument("-f", "--force", action = "store_true", help = "Overwrite output file if it already exists.")
+		parser.add_argument("-v", "--verbose", action = "count", default = 0, help = "Increase verbosity. Can be given multiple times.")
+		parser.add_argument("old_exam", help = "Old exam JSON. Either a filename or a git revision in the form 'rev:path', e.g., 'HEAD~1:exam.json'.")
+		parser.add_argument("new_exam", help = "New exam JSON. Either a filename or a git revision in the form 'rev:path'.")
+	mc.register("diff", "Show differences in results and grades between two exam files", genparser, action = "pyexamgrading.actions.ActionDiff:ActionDiff")
+
+	def genparser(parser):
+		parser.add_argument("-m", "--missing", metavar = "task", action = "append", default = [ ], help = "List the students that have no result for this task yet. Can be specified multiple times.")
+		parser.add_argument("-u", "--ungraded", action = "store_true", help = "Only list tasks for which results are still missing.")
+		parser.add_argument("-C", "--by-course", action = "store_true", help = "Additionally show the progress of every course.")
+		parser.add_argument("-S", "--summary", action = "store_true", help = "Only show the overall progress, not the individual tasks.")
+		parser.add_argument("-c", "--filter-course", metavar = "pattern", help = "Consider only students which match this course.")
+		parser.add_argument("-t", "--output-format", choices = [ "text", "json" ], default = "text", help = "Output format. Can be one of %(choices)s, defaults to %(default)s.")
+		parser.add_argument("-v", "--verbose", action = "count", default = 0, help = "Increase verbosity. Can be given multiple times.")
+		parser.add_argument("exam_json", help = "JSON filename containing the exam.")
+	mc.register("progress", "Show how many results have been entered and which are still missing", genparser, action = "pyexamgrading.actions.ActionProgress:ActionProgress")
+
+	def genparser(parser):
+		parser.add_argument("-g", "--group-by", metavar = "keys", default = "course", help = "Comma-separated list of attributes to group by, each either 'course' or 'custom.<name>'. Defaults to %(default)s.")
+		parser.add_argument("-H", "--grade-histogram", action = "store_true", help = "Show the grade distribution of every group.")
+		parser.add_argument("-T", "--tasks", action = "store_true", help = "Show the average points of every task for every group.")
+		parser.add_argument("-j", "--jobs", metavar = "count", type = int, default = 1, help = "Grade the students in this many parallel processes, each handling one shard of the students. Defaults to %(default)d.")
+		parser.add_argument("-a", "--show-all", action = "store_true", help = "Include students with incomplete data.")
+		parser.add_argument("-s", "--search", metavar = "pattern", help = "Consider only students which match this pattern.")
+		parser.add_argument("-c", "--filter-course", metavar = "pattern", help = "Consider only students which match this course.")
+		parser.add_argument("-t", "--output-format", choices = [ "text", "csv", "json" ], default = "text", help = "Output format. Can be one of %(choices)s, defaults to %(default)s.")
+		parser.add_argument("-o", "--output-filename", metavar = "filename", help = "Write the statistics to this file instead of stdout.")
+		parser.add_argument("-f", "--force", action = "store_true", help = "Overwrite output file if it already exists.")
+		parser.add_argument("-v", "--verbose", action = "count", default = 0, help = "Increase verbosity. Can be given multiple times.")
+		parser.add_argument("exam_json", help = "JSON filename containing the graded exam.")
+	mc.register("stats", "Compare statistics between courses or other groups of students", genparser, action = "pyexamgrading.actions.ActionStats:ActionStats")
+
+	def genparser(parser):
+		parser.add_argument("-l", "--limit", metavar = "count", type = int, default = 20, help = "Show at most this many locations per kind of anomaly, 0 shows all. Defaults to %(default)d.")
+		parser.add_argument("-t", "--output-format", choices = [ "text", "json" ], default = "text", help = "Output format. Can be one of %(choices)s, defaults to %(default)s.")
+		parser.add_argument("-v", "--verbose", action = "count", default = 0, help = "Increase verbosity. Can be given multiple times.")
+		parser.add_argument("exam_json", help = "JSON filename containing the exam.")
+	mc.register("check", "Check all results for invalid values, unknown tasks and orphaned students", genparser, action = "pyexamgrading.actions.ActionCheck:ActionCheck")
+
+	def genparser(parser):
+		parser.add_argument("-v", "--verbose", action = "count", default = 0, help = "Increase verbosity. Can be given multiple times.")
+		parser.add_argument("socket_filename", help = "UNIX socket on which the server listens. Clients connect to it using 'pyexam --connect socket_filename [command] [options]'.")
+	mc.register("serve", "Keep exams loaded in a server process for fast repeated commands", genparser, action = "pyexamgrading.actions.ActionServe:ActionServe")
+
+	return mc
+
+def main():
+	if (len(sys.argv) >= 2) and (sys.argv[1] == "--connect"):
+		if len(sys.argv) < 3:
+			print("Error: --connect requires the socket filename of a running server.", file = sys.stderr)
+			return 1
+		from .Server import ExamClient
+		return ExamClient(sys.argv[2]).run(sys.argv[3:])
+
+	if os.environ.get("PYEXAM_CHECK_ON_WRITE", "") not in [ "", "0" ]:
+		from .Exam import Exam
+		from .Validation import ExamValidator
+		Exam.set_pre_write_hook(ExamValidator.check_exam)
 
+	mc = create_multicommand()
 	returncode = mc.run(sys.argv[1:])
 	return returncode or 0
 
@@ -0,0 +1,84 @@
+#	pyexamgrading - Manage grade computation of university exams
+#	Copyright (C) 2024-2024 Johannes Bauer
+#
+#	This file is part of pyexamgrading.
+#
+#	pyexamgrading is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyexamgrading is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyexamgrading; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import os
+import sys
+import csv
+import json
+from pyexamgrading.MultiCommand import BaseAction
+from pyexamgrading.Exam import Exam
+from pyexamgrading.ResultExporter import StudentResult
+from pyexamgrading.ItemAnalysis import ItemAnalysis
+
+class ActionAnalyze(BaseAction):
+	def _filtered_students(self):
+		for student in self._exam.students:
+			if (self.args.search is not None) and (not student.matches(self.args.search)):
+				continue
+			if (self.args.filter_course is not None) and (not self.args.filter_course.lower() in student.course.lower()):
+				continue
+			yield student
+
+	@staticmethod
+	def _fmt(value: float | None, fmt: str):
+		return "-" if (value is None) else format(value, fmt)
+
+	def _print_text(self, analysis: ItemAnalysis, f):
+		print(f"{analysis.student_count} students, {len(analysis.tasks)} tasks, Cronbach's alpha: {self._fmt(analysis.cronbach_alpha, '.3f')}", file = f)
+		print(file = f)
+		name_width = max([ len(task_analysis.task.name) for task_analysis in analysis.tasks ] + [ 4 ])
+		print(f"{'Task':<{name_width}s}  {'Max':>5s}  {'Mean':>6s}  {'SD':>6s}  {'Diff':>5s}  {'r(it)':>6s}  {'r(it)c':>6s}  {'α-del':>6s}  Distribution", file = f)
+		for task_analysis in analysis.tasks:
+			histogram = " ".join(f"{count:>4d}" for count in task_analysis.histogram)
+			print(f"{task_analysis.task.name:<{name_width}s}  {float(task_analysis.task.max_points):>5.1f}  {self._fmt(task_analysis.mean, '>6.2f')}  {self._fmt(task_analysis.stddev, '>6.2f')}  {self._fmt(task_analysis.difficulty, '>5.2f')}  {self._fmt(task_analysis.item_total_correlation, '>6.3f')}  {self._fmt(task_analysis.corrected_item_total_correlation, '>6.3f')}  {self._fmt(task_analysis.alpha_if_deleted, '>6.3f')}  {histogram}", file = f)
+
+	def _write_csv(self, analysis: ItemAnalysis, f):
+		writer = csv.writer(f)
+		writer.writerow([ "Aufgabe", "Gruppe", "Max. Punkte", "Mittelwert", "Standardabweichung", "Schwierigkeit", "Trennschärfe (Item-Total)", "Trennschärfe (korrigiert)", "Alpha ohne Aufgabe" ] + [ f"Verteilung {bin_index + 1}/{self.args.bins}" for bin_index in range(self.args.bins) ])
+		for task_analysis in analysis.tasks:
+			writer.writerow([ task_analysis.task.name, task_analysis.task.group, float(task_analysis.task.max_points), task_analysis.mean, task_analysis.stddev, task_analysis.difficulty, task_analysis.item_total_correlation, task_analysis.corrected_item_total_correlation, task_analysis.alpha_if_deleted ] + task_analysis.histogram)
+
+	def run(self):
+		if (self.args.output_filename is not None) and (not self.args.force) and os.path.exists(self.args.output_filename):
+			raise FileExistsError(f"Refusing to overwrite: {self.args.output_filename}")
+
+		self._exam = Exam.load_json(self.args.exam_json)
+		entries = [ ]
+		for student in self._filtered_students():
+			grade = self._exam.grade(student)
+			if not grade.complete_data:
+				continue
+			entries.append(StudentResult(student = student, grade = grade))
+		analysis = ItemAnalysis(self._exam, entries, bins = self.args.bins)
+
+		f = sys.stdout if (self.args.output_filename is None) else open(self.args.output_filename, "w")
+		try:
+			match self.args.output_format:
+				case "text":
+					self._print_text(analysis, f)
+				case "csv":
+					self._write_csv(analysis, f)
+				case "json":
+					json.dump(analysis.to_dict(), f, indent = "\t")
+					f.write("\n")
+		finally:
+			if f is not sys.stdout:
+				f.close()
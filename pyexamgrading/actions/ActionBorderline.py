@@ -0,0 +1,90 @@
+#	pyexamgrading - Manage grade computation of university exams
+#	Copyright (C) 2024-2024 Johannes Bauer
+#
+#	This file is part of pyexamgrading.
+#
+#	pyexamgrading is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyexamgrading is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyexamgrading; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import os
+import csv
+from pyexamgrading.MultiCommand import BaseAction
+from pyexamgrading.Exam import Exam
+from pyexamgrading.ResultExporter import StudentResult
+from pyexamgrading.Borderline import BorderlineIndex
+
+class ActionBorderline(BaseAction):
+	def _filtered_students(self):
+		for student in self._exam.students:
+			if (self.args.search is not None) and (not student.matches(self.args.search)):
+				continue
+			if (self.args.filter_course is not None) and (not self.args.filter_course.lower() in student.course.lower()):
+				continue
+			yield student
+
+	def _grade_texts(self, index: BorderlineIndex):
+		grade_texts = set(self.args.grade) if (len(self.args.grade) > 0) else None
+		if self.args.passing_only:
+			passing_texts = { boundary.grade.text for (previous, boundary) in zip(index.boundaries, index.boundaries[1:]) if boundary.grade.passing and (not previous.grade.passing) }
+			grade_texts = passing_texts if (grade_texts is None) else (grade_texts & passing_texts)
+		return grade_texts
+
+	@staticmethod
+	def _candidates_str(candidates: list):
+		return ", ".join(f"{candidate.task.name} ({'missing, ' if candidate.missing_data else ''}+{float(candidate.possible_gain):.1f})" for candidate in candidates)
+
+	def _print_groups(self, groups: list):
+		for group in groups:
+			boundary = group.boundary
+			passing_str = " (passing)" if boundary.grade.passing else ""
+			print(f"Grade {boundary.grade.text}{passing_str} from {float(boundary.points):.2f} points: {len(group.students)} student(s)")
+			for borderline in group.students:
+				entry = borderline.entry
+				incomplete = "⚠" if (not entry.grade.complete_data) else " "
+				if entry.grade.grade.value > boundary.grade.value:
+					difference_str = f"{float(borderline.point_difference):.2f} pts missing"
+				else:
+					difference_str = f"{float(-borderline.point_difference):.2f} pts above"
+				print(f"  {incomplete} {entry.student.course:<6s} {entry.student.full_name:<40s} {entry.grade.grade.text:<5s} {float(entry.grade.grade.achieved_points):6.2f} pts  {difference_str:<18s} {self._candidates_str(borderline.candidate_tasks)}")
+			print()
+
+	def _write_csv(self, groups: list):
+		with open(self.args.output_filename, "w") as f:
+			writer = csv.writer(f)
+			writer.writerow([ "Notengrenze", "Punktegrenze", "Kurs", "Nachname", "Vorname", "Matrikelnummer", "Note", "Punkte", "Punktdifferenz", "Vollständig", "Mögliche Aufgaben" ])
+			for group in groups:
+				for borderline in group.students:
+					entry = borderline.entry
+					writer.writerow([ group.boundary.grade.text, float(group.boundary.points), entry.student.course, entry.student.last_name, entry.student.first_name, entry.student.student_number, entry.grade.grade.text, float(entry.grade.grade.achieved_points), float(borderline.point_difference), entry.grade.complete_data, self._candidates_str(borderline.candidate_tasks) ])
+
+	def run(self):
+		if (self.args.output_filename is not None) and (not self.args.force) and os.path.exists(self.args.output_filename):
+			raise FileExistsError(f"Refusing to overwrite: {self.args.output_filename}")
+
+		self._exam = Exam.load_json(self.args.exam_json)
+		entries = [ ]
+		for student in self._filtered_students():
+			grade = self._exam.grade(student)
+			if self.args.complete_only and (not grade.complete_data):
+				continue
+			entries.append(StudentResult(student = student, grade = grade))
+
+		index = BorderlineIndex(self._exam, entries)
+		groups = index.query(window_below = self.args.window, window_above = self.args.above, grade_texts = self._grade_texts(index))
+		if self.args.output_filename is not None:
+			self._write_csv(groups)
+		else:
+			self._print_groups(groups)
@@ -0,0 +1,63 @@
+#	pyexamgrading - Manage grade computation of university exams
+#	Copyright (C) 2024-2024 Johannes Bauer
+#
+#	This file is part of pyexamgrading.
+#
+#	pyexamgrading is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyexamgrading is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyexamgrading; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import sys
+import json
+from pyexamgrading.MultiCommand import BaseAction
+from pyexamgrading.Exam import Exam
+from pyexamgrading.Validation import ExamValidator
+
+class ActionCheck(BaseAction):
+	def _print_text(self, anomalies: list):
+		counts = ExamValidator.counts(anomalies)
+		if len(anomalies) == 0:
+			print(f"No anomalies found in {self.args.exam_json}.")
+			return
+		for (kind, count) in counts.items():
+			if count == 0:
+				continue
+			print(f"{count} × {ExamValidator.DESCRIPTIONS[kind]}")
+			shown = [ anomaly for anomaly in anomalies if (anomaly.kind == kind) ]
+			if self.args.limit > 0:
+				shown = shown[:self.args.limit]
+			for anomaly in shown:
+				location = anomaly.student_number
+				if anomaly.task_name is not None:
+					location += f" / {anomaly.task_name}"
+				if anomaly.value is not None:
+					location += f" = {anomaly.value}"
+				print(f"    {location}")
+			if len(shown) < count:
+				print(f"    ... and {count - len(shown)} more")
+
+	def run(self):
+		exam = Exam.load_json(self.args.exam_json)
+		anomalies = ExamValidator(exam).scan()
+		match self.args.output_format:
+			case "text":
+				self._print_text(anomalies)
+			case "json":
+				json.dump({
+					"counts": ExamValidator.counts(anomalies),
+					"anomalies": [ { "kind": anomaly.kind, "student_number": anomaly.student_number, "task": anomaly.task_name, "value": None if (anomaly.value is None) else str(anomaly.value) } for anomaly in anomalies ],
+				}, sys.stdout, indent = "\t")
+				print()
+		return 1 if (len(anomalies) > 0) else 0
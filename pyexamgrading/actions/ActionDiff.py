@@ -0,0 +1,92 @@
+#	pyexamgrading - Manage grade computation of university exams
+#	Copyright (C) 2024-2024 Johannes Bauer
+#
+#	This file is part of pyexamgrading.
+#
+#	pyexamgrading is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyexamgrading is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyexamgrading; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import os
+import sys
+import json
+from pyexamgrading.MultiCommand import BaseAction
+from pyexamgrading.ExamDiff import ExamDiff
+
+class ActionDiff(BaseAction):
+	@staticmethod
+	def _value_str(value):
+		return "-" if (value is None) else str(value)
+
+	@staticmethod
+	def _grade_str(grade):
+		if grade is None:
+			return "-"
+		incomplete = "" if grade.complete_data else " (incomplete)"
+		return f"{grade.grade.text}{incomplete}"
+
+	def _print_text(self, diff: ExamDiff, f):
+		if diff.grading_scheme_changed:
+			print("Grading scheme changed, all students regraded.", file = f)
+		if diff.structure_changed:
+			print("Structure changed, all students regraded.", file = f)
+		if len(diff.metadata_changes) > 0:
+			print(f"Changed exam metadata: {', '.join(diff.metadata_changes)}", file = f)
+
+		for student_diff in diff.students:
+			grade_changed = diff.grade_changed(student_diff)
+			if self.args.grades_only and (not grade_changed):
+				continue
+			student = student_diff.new_student or student_diff.old_student
+			if student_diff.old_student is None:
+				marker = "+"
+			elif student_diff.new_student is None:
+				marker = "-"
+			else:
+				marker = "~"
+			flip = ""
+			if diff.passing_changed(student_diff):
+				flip = "  now passing" if student_diff.new_grade.grade.passing else "  now FAILING"
+			grade_str = f"{self._grade_str(student_diff.old_grade)} -> {self._grade_str(student_diff.new_grade)}" if grade_changed else f"{self._grade_str(student_diff.new_grade)} (unchanged)"
+			print(f"{marker} {student.course:<6s} {student.full_name:<40s} {student.student_number:<12s} {grade_str}{flip}", file = f)
+			for field in student_diff.changed_fields:
+				print(f"      {field}: {getattr(student_diff.old_student, field)} -> {getattr(student_diff.new_student, field)}", file = f)
+			for task_change in student_diff.task_changes:
+				print(f"      {task_change.task_name}: {self._value_str(task_change.old_value)} -> {self._value_str(task_change.new_value)}", file = f)
+
+		grade_changes = diff.grade_changes
+		flips = sum(1 for student_diff in grade_changes if diff.passing_changed(student_diff))
+		print(f"{len(diff.students)} student(s) with differences, {len(grade_changes)} grade change(s), {flips} pass/fail flip(s)", file = f)
+
+	def run(self):
+		if (self.args.output_filename is not None) and (not self.args.force) and os.path.exists(self.args.output_filename):
+			raise FileExistsError(f"Refusing to overwrite: {self.args.output_filename}")
+
+		diff = ExamDiff.from_sources(self.args.old_exam, self.args.new_exam)
+		f = sys.stdout if (self.args.output_filename is None) else open(self.args.output_filename, "w")
+		try:
+			match self.args.output_format:
+				case "text":
+					self._print_text(diff, f)
+				case "json":
+					json.dump(diff.to_dict(), f, indent = "\t")
+					f.write("\n")
+		finally:
+			if f is not sys.stdout:
+				f.close()
+
+		if self.args.exit_code and diff.has_differences:
+			return 1
+		return 0
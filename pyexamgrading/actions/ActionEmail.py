@@ -20,12 +20,12 @@
 #	Johannes Bauer <JohannesBauer@gmx.de>
 
 import os
-import json
-import tempfile
-import base64
+import sys
 from pyexamgrading.MultiCommand import BaseAction
 from pyexamgrading.Exam import Exam
 from pyexamgrading.ResultExporter import StudentResult, ResultExporter
+from pyexamgrading.PDFCache import PDFCache
+from pyexamgrading.EmailWriter import JSONEmailWriter, NDJSONEmailWriter, DirectoryEmailWriter
 
 class ActionEmail(BaseAction):
 	def _filtered_students(self):
@@ -39,6 +39,18 @@ class ActionEmail(BaseAction):
 #				continue
 			yield student
 
+	@property
+	def file_output_type(self):
+		if self.args.output_type == "auto":
+			if self.args.output_filename.endswith("/") or os.path.isdir(self.args.output_filename):
+				return "dir"
+			(prefix, suffix) = os.path.splitext(self.args.output_filename)
+			if suffix in [ ".ndjson", ".jsonl" ]:
+				return "ndjson"
+			return "json"
+		else:
+			return self.args.output_type
+
 	def run(self):
 		if (not self.args.force) and os.path.exists(self.args.output_filename):
 			raise FileExistsError(f"Refusing to overwrite: {self.args.output_filename}")
@@ -47,10 +59,10 @@ class ActionEmail(BaseAction):
 		self._entries = [ ]
 
 		for student in self._filtered_students():
-			grade = self._exam.grade(student)
-			if not grade.complete_data:
+			if not self._exam.has_complete_results(student):
 				continue
 
+			grade = self._exam.grade(student)
 			entry = StudentResult(student = student, grade = grade)
 			self._entries.append(entry)
 
@@ -58,24 +70,28 @@ class ActionEmail(BaseAction):
 			print("Nothing to export: Number of students is zero.", file = sys.stderr)
 			return
 
-		exporter = ResultExporter(exam = self._exam, entries = self._entries, min_participants_stats = self._args.min_participants_stats)
-		export_data = {
-			"global": {
-				"exam": self._exam.to_dict(),
-			},
-			"individual": [ ],
-		}
-		for entry in self._entries:
-			with tempfile.NamedTemporaryFile(prefix = "pyexamgrading_", suffix = ".pdf") as tmpfile:
-				exporter.export_pdf([ entry ], tmpfile.name)
-				with open(tmpfile.name, "rb") as f:
-					pdf_content = f.read()
-
-			individual = {
-				"student": entry.student.to_dict(),
-				"result_pdf": base64.b64encode(pdf_content).decode("ascii"),
-			}
-			export_data["individual"].append(individual)
+		if self.args.no_cache:
+			pdf_cache = None
+		else:
+			pdf_cache = PDFCache(self.args.cache_dir or PDFCache.default_cache_dir(), max_size = self.args.cache_size * 1024 * 1024)
+		exporter = ResultExporter(exam = self._exam, entries = self._entries, min_participants_stats = self._args.min_participants_stats, template_dirs = self.args.template_dir, pdf_cache = pdf_cache)
+		writer_class = {
+			"json":		JSONEmailWriter,
+			"ndjson":	NDJSONEmailWriter,
+			"dir":		DirectoryEmailWriter,
+		}[self.file_output_type]
+		failed_count = 0
+		with writer_class(self.args.output_filename, force = self.args.force) as writer:
+			writer.write_global(self._exam)
+			for rendered in exporter.render_individual_pdfs(self._entries, jobs = self.args.jobs, batch_size = self.args.batch_size):
+				if rendered.error is not None:
+					failed_count += 1
+					print(f"Failed to render PDF for {rendered.entry.student.detailed_info}: {rendered.error}", file = sys.stderr)
+					continue
+				writer.write_individual(rendered.entry.student, rendered.pdf_data)
 
-		with open(self._args.output_filename, "w") as f:
-			json.dump(export_data, f)
+		if (pdf_cache is not None) and (self.args.verbose >= 1):
+			print(f"PDF cache: {pdf_cache.hits} of {pdf_cache.hits + pdf_cache.misses} PDFs taken from cache.", file = sys.stderr)
+		if failed_count > 0:
+			print(f"{failed_count} of {len(self._entries)} PDFs could not be rendered and were omitted.", file = sys.stderr)
+			return 1
@@ -22,6 +22,7 @@
 from pyexamgrading.MultiCommand import BaseAction
 from pyexamgrading.Exam import Exam
 from pyexamgrading.Tools import Tools
+from pyexamgrading.Exceptions import ValidationException
 
 class ActionEnterResults(BaseAction):
 	def run(self):
@@ -57,10 +58,20 @@ class ActionEnterResults(BaseAction):
 				else:
 					current_result_str = f"currently: {current_result}"
 
-				new_result = Tools.input_fraction(f"{task.name} (max. {task.max_points:.1f} pts, {current_result_str}): ")
-				if new_result != Tools.NO_ANSWER:
+				while True:
+					new_result = Tools.input_fraction(f"{task.name} (max. {task.max_points:.1f} pts, {current_result_str}): ")
+					if new_result == Tools.NO_ANSWER:
+						break
 					self._exam.results.set(student, task.name, new_result)
-					self._exam.write_json(self.args.exam_json)
+					try:
+						self._exam.write_json(self.args.exam_json)
+						break
+					except ValidationException as e:
+						if current_result is None:
+							self._exam.results.remove(student, task.name)
+						else:
+							self._exam.results.set(student, task.name, current_result)
+						print(f"Not saved: {e}")
 
 			grade = self._exam.grade(student)
 			if grade.complete_data:
@@ -70,3 +81,7 @@ class ActionEnterResults(BaseAction):
 					print(f"{student.full_name}: Grade {grade.grade.text} ({grade.grade.achieved_points/grade.grade.max_points*100:.0f}%) ")
 			else:
 				print("Missing data, final grade not clear yet.")
+
+			rank_index = self._exam.update_rank(student)
+			if student.student_number in rank_index:
+				print(f"Current rank {rank_index.rank_of(student.student_number)} of {rank_index.count} ({rank_index.percentile_of(student.student_number):.0f}% have at most as many points)")
@@ -20,7 +20,10 @@
 #	Johannes Bauer <JohannesBauer@gmx.de>
 
 import os
+import re
 import sys
+import collections
+import concurrent.futures
 from pyexamgrading.MultiCommand import BaseAction
 from pyexamgrading.Exam import Exam
 from pyexamgrading.ResultExporter import StudentResult, ResultExporter
@@ -34,28 +37,56 @@ class ActionExport(BaseAction):
 				continue
 			yield student
 
-	@property
-	def file_output_type(self):
+	def file_output_type(self, output_filename: str):
 		if self.args.output_type == "auto":
-			(prefix, suffix) = os.path.splitext(self.args.output_filename)
-			if suffix not in [ ".tex", ".csv", ".pdf", ".ods" ]:
-				raise ValueError("Filename must end in a known extension.")
+			(prefix, suffix) = os.path.splitext(output_filename)
+			if suffix not in [ ".tex", ".csv", ".pdf", ".ods", ".html", ".parquet", ".pyexcol" ]:
+				raise ValueError(f"Filename must end in a known extension: {output_filename}")
 			return suffix[1:]
 		else:
 			return self.args.output_type
 
+	def _export(self, exporter: ResultExporter, output_filename: str):
+		output_type = self.file_output_type(output_filename)
+		export_handler = getattr(exporter, f"export_all_{output_type}")
+		if output_type == "ods":
+			export_handler(output_filename, streaming = self.args.streaming_ods, values_only = self.args.values_only)
+		else:
+			export_handler(output_filename)
+
+	def _group_key(self, student: "Student"):
+		if self.args.split_by == "course":
+			value = student.course
+		elif self.args.split_by.startswith("custom."):
+			value = student.custom.get(self.args.split_by[len("custom."):])
+		else:
+			raise ValueError(f"Can only split by 'course' or 'custom.<name>', not: {self.args.split_by}")
+		return "none" if (value is None) else str(value)
+
+	@staticmethod
+	def _group_filename(pattern: str, group: str):
+		safe_group = re.sub(r"[^A-Za-z0-9._-]+", "_", group).strip(".") or "_"
+		return pattern.replace("{group}", safe_group)
+
 	def run(self):
-		if (not self.args.force) and os.path.exists(self.args.output_filename):
-			raise FileExistsError(f"Refusing to overwrite: {self.args.output_filename}")
+		if len(set(os.path.realpath(output_filename) for output_filename in self.args.output_filename)) != len(self.args.output_filename):
+			raise ValueError("The same output filename is given more than once.")
+		for output_filename in self.args.output_filename:
+			self.file_output_type(output_filename)
+			if self.args.split_by is None:
+				if (not self.args.force) and os.path.exists(output_filename):
+					raise FileExistsError(f"Refusing to overwrite: {output_filename}")
+			elif "{group}" not in output_filename:
+				raise ValueError(f"When splitting the output, every output filename must contain a {{group}} placeholder: {output_filename}")
 
 		self._exam = Exam.load_json(self.args.exam_json)
 		self._entries = [ ]
 
 		for student in self._filtered_students():
-			grade = self._exam.grade(student)
-			if (not grade.complete_data) and (not self.args.show_all):
+			if (not self.args.show_all) and (not self._exam.has_complete_results(student)):
 				continue
 
+			grade = self._exam.grade(student)
 			entry = StudentResult(student = student, grade = grade)
 			self._entries.append(entry)
 
@@ -63,6 +94,43 @@ class ActionExport(BaseAction):
 			print("Nothing to export: Number of students is zero.", file = sys.stderr)
 			return
 
-		exporter = ResultExporter(exam = self._exam, entries = self._entries, min_participants_stats = self._args.min_participants_stats)
-		export_handler = getattr(exporter, f"export_all_{self.file_output_type}")
-		export_handler(self.args.output_filename)
+		# All outputs share the loaded exam, the grades and the statistics;
+		# the writers themselves are independent of each other.
+		exporter = ResultExporter(exam = self._exam, entries = self._entries, min_participants_stats = self._args.min_participants_stats, template_dirs = self.args.template_dir)
+		if self.args.split_by is None:
+			jobs = [ (exporter, output_filename) for output_filename in self.args.output_filename ]
+		else:
+			# Every group gets its own statistics, the exporter of the whole
+			# cohort remains available to them for cohort-wide figures.
+			groups = collections.defaultdict(list)
+			for entry in self._entries:
+				groups[self._group_key(entry.student)].append(entry)
+			jobs = [ ]
+			for (group, group_entries) in sorted(groups.items()):
+				group_exporter = ResultExporter(exam = self._exam, entries = group_entries, min_participants_stats = self._args.min_participants_stats, template_dirs = self.args.template_dir, cohort = exporter)
+				jobs += [ (group_exporter, self._group_filename(pattern, group)) for pattern in self.args.output_filename ]
+
+			output_filenames = [ output_filename for (group_exporter, output_filename) in jobs ]
+			if len(set(output_filenames)) != len(output_filenames):
+				raise ValueError("Several groups map to the same output filename.")
+			for output_filename in output_filenames:
+				if (not self.args.force) and os.path.exists(output_filename):
+					raise FileExistsError(f"Refusing to overwrite: {output_filename}")
+
+		if len(jobs) == 1:
+			self._export(*jobs[0])
+			return
+
+		failed_count = 0
+		with concurrent.futures.ThreadPoolExecutor(max_workers = self.args.jobs) as pool:
+			futures = { output_filename: pool.submit(self._export, job_exporter, output_filename) for (job_exporter, output_filename) in jobs }
+			for (output_filename, future) in futures.items():
+				try:
+					future.result()
+					if self.args.verbose >= 1:
+						print(f"Exported {output_filename}", file = sys.stderr)
+				except Exception as e:
+					failed_count += 1
+					print(f"Failed to export {output_filename}: {e.__class__.__name__}: {e}", file = sys.stderr)
+		if failed_count > 0:
+			return 1
@@ -34,4 +34,7 @@ class ActionNewExam(BaseAction):
 			students = Students.load_students_json(student_filename)
 			exam.students.add_all_active(students)
 
+		if self.args.previous_attempt is not None:
+			exam.previous_attempt = os.path.relpath(self.args.previous_attempt, os.path.dirname(os.path.abspath(self.args.exam_json)))
+
 		exam.write_json(self.args.exam_json)
@@ -22,6 +22,7 @@
 import collections
 from pyexamgrading.MultiCommand import BaseAction
 from pyexamgrading.Exam import Exam
+from pyexamgrading.Statistics import StatisticsAccumulator
 
 class ColorScheme():
 	FgRed = "\x1b[31m"
@@ -39,27 +40,27 @@ class ActionPrint(BaseAction):
 
 	@property
 	def total_student_count(self):
-		return len(self._entries)
+		return self._statistics.count
 
 	@property
 	def passed_student_count(self):
-		return self._counts["passed_students"]
+		return self._statistics.passed_count
 
 	@property
 	def failed_student_count(self):
-		return self.total_student_count - self.passed_student_count
+		return self._statistics.failed_count
 
 	@property
 	def incomplete_data_count(self):
-		return self._counts["incomplete_data"]
+		return self._omitted_incomplete_count
 
 	@property
 	def average_grade(self):
-		return sum(entry.grade.grade.value for entry in self._entries) / self.total_student_count
+		return self._statistics.grades.mean
 
 	@property
 	def average_points(self):
-		return sum(entry.grade.grade.achieved_points for entry in self._entries) / self.total_student_count
+		return self._statistics.points.mean
 
 	def _filtered_students(self):
 		for student in self._exam.students:
@@ -84,6 +85,10 @@ class ActionPrint(BaseAction):
 			result_str = f"{entry.grade.grade.achieved_points:.1f} / {entry.grade.grade.max_points:.1f} ({entry.grade.grade.achieved_points / entry.grade.grade.max_points * 100:.1f}%)"
 		else:
 			result_str = f"{entry.grade.grade.achieved_points} / {entry.grade.grade.max_points:.1f} ({entry.grade.grade.achieved_points / entry.grade.grade.max_points * 100:.1f}%)"
+		if self.args.rank:
+			student_number = entry.student.student_number
+			rank_str = f"#{self._rank_index.rank_of(student_number)}/{self._rank_index.count} ({self._rank_index.percentile_of(student_number):.0f}%)" if (student_number in self._rank_index) else "#-"
+			result_str = f"{result_str} {rank_str}"
 		color = self.color.StudentPassed if entry.grade.grade.passing else self.color.StudentFailed
 		print(f"{indicator:<3s} {color}{entry.student.course:<6s} {entry.student.full_name:<40s} {entry.grade.grade.text:<8s} {result_str:<24s} {next_best_grade_str}{self.color.Normal}")
 		if self.args.breakdown:
@@ -112,23 +117,16 @@ class ActionPrint(BaseAction):
 			case "grade":
 				self._entries.sort(key = lambda entry: (-entry.grade.grade.achieved_points, entry.student.last_name, entry.student.first_name))
 
-	def _print_histogram(self, name: str, bucket_count: int, min_value: float, max_value: float, get_value: "callable", reverse: bool = False):
+	def _print_histogram(self, name: str, bucket_count: int, min_value: float, max_value: float, value_statistics: "ValueStatistics", reverse: bool = False):
 		if self.total_student_count == 0:
 			return
 
 		bucket_width = (max_value - min_value) / bucket_count
-		buckets = [ 0 ] * bucket_count
-		if bucket_width == 0:
+		buckets = value_statistics.histogram(bucket_count, min_value, max_value)
+		if buckets is None:
 			return
 
 		print(f"{name} histogram:")
-		for entry in self._entries:
-			bucket_index = int((get_value(entry) - min_value) / bucket_width)
-			if bucket_index < 0:
-				bucket_index = 0
-			elif bucket_index >= bucket_count:
-				bucket_index = bucket_count - 1
-			buckets[bucket_index] += 1
 
 		max_bar_width = 80
 		scale = max_bar_width / max(buckets)
@@ -146,21 +144,22 @@ class ActionPrint(BaseAction):
 		if self.total_student_count == 0:
 			return
 
-		self._print_histogram("Grade", 8, 1.0, 5.0, get_value = lambda entry: entry.grade.grade.value)
-
-		max_points = max(entry.grade.grade.achieved_points for entry in self._entries)
-		self._print_histogram("Point", 10, 0, max_points, get_value = lambda entry: entry.grade.grade.achieved_points, reverse = True)
+		self._print_histogram("Grade", 8, 1.0, 5.0, self._statistics.grades)
+		self._print_histogram("Point", 10, 0, self._statistics.points.max, self._statistics.points, reverse = True)
 
 	def run(self):
 		self.color = ColorScheme()
 		self._exam = Exam.load_json(self.args.exam_json)
 		self._entries = [ ]
-		self._counts = {
-			"incomplete_data": 0,
-			"passed_students": 0,
-		}
+		self._statistics = StatisticsAccumulator()
+		self._omitted_incomplete_count = 0
 
+		skip_incomplete = (not self.args.show_all) and (not self.args.only_failed) and (self.args.hypothesize == "no")
 		for student in self._filtered_students():
+			if skip_incomplete and (not self._exam.has_complete_results(student)):
+				self._omitted_incomplete_count += 1
+				continue
+
 			grade = self._exam.grade(student)
 			if self.args.only_failed and grade.grade.passing:
 				continue
@@ -192,14 +191,15 @@ class ActionPrint(BaseAction):
 			entry = self.DisplayEntry(student = student, grade = grade)
 
 			if (not entry.grade.complete_data) and (not self.args.show_all):
-				self._counts["incomplete_data"] += 1
+				self._omitted_incomplete_count += 1
 				continue
 
-			if entry.grade.grade.passing:
-				self._counts["passed_students"] += 1
+			self._statistics.add(entry.grade)
 			self._entries.append(entry)
 
 		self._sort_entries()
+		if self.args.rank:
+			self._rank_index = self._exam.rank_index()
 		for entry in self._entries:
 			self._print_entry(entry)
 		print()
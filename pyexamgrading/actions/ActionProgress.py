@@ -0,0 +1,83 @@
+#	pyexamgrading - Manage grade computation of university exams
+#	Copyright (C) 2024-2024 Johannes Bauer
+#
+#	This file is part of pyexamgrading.
+#
+#	pyexamgrading is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyexamgrading is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyexamgrading; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import sys
+import json
+from pyexamgrading.MultiCommand import BaseAction
+from pyexamgrading.Exam import Exam
+
+class ActionProgress(BaseAction):
+	@staticmethod
+	def _percent(part: int, total: int):
+		return (part / total * 100) if (total > 0) else 100
+
+	def _print_progress(self, title: str, progress: Exam.Progress):
+		print(f"{title}: {progress.entered} of {progress.total} results entered ({self._percent(progress.entered, progress.total):.1f}%), {progress.complete_count} of {progress.student_count} students complete")
+		if self.args.summary:
+			return
+		name_width = max([ len(task_progress.task.name) for task_progress in progress.tasks ] + [ 4 ])
+		for task_progress in progress.tasks:
+			if self.args.ungraded and (task_progress.missing == 0):
+				continue
+			print(f"    {task_progress.task.name:<{name_width}s} {task_progress.entered:>5d} / {progress.student_count:<5d} {self._percent(task_progress.entered, progress.student_count):5.1f}%  {task_progress.missing:>5d} missing")
+
+	def _print_missing(self, task_name: str):
+		students = sorted(self._exam.students_missing(task_name, course = self.args.filter_course))
+		print(f"{len(students)} student(s) without result for '{task_name}':")
+		for student in students:
+			print(f"    {student.course:<6s} {student.full_name:<40s} {student.student_number}")
+
+	def _progress_dict(self, progress: Exam.Progress):
+		return {
+			"student_count": progress.student_count,
+			"complete_count": progress.complete_count,
+			"entered": progress.entered,
+			"total": progress.total,
+			"tasks": [ { "task": task_progress.task.name, "entered": task_progress.entered, "missing": task_progress.missing } for task_progress in progress.tasks ],
+		}
+
+	def run(self):
+		self._exam = Exam.load_json(self.args.exam_json)
+		for task_name in self.args.missing:
+			if not self._exam.structure.has_task_with_name(task_name):
+				raise ValueError(f"No such task: {task_name}")
+
+		courses = sorted(set(student.course or "" for student in self._exam.students)) if self.args.by_course else [ ]
+		if self.args.output_format == "json":
+			result = { "overall": self._progress_dict(self._exam.progress(course = self.args.filter_course)) }
+			if self.args.by_course:
+				result["courses"] = { course: self._progress_dict(self._exam.progress(course = course, exact_course = True)) for course in courses }
+			if len(self.args.missing) > 0:
+				result["missing"] = { task_name: [ student.student_number for student in sorted(self._exam.students_missing(task_name, course = self.args.filter_course)) ] for task_name in self.args.missing }
+			json.dump(result, sys.stdout, indent = "\t")
+			print()
+			return
+
+		if len(self.args.missing) > 0:
+			for task_name in self.args.missing:
+				self._print_missing(task_name)
+			return
+
+		title = "Overall" if (self.args.filter_course is None) else f"Course {self.args.filter_course}"
+		self._print_progress(title, self._exam.progress(course = self.args.filter_course))
+		for course in courses:
+			print()
+			self._print_progress(f"Course {course}", self._exam.progress(course = course, exact_course = True))
@@ -24,13 +24,11 @@ from pyexamgrading.Exam import Exam
 
 class ActionRemoveStudent(BaseAction):
 	def _remove_students_without_result(self, task_name: str):
-		total_count = 0
-		removed_count = 0
-		for student in list(self._exam.students):
-			total_count += 1
-			if not self._exam.results.have(student, task_name):
-				removed_count += 1
-				self._exam.remove_student(student)
+		total_count = len(self._exam.students)
+		students_without_result = self._exam.students_missing(task_name)
+		for student in students_without_result:
+			self._exam.remove_student(student)
+		removed_count = len(students_without_result)
 		remaining_count = total_count - removed_count
 		print(f"Removed {removed_count} of {total_count} students who do not have results for task '{task_name}' ({remaining_count} students remaining).")
 
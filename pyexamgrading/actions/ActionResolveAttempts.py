@@ -0,0 +1,65 @@
+#	pyexamgrading - Manage grade computation of university exams
+#	Copyright (C) 2024-2024 Johannes Bauer
+#
+#	This file is part of pyexamgrading.
+#
+#	pyexamgrading is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyexamgrading is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyexamgrading; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import csv
+from pyexamgrading.MultiCommand import BaseAction
+from pyexamgrading.Attempts import AttemptResolver, ResolutionPolicy
+
+class ActionResolveAttempts(BaseAction):
+	def _print_resolved(self, resolved: "ResolvedGrade"):
+		attempt_strs = [ ]
+		for attempt in resolved.attempts:
+			marker = "*" if (attempt is resolved.final) else " "
+			incomplete = "⚠" if (not attempt.grade.complete_data) else ""
+			attempt_strs.append(f"#{attempt.attempt_index + 1}{marker} {attempt.grade.grade.text}{incomplete}")
+		final_grade = resolved.final.grade
+		final_str = final_grade.grade.text if final_grade.complete_data else f"{final_grade.grade.text} (incomplete)"
+		print(f"{resolved.student.course:<6s} {resolved.student.full_name:<40s} {final_str:<16s} {'   '.join(attempt_strs)}")
+
+	def _write_csv(self, resolved_grades: list["ResolvedGrade"]):
+		with open(self.args.output_filename, "w") as f:
+			writer = csv.writer(f)
+			heading = [ "Kurs", "Nachname", "Vorname", "Matrikelnummer" ]
+			for attempt_index in range(len(self._resolver.exams)):
+				heading.append(f"Note Versuch {attempt_index + 1}")
+			heading += [ "Endnote", "Gewerteter Versuch", "Vollständig" ]
+			writer.writerow(heading)
+
+			for resolved in resolved_grades:
+				grades = [ "" ] * len(self._resolver.exams)
+				for attempt in resolved.attempts:
+					grades[attempt.attempt_index] = attempt.grade.grade.text
+				student = resolved.student
+				writer.writerow([ student.course, student.last_name, student.first_name, student.student_number ] + grades + [ resolved.final.grade.grade.text, resolved.final.attempt_index + 1, resolved.final.grade.complete_data ])
+
+	def run(self):
+		self._resolver = AttemptResolver.load_files(self.args.exam_json, policy = ResolutionPolicy(self.args.policy), carry_over_groups = self.args.carry_over)
+		if self.args.verbose >= 1:
+			for (attempt_index, exam) in enumerate(self._resolver.exams, 1):
+				print(f"Attempt #{attempt_index}: {exam.name} ({exam.date}), {len(exam.students)} students")
+			print()
+
+		resolved_grades = sorted(self._resolver.resolve(), key = lambda resolved: (resolved.student.last_name, resolved.student.first_name))
+		if self.args.output_filename is not None:
+			self._write_csv(resolved_grades)
+		else:
+			for resolved in resolved_grades:
+				self._print_resolved(resolved)
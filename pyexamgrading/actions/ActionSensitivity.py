@@ -0,0 +1,92 @@
+#	pyexamgrading - Manage grade computation of university exams
+#	Copyright (C) 2024-2024 Johannes Bauer
+#
+#	This file is part of pyexamgrading.
+#
+#	pyexamgrading is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyexamgrading is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyexamgrading; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import os
+import sys
+import csv
+import json
+from pyexamgrading.MultiCommand import BaseAction
+from pyexamgrading.Exam import Exam
+from pyexamgrading.ResultExporter import StudentResult
+from pyexamgrading.Sensitivity import SensitivityAnalysis
+
+class ActionSensitivity(BaseAction):
+	def _filtered_students(self):
+		for student in self._exam.students:
+			if (self.args.search is not None) and (not student.matches(self.args.search)):
+				continue
+			if (self.args.filter_course is not None) and (not self.args.filter_course.lower() in student.course.lower()):
+				continue
+			yield student
+
+	def _print_text(self, analysis: SensitivityAnalysis, results: list, f):
+		print(f"{analysis.student_count} students, {len(analysis.tasks)} tasks", file = f)
+		print(file = f)
+		name_width = max([ len(result.task.name) for result in results ] + [ 4 ])
+		scenario_width = max([ len(result.scenario) for result in results ] + [ 8 ])
+		print(f"{'Task':<{name_width}s}  {'Scenario':<{scenario_width}s}  {'Changed':>7s}  {'Better':>6s}  {'Worse':>6s}  {'Passed':>6s}  {'Failed':>6s}  {'Ø Δ':>6s}", file = f)
+		for result in results:
+			print(f"{result.task.name:<{name_width}s}  {result.scenario:<{scenario_width}s}  {result.changed:>7d}  {result.improved:>6d}  {result.worsened:>6d}  {result.newly_passed:>6d}  {result.newly_failed:>6d}  {float(result.mean_grade_change):>+6.2f}", file = f)
+			if self.args.verbose >= 1:
+				for change in result.changes:
+					print(f"    {change.entry.student.course:<6s} {change.entry.student.full_name:<40s} {change.entry.grade.grade.text} -> {change.grade.text}", file = f)
+
+	def _write_csv(self, results: list, f):
+		writer = csv.writer(f)
+		writer.writerow([ "Aufgabe", "Szenario", "Max. Punkte", "Geänderte Noten", "Verbessert", "Verschlechtert", "Neu bestanden", "Neu nicht bestanden", "Mittlere Notenänderung" ])
+		for result in results:
+			writer.writerow([ result.task.name, result.scenario, float(result.max_points), result.changed, result.improved, result.worsened, result.newly_passed, result.newly_failed, float(result.mean_grade_change) ])
+
+	def run(self):
+		if (self.args.output_filename is not None) and (not self.args.force) and os.path.exists(self.args.output_filename):
+			raise FileExistsError(f"Refusing to overwrite: {self.args.output_filename}")
+
+		self._exam = Exam.load_json(self.args.exam_json)
+		task_names = set(self.args.task) if (len(self.args.task) > 0) else None
+		if task_names is not None:
+			for task_name in task_names:
+				if not self._exam.structure.has_task_with_name(task_name):
+					raise ValueError(f"No such task: {task_name}")
+
+		entries = [ ]
+		for student in self._filtered_students():
+			grade = self._exam.grade(student)
+			if (not self.args.include_incomplete) and (not grade.complete_data):
+				continue
+			entries.append(StudentResult(student = student, grade = grade))
+
+		analysis = SensitivityAnalysis(self._exam, entries)
+		deltas = [ delta for delta in self.args.delta for delta in (delta, -delta) ]
+		results = analysis.analyze(deltas = deltas, factors = self.args.scale, task_names = task_names)
+
+		f = sys.stdout if (self.args.output_filename is None) else open(self.args.output_filename, "w")
+		try:
+			match self.args.output_format:
+				case "text":
+					self._print_text(analysis, results, f)
+				case "csv":
+					self._write_csv(results, f)
+				case "json":
+					json.dump(analysis.to_dict(results), f, indent = "\t")
+					f.write("\n")
+		finally:
+			if f is not sys.stdout:
+				f.close()
@@ -0,0 +1,32 @@
+#	pyexamgrading - Manage grade computation of university exams
+#	Copyright (C) 2024-2024 Johannes Bauer
+#
+#	This file is part of pyexamgrading.
+#
+#	pyexamgrading is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyexamgrading is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyexamgrading; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+from pyexamgrading.MultiCommand import BaseAction
+from pyexamgrading.Server import ExamServer
+
+class ActionServe(BaseAction):
+	def run(self):
+		from pyexamgrading.__main__ import create_multicommand
+		server = ExamServer(self.args.socket_filename, multicommand = create_multicommand(), verbose = self.args.verbose)
+		try:
+			server.serve_forever()
+		except KeyboardInterrupt:
+			pass
@@ -0,0 +1,125 @@
+#	pyexamgrading - Manage grade computation of university exams
+#	Copyright (C) 2024-2024 Johannes Bauer
+#
+#	This file is part of pyexamgrading.
+#
+#	pyexamgrading is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyexamgrading is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyexamgrading; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import os
+import sys
+import csv
+import json
+from pyexamgrading.MultiCommand import BaseAction
+from pyexamgrading.Exam import Exam
+from pyexamgrading.GroupedStatistics import GroupedStatistics
+
+class ActionStats(BaseAction):
+	@staticmethod
+	def _fmt(value, fmt: str):
+		if value is None:
+			# Keep the columns aligned: pad to the width a number would take
+			return "-".rjust(len(format(0.0, fmt)))
+		return format(float(value), fmt)
+
+	@staticmethod
+	def _rate(accumulator: "StatisticsAccumulator"):
+		return (accumulator.passed_count / accumulator.count * 100) if (accumulator.count > 0) else None
+
+	def _rows(self, grouped: GroupedStatistics):
+		rows = [ (" / ".join(group_key), accumulator) for (group_key, accumulator) in grouped.groups.items() ]
+		rows.append(("Total", grouped.total))
+		return rows
+
+	def _grade_texts(self, grouped: GroupedStatistics):
+		return [ grade_count.text for grade_count in grouped.total.grade_counts ]
+
+	def _print_text(self, grouped: GroupedStatistics, f):
+		rows = self._rows(grouped)
+		name_width = max([ len(name) for (name, accumulator) in rows ] + [ len(", ".join(grouped.group_by)) ])
+		print(f"{', '.join(grouped.group_by):<{name_width}s}  {'Count':>5s}  {'Passed':>6s}  {'Rate':>6s}  {'Ø Grade':>7s}  {'Ø Points':>8s}  {'SD':>6s}", file = f)
+		for (name, accumulator) in rows:
+			if name == "Total":
+				print("-" * (name_width + 52), file = f)
+			print(f"{name:<{name_width}s}  {accumulator.count:>5d}  {accumulator.passed_count:>6d}  {self._fmt(self._rate(accumulator), '>5.1f')}%  {self._fmt(accumulator.grades.mean, '>7.2f')}  {self._fmt(accumulator.points.mean, '>8.2f')}  {self._fmt(accumulator.points.stddev, '>6.2f')}", file = f)
+
+		if self.args.grade_histogram:
+			print(file = f)
+			print(f"{'Grade':<{name_width}s}  " + "  ".join(f"{grade_text:>5s}" for grade_text in self._grade_texts(grouped)), file = f)
+			for (name, accumulator) in rows:
+				grade_counts = { grade_count.text: grade_count.count for grade_count in accumulator.grade_counts }
+				print(f"{name:<{name_width}s}  " + "  ".join(f"{grade_counts.get(grade_text, 0):>5d}" for grade_text in self._grade_texts(grouped)), file = f)
+
+		if self.args.tasks:
+			print(file = f)
+			task_width = max([ len(task.name) for task in self._exam.structure ] + [ 4 ])
+			column_width = max([ len(name) for (name, accumulator) in rows ] + [ 6 ])
+			print(f"{'Task':<{task_width}s}  " + "  ".join(f"{name:>{column_width}s}" for (name, accumulator) in rows), file = f)
+			for task in self._exam.structure:
+				means = [ accumulator.task_points[task.name].mean if (task.name in accumulator.task_points) else None for (name, accumulator) in rows ]
+				print(f"{task.name:<{task_width}s}  " + "  ".join(f"{self._fmt(mean, f'>{column_width}.2f')}" for mean in means), file = f)
+
+	def _write_csv(self, grouped: GroupedStatistics, f):
+		writer = csv.writer(f)
+		grade_texts = self._grade_texts(grouped)
+		tasks = list(self._exam.structure)
+		writer.writerow(grouped.group_by + [ "Anzahl", "Bestanden", "Bestehensquote", "Notendurchschnitt", "Punktedurchschnitt", "Standardabweichung Punkte" ] + [ f"Note {grade_text}" for grade_text in grade_texts ] + [ f"Ø {task.name}" for task in tasks ])
+		for (group_key, accumulator) in list(grouped.groups.items()) + [ (tuple([ "Gesamt" ] * len(grouped.group_by)), grouped.total) ]:
+			grade_counts = { grade_count.text: grade_count.count for grade_count in accumulator.grade_counts }
+			task_means = [ (float(accumulator.task_points[task.name].mean) if (accumulator.task_points[task.name].mean is not None) else None) if (task.name in accumulator.task_points) else None for task in tasks ]
+			writer.writerow(list(group_key) + [ accumulator.count, accumulator.passed_count, self._rate(accumulator), None if (accumulator.grades.mean is None) else float(accumulator.grades.mean), None if (accumulator.points.mean is None) else float(accumulator.points.mean), accumulator.points.stddev ] + [ grade_counts.get(grade_text, 0) for grade_text in grade_texts ] + task_means)
+
+	def _summary_dict(self, accumulator: "StatisticsAccumulator"):
+		return {
+			"count": accumulator.count,
+			"passed": accumulator.passed_count,
+			"pass_rate": self._rate(accumulator),
+			"average_grade": None if (accumulator.grades.mean is None) else float(accumulator.grades.mean),
+			"average_points": None if (accumulator.points.mean is None) else float(accumulator.points.mean),
+			"stddev_points": accumulator.points.stddev,
+			"grades": { grade_count.text: grade_count.count for grade_count in accumulator.grade_counts },
+			"task_means": { task_name: (None if (task_points.mean is None) else float(task_points.mean)) for (task_name, task_points) in accumulator.task_points.items() },
+		}
+
+	def run(self):
+		if (self.args.output_filename is not None) and (not self.args.force) and os.path.exists(self.args.output_filename):
+			raise FileExistsError(f"Refusing to overwrite: {self.args.output_filename}")
+
+		group_by = GroupedStatistics.parse_group_by(self.args.group_by)
+		self._exam = Exam.load_json(self.args.exam_json)
+		if self.args.jobs > 1:
+			grouped = GroupedStatistics.from_exam_parallel(self.args.exam_json, group_by, search = self.args.search, filter_course = self.args.filter_course, include_incomplete = self.args.show_all, shard_count = self.args.jobs)
+		else:
+			grouped = GroupedStatistics.from_exam(self._exam, group_by, search = self.args.search, filter_course = self.args.filter_course, include_incomplete = self.args.show_all)
+
+		f = sys.stdout if (self.args.output_filename is None) else open(self.args.output_filename, "w")
+		try:
+			match self.args.output_format:
+				case "text":
+					self._print_text(grouped, f)
+				case "csv":
+					self._write_csv(grouped, f)
+				case "json":
+					result = {
+						"group_by": group_by,
+						"groups": [ dict(self._summary_dict(accumulator), group = list(group_key)) for (group_key, accumulator) in grouped.groups.items() ],
+						"total": self._summary_dict(grouped.total),
+					}
+					json.dump(result, f, indent = "\t")
+					f.write("\n")
+		finally:
+			if f is not sys.stdout:
+				f.close()
@@ -0,0 +1,180 @@
+#	pyexamgrading - Manage grade computation of university exams
+#	Copyright (C) 2024-2024 Johannes Bauer
+#
+#	This file is part of pyexamgrading.
+#
+#	pyexamgrading is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyexamgrading is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyexamgrading; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import os
+import sys
+import csv
+import json
+import fractions
+from pyexamgrading.MultiCommand import BaseAction
+from pyexamgrading.Exam import Exam
+from pyexamgrading.Structure import Structure, ScalingMode
+from pyexamgrading.ResultExporter import StudentResult
+from pyexamgrading.WhatIf import StructureWhatIf
+from pyexamgrading.Exceptions import TestCorrectionException
+
+class ActionWhatIf(BaseAction):
+	def _filtered_students(self):
+		for student in self._exam.students:
+			if (self.args.search is not None) and (not student.matches(self.args.search)):
+				continue
+			if (self.args.filter_course is not None) and (not self.args.filter_course.lower() in student.course.lower()):
+				continue
+			yield student
+
+	@staticmethod
+	def _parse_assignment(text: str):
+		if "=" not in text:
+			raise ValueError(f"Expected name=value, got: {text}")
+		(name, value) = text.rsplit("=", maxsplit = 1)
+		return (name, fractions.Fraction(value))
+
+	def _base_structure(self):
+		if self.args.structure is None:
+			return self._exam.structure
+		with open(self.args.structure) as f:
+			data = json.load(f)
+		return Structure.from_dict(data.get("structure", data))
+
+	def _print_structure(self, structure: Structure, f):
+		data = structure.to_dict()
+		groups_str = ", ".join(f"{name} = {value}" for (name, value) in data["groups"].items())
+		print(f"Groups: {groups_str or '-'}, reference group: {data['reference_group']}, max. {float(structure.max_points):.2f} points", file = f)
+		for task in structure:
+			if task.scale_mode is not None:
+				unit = "points" if (task.scale_mode == ScalingMode.Points) else "%"
+				print(f"    {task.name}: scaled to {task.scale_value} {unit}", file = f)
+
+	def _print_text(self, result: StructureWhatIf.WhatIfResult, f):
+		self._print_structure(result.structure, f)
+		print(f"Max. points {float(result.old_max_points):.2f} -> {float(result.new_max_points):.2f}; {result.changed} of {len(result.students)} grades changed, {result.improved} better, {result.worsened} worse, {result.newly_passed} newly passed, {result.newly_failed} newly failed", file = f)
+		for change in result.students:
+			if (not self.args.show_all) and (change.old_grade.value == change.new_grade.value):
+				continue
+			marker = " " if (change.old_grade.value == change.new_grade.value) else "*"
+			print(f"  {marker} {change.entry.student.course:<6s} {change.entry.student.full_name:<40s} {float(change.old_points):6.2f} -> {float(change.new_points):6.2f} pts  {change.old_grade.text} -> {change.new_grade.text}", file = f)
+
+	def _write_csv(self, result: StructureWhatIf.WhatIfResult, f):
+		writer = csv.writer(f)
+		writer.writerow([ "Kurs", "Nachname", "Vorname", "Matrikelnummer", "Punkte vorher", "Punkte nachher", "Note vorher", "Note nachher" ])
+		for change in result.students:
+			if (not self.args.show_all) and (change.old_grade.value == change.new_grade.value):
+				continue
+			writer.writerow([ change.entry.student.course, change.entry.student.last_name, change.entry.student.first_name, change.entry.student.student_number, float(change.old_points), float(change.new_points), change.old_grade.text, change.new_grade.text ])
+
+	def _output(self, result: StructureWhatIf.WhatIfResult, f):
+		match self.args.output_format:
+			case "text":
+				self._print_text(result, f)
+			case "csv":
+				self._write_csv(result, f)
+			case "json":
+				json.dump(StructureWhatIf.to_dict(result), f, indent = "\t")
+				f.write("\n")
+
+	def _apply_command(self, structure: Structure, command: str, argument: str):
+		match command:
+			case "weight":
+				return structure.with_changes(groups = dict([ self._parse_assignment(argument) ]))
+			case "reference":
+				return structure.with_changes(reference_group = argument)
+			case "points":
+				(task_name, value) = self._parse_assignment(argument)
+				return structure.with_changes(task_scaling = { task_name: (ScalingMode.Points, value) })
+			case "percentage":
+				(task_name, value) = self._parse_assignment(argument)
+				return structure.with_changes(task_scaling = { task_name: (ScalingMode.Percentage, value) })
+			case "unscale":
+				return structure.with_changes(task_scaling = { argument: None })
+		raise ValueError(f"Unknown command: {command}")
+
+	def _save_structure(self, structure: Structure, filename: str):
+		if filename == "":
+			raise ValueError("Expected a filename to save the structure to.")
+		if (not self.args.force) and os.path.exists(filename):
+			raise FileExistsError(f"Refusing to overwrite: {filename}")
+		with open(filename, "w") as f:
+			json.dump(structure.to_dict(), f, indent = "\t")
+			f.write("\n")
+
+	def _interactive(self, what_if: StructureWhatIf, structure: Structure):
+		print("Commands: weight group=value, reference group, points task=value, percentage task=value, unscale task, save filename, reset, quit")
+		self._print_text(what_if.evaluate(structure), sys.stdout)
+		while True:
+			try:
+				line = input("whatif> ").strip()
+			except EOFError:
+				print()
+				break
+			if line == "":
+				continue
+			(command, _, argument) = line.partition(" ")
+			argument = argument.strip()
+			if command in [ "quit", "q" ]:
+				break
+			elif command == "reset":
+				structure = self._base_structure()
+			elif command == "save":
+				try:
+					self._save_structure(structure, argument)
+				except (ValueError, OSError) as e:
+					print(f"Error: {e.__class__.__name__}: {e}")
+					continue
+				print(f"Structure written to {argument}")
+				continue
+			else:
+				try:
+					structure = self._apply_command(structure, command, argument)
+				except (ValueError, KeyError, ZeroDivisionError, TestCorrectionException) as e:
+					print(f"Error: {e.__class__.__name__}: {e}")
+					continue
+			self._print_text(what_if.evaluate(structure), sys.stdout)
+
+	def run(self):
+		if (self.args.output_filename is not None) and (not self.args.force) and os.path.exists(self.args.output_filename):
+			raise FileExistsError(f"Refusing to overwrite: {self.args.output_filename}")
+
+		self._exam = Exam.load_json(self.args.exam_json)
+		entries = [ StudentResult(student = student, grade = self._exam.grade(student)) for student in self._filtered_students() ]
+		what_if = StructureWhatIf(self._exam, entries)
+
+		task_scaling = { }
+		for assignment in self.args.scale_points:
+			(task_name, value) = self._parse_assignment(assignment)
+			task_scaling[task_name] = (ScalingMode.Points, value)
+		for assignment in self.args.scale_percentage:
+			(task_name, value) = self._parse_assignment(assignment)
+			task_scaling[task_name] = (ScalingMode.Percentage, value)
+		for task_name in self.args.unscale:
+			task_scaling[task_name] = None
+		groups = dict(self._parse_assignment(assignment) for assignment in self.args.group_weight)
+		structure = self._base_structure().with_changes(groups = groups, reference_group = self.args.reference_group, task_scaling = task_scaling)
+
+		if self.args.interactive:
+			self._interactive(what_if, structure)
+			return
+
+		f = sys.stdout if (self.args.output_filename is None) else open(self.args.output_filename, "w")
+		try:
+			self._output(what_if.evaluate(structure), f)
+		finally:
+			if f is not sys.stdout:
+				f.close()
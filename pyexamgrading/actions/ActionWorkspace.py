@@ -0,0 +1,88 @@
+#	pyexamgrading - Manage grade computation of university exams
+#	Copyright (C) 2024-2024 Johannes Bauer
+#
+#	This file is part of pyexamgrading.
+#
+#	pyexamgrading is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyexamgrading is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyexamgrading; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import csv
+import sys
+import time
+import fractions
+from pyexamgrading.MultiCommand import BaseAction
+from pyexamgrading.Workspace import Workspace
+
+class ActionWorkspace(BaseAction):
+	def _refresh(self):
+		t0 = time.time()
+		result = self._workspace.refresh(jobs = self.args.jobs, rebuild = self.args.rebuild)
+		t1 = time.time()
+		if self.args.verbose >= 1:
+			for relpath in result.updated:
+				print(f"Indexed: {relpath}", file = sys.stderr)
+			for relpath in result.removed:
+				print(f"Removed: {relpath}", file = sys.stderr)
+		for (relpath, error) in result.unindexable:
+			print(f"Warning: cannot index {relpath}: {error}", file = sys.stderr)
+		if (len(result.updated) > 0) or (len(result.removed) > 0) or (self.args.verbose >= 1):
+			print(f"Workspace index refreshed in {t1 - t0:.1f} sec: {len(result.updated)} file(s) updated, {len(result.removed)} removed, {result.unchanged} unchanged; {self._workspace.exam_count} exams indexed.", file = sys.stderr)
+
+	def _write_rows(self, heading: list[str], rows: list[list]):
+		if self.args.output_filename is None:
+			return False
+		with open(self.args.output_filename, "w") as f:
+			writer = csv.writer(f)
+			writer.writerow(heading)
+			writer.writerows(rows)
+		return True
+
+	def _show_transcript(self, student_number: str):
+		transcript = self._workspace.transcript(student_number)
+		rows = [ [ item.filename, item.exam["name"], item.exam["date"], item.entry["course"], item.entry["grade"], float(fractions.Fraction(item.entry["achieved_points"])), float(fractions.Fraction(item.exam["max_points"])), item.entry["complete_data"] ] for item in transcript ]
+		if self._write_rows([ "Datei", "Prüfungsfach", "Datum", "Kurs", "Note", "Punkte", "Gesamtpunkte", "Vollständig" ], rows):
+			return
+
+		if len(transcript) == 0:
+			print(f"No results for student number {student_number} in workspace.")
+			return
+		print(f"{transcript[0].entry['last_name']}, {transcript[0].entry['first_name']} ({student_number}):")
+		for item in transcript:
+			indicator = "" if item.entry["complete_data"] else "⚠"
+			print(f"{indicator:<3s} {item.exam['date']:<12s} {item.exam['name']:<50s} {item.entry['grade']:<5s} {fractions.Fraction(item.entry['achieved_points']):.1f} / {fractions.Fraction(item.exam['max_points']):.1f}")
+
+	def _show_course(self, course: str):
+		summaries = self._workspace.course_summary(course)
+		rows = [ [ summary.filename, summary.exam["name"], summary.exam["date"], summary.total_count, summary.passed_count, summary.incomplete_count ] for summary in summaries ]
+		if self._write_rows([ "Datei", "Prüfungsfach", "Datum", "Arbeiten", "Bestanden", "Unvollständig" ], rows):
+			return
+
+		if len(summaries) == 0:
+			print(f"No exams for course {course} in workspace.")
+			return
+		for summary in summaries:
+			pass_rate = f"{summary.passed_count / summary.total_count * 100:.1f}%" if (summary.total_count > 0) else "-"
+			print(f"{summary.exam['date']:<12s} {summary.exam['name']:<50s} {summary.passed_count:>4d} of {summary.total_count:<4d} pass ({pass_rate})")
+
+	def run(self):
+		self._workspace = Workspace(self.args.directory, index_filename = self.args.index_file)
+		if not self.args.no_refresh:
+			self._refresh()
+
+		if self.args.student is not None:
+			self._show_transcript(self.args.student)
+		elif self.args.course is not None:
+			self._show_course(self.args.course)
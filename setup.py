@@ -20,6 +20,9 @@ setuptools.setup(
 		"mako",
 		"odsexport",
 	],
+	extras_require = {
+		"parquet": [ "pyarrow" ],
+	},
 	entry_points = {
 		"console_scripts": [
 			"pyexam = pyexamgrading.__main__:main"